@@ -0,0 +1,100 @@
+"""
+Replay benchmark of the camera drone yaw controller: legacy alpha smoothing vs. bearing filter.
+
+A target moves around the hovering camera drone with a few bearing profiles. The tracker
+reports its pixel x every 0.3 s, each report captured 100-250 ms before it reaches the
+controller, with pixel noise, and only while the target is inside the field of view. The
+controller runs at 10 Hz with the trajectory yaw fixed at 0, and the drone heading follows the
+commanded yaw with a first-order lag. Reported: RMS and p95 of |target bearing - heading| and
+the share of ticks where the target is out of the image.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_bearing_filter
+"""
+
+import numpy as np
+
+from functions.bearing_filter import BearingFilter, alpha_smoothed_yaw, bearing_yaw, pixel_to_angle, wrap_degrees
+
+
+IMAGE_WIDTH = 640
+HORIZONTAL_FOV = 87
+CONTROL_RATE_HZ = 10
+DETECTION_PERIOD = 0.3
+LATENCY_RANGE = (0.10, 0.25)
+PIXEL_NOISE = 4.0
+HEADING_TAU = 0.3                   # time constant of the yaw response of the drone, in seconds
+DURATION = 60.0
+
+PROFILES = {
+    "static": lambda t: np.full_like(t, 20.0),
+    "sweep": lambda t: 160.0 * np.abs((t / 20.0) % 1.0 - 0.5) - 40.0,       # 8°/s back and forth over ±40°
+    "sine": lambda t: 35.0 * np.sin(2 * np.pi * t / 12.0),
+    "fast_sine": lambda t: 35.0 * np.sin(2 * np.pi * t / 5.0),
+}
+
+
+def replay(profile, controller, seed=0):
+    rng = np.random.default_rng(seed)
+    dt = 1.0 / CONTROL_RATE_HZ
+    substeps = 10                                     # heading integration steps per tick
+    ticks = np.arange(0.0, DURATION, dt)
+    capture_times = np.arange(0.0, DURATION, DETECTION_PERIOD)
+    arrival_times = capture_times + rng.uniform(*LATENCY_RANGE, capture_times.size)
+
+    heading = 0.0
+    heading_history = [(0.0, heading)]
+    bearing_filter = BearingFilter()
+    last_pixel_x = None
+    next_detection = 0
+    errors = []
+    out_of_view = 0
+
+    def heading_at(t):
+        times, values = zip(*heading_history)
+        return np.interp(t, times, values)
+
+    for t in ticks:
+        # Detections that reached the controller since the last tick
+        while next_detection < capture_times.size and arrival_times[next_detection] <= t:
+            capture = capture_times[next_detection]
+            capture_heading = heading_at(capture)
+            angle = wrap_degrees(profile(np.array([capture]))[0] - capture_heading)
+            if abs(angle) < HORIZONTAL_FOV / 2:
+                pixel_x = IMAGE_WIDTH // 2 + angle * IMAGE_WIDTH / HORIZONTAL_FOV + rng.normal(0, PIXEL_NOISE)
+                last_pixel_x = pixel_x
+                bearing_filter.update(capture_heading + pixel_to_angle(pixel_x, IMAGE_WIDTH, HORIZONTAL_FOV), capture)
+            next_detection += 1
+
+        yaw = 0.0                                      # trajectory yaw
+        command = yaw
+        if last_pixel_x is not None:
+            if controller == "legacy":
+                command, _, _ = alpha_smoothed_yaw(yaw, last_pixel_x, IMAGE_WIDTH, HORIZONTAL_FOV)
+            else:
+                bearing = bearing_filter.predict(t)
+                if bearing is not None:
+                    command = bearing_yaw(yaw, bearing)
+
+        for k in range(1, substeps + 1):
+            heading += (command - heading) * (dt / substeps) / HEADING_TAU
+            heading_history.append((t + k * dt / substeps, heading))
+
+        error = abs(wrap_degrees(profile(np.array([t + dt]))[0] - heading))
+        errors.append(error)
+        out_of_view += error > HORIZONTAL_FOV / 2
+
+    errors = np.array(errors)
+    return np.sqrt(np.mean(errors ** 2)), np.percentile(errors, 95), out_of_view / errors.size
+
+
+def main():
+    print(f"{'profile':<15}{'controller':<12}{'rms err °':>11}{'p95 err °':>11}{'out of view':>13}")
+    for name, profile in PROFILES.items():
+        for controller in ("legacy", "bearing"):
+            rms, p95, lost = replay(profile, controller)
+            print(f"{name:<15}{controller:<12}{rms:>11.2f}{p95:>11.2f}{lost:>12.1%}")
+
+
+if __name__ == "__main__":
+    main()
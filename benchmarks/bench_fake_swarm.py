@@ -0,0 +1,100 @@
+"""
+Load test of the offboard stack (run_swarm / run_drone) against the in-process fake MAVSDK.
+
+Flies N simulated drones (functions/fake_mavsdk.py) through a short mission on one event loop
+and reports, for each swarm size:
+- startup: time until every drone is in offboard
+- setpoints/s actually received by the simulated vehicles vs. the nominal rate
+- tick lateness p50/p99/max over all drones (functions/tick_scheduler.py)
+- CPU time used by the process, per second of wall time
+- RMS distance between the simulated vehicles and their setpoints while in offboard
+  (sanity check of the simulation)
+
+The per-drone output of run_drone is discarded.
+
+Usage (from the repository root; needs the mavsdk package for the offboard types):
+    python -m benchmarks.bench_fake_swarm [N ...]
+"""
+
+import asyncio
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import offboard_multiple_from_csv as offboard
+from functions.fake_mavsdk import FakeSwarm
+from functions.mission_compiler import compile_mission
+from functions.swarm_manifest import DroneSpec, ROLE_FLYER
+from functions.tick_scheduler import LatencyHistogram
+from functions.trajectory_file import write_trajectory_binary
+
+
+SWARM_SIZES = [50, 200, 500]
+SETPOINT_RATE_HZ = 10.0
+mission_params = dict(
+    shape_name="circle", diameter=6.0, direction=1, maneuver_time=8.0, start_x=2, start_y=2,
+    initial_altitude=3, climb_rate=1.5, move_speed=2.0, hold_time=1.0, step_time=0.05,
+)
+
+
+async def fly(num_drones, trajectory_file):
+    specs = [DroneSpec(i, 14540 + i, 50040 + i, trajectory_file, (0.0, 0.0, 0.0), 0.0, 0.0, ROLE_FLYER) for i in range(num_drones)]
+    swarm = FakeSwarm([spec.drone_id for spec in specs])
+    swarm.start()
+    offboard.tick_schedulers.clear()
+
+    startup = None
+    errors = []
+
+    async def watch():
+        nonlocal startup
+        while True:
+            if startup is None and swarm.offboard.all():
+                startup = time.perf_counter() - start_wall
+            flying = swarm.offboard & (swarm.position[:, 2] < -0.5)
+            errors.extend(np.linalg.norm(swarm.position[flying] - swarm.target_position[flying], axis=1))
+            await asyncio.sleep(0.1)
+
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+    watcher = asyncio.ensure_future(watch())
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        await offboard.run_swarm(specs, system_factory=swarm.system_factory)
+    wall, cpu = time.perf_counter() - start_wall, time.process_time() - start_cpu
+    watcher.cancel()
+    swarm.stop()
+    rms_error = float(np.sqrt(np.mean(np.square(errors)))) if errors else float("nan")
+    return swarm, wall, cpu, startup, rms_error
+
+
+def main():
+    sizes = [int(n) for n in sys.argv[1:]] or SWARM_SIZES
+    mission = compile_mission(**mission_params)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        trajectory_file = os.path.join(tmp, "mission.traj")
+        write_trajectory_binary(mission, trajectory_file)
+        duration = float(mission["t"][-1])
+        print(f"mission: {duration:.1f} s, {len(mission)} rows, setpoints at {SETPOINT_RATE_HZ:.0f} Hz")
+        print(f"{'drones':>7}{'startup s':>11}{'wall s':>9}{'cpu s/s':>9}{'setpoints/s':>13}{'nominal':>10}"
+              f"{'late p50 ms':>13}{'late p99 ms':>13}{'late max ms':>13}{'rms err m':>11}")
+
+        for num_drones in sizes:
+            swarm, wall, cpu, startup, rms_error = asyncio.run(fly(num_drones, trajectory_file))
+
+            lateness = LatencyHistogram("tick_lateness")
+            for scheduler in offboard.tick_schedulers.values():
+                lateness.merge(scheduler.lateness)
+            late = lateness.summary()
+            setpoint_rate = swarm.setpoints_received.sum() / wall
+
+            print(f"{num_drones:>7}{startup or float('nan'):>11.2f}{wall:>9.1f}{cpu / wall:>9.2f}{setpoint_rate:>13.0f}"
+                  f"{num_drones * SETPOINT_RATE_HZ:>10.0f}{late['p50'] * 1e3:>13.2f}{late['p99'] * 1e3:>13.2f}"
+                  f"{late['max'] * 1e3:>13.2f}{rms_error:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
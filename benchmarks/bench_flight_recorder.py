@@ -0,0 +1,103 @@
+"""
+Overhead of the flight recorder (functions/flight_recorder.py) at 100 drones x 50 Hz.
+
+Replays 60 s of flight as fast as possible: at every 50 Hz tick each drone records one
+setpoint row (control loop), and every 5th tick the four telemetry streams of every drone
+record one row each (telemetry callbacks, 10 Hz). The time spent in append() is measured per
+row and per swarm tick, and compared with:
+- the budget: BUDGET_PER_ROW per setpoint row at p99, i.e. NUM_DRONES * BUDGET_PER_ROW
+  (2.5 % of the 20 ms tick period) for the setpoints of a whole swarm tick
+- print(): one formatted line per setpoint to /dev/null, the previous "record" of a flight
+
+The file is read back to check that every row was written.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_flight_recorder
+"""
+
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from functions.flight_recorder import FlightRecorder, SETPOINT_COLUMNS, read_flight_record
+from functions.telemetry_store import STREAMS
+
+
+NUM_DRONES = 100
+RATE_HZ = 50
+TELEMETRY_RATE_HZ = 10
+DURATION = 60.0
+BUDGET_PER_ROW = 5e-6               # seconds per recorded setpoint row
+
+
+def main():
+    ticks = int(DURATION * RATE_HZ)
+    period = 1.0 / RATE_HZ
+    telemetry_every = RATE_HZ // TELEMETRY_RATE_HZ
+    rng = np.random.default_rng(0)
+    setpoints = rng.normal(size=(NUM_DRONES, 11)).tolist()     # px..az, yaw, mode
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "flight.drec")
+        recorder = FlightRecorder(path)
+        setpoint_tables = [recorder.table(d, "setpoint", SETPOINT_COLUMNS) for d in range(NUM_DRONES)]
+        telemetry_tables = [[(recorder.table(d, name, ("time",) + columns), (0.0,) * len(columns))
+                             for name, (_, columns, _) in STREAMS.items()] for d in range(NUM_DRONES)]
+
+        row_times = np.empty(ticks * NUM_DRONES)
+        tick_times = np.empty(ticks)
+        telemetry_times = []
+        k = 0
+        start = time.perf_counter()
+        for tick in range(ticks):
+            tick_start = time.perf_counter()
+            t = tick * period
+            for drone in range(NUM_DRONES):
+                row_start = time.perf_counter()
+                setpoint_tables[drone].append((t, t, *setpoints[drone], 0.0, 1.0))
+                row_times[k] = time.perf_counter() - row_start
+                k += 1
+            tick_times[tick] = time.perf_counter() - tick_start
+
+            if tick % telemetry_every == 0:
+                telemetry_start = time.perf_counter()
+                for drone in range(NUM_DRONES):
+                    for table, row in telemetry_tables[drone]:
+                        table.append((t, *row))
+                telemetry_times.append(time.perf_counter() - telemetry_start)
+        replay_time = time.perf_counter() - start
+
+        close_start = time.perf_counter()
+        recorder.close()
+        close_time = time.perf_counter() - close_start
+        stats = recorder.stats()
+
+        with open(os.devnull, "w") as devnull:
+            print_start = time.perf_counter()
+            for tick in range(min(ticks, 300)):
+                for drone in range(NUM_DRONES):
+                    print(f"Drone id: {drone}: t={tick * period:.2f} setpoint={setpoints[drone]}", file=devnull)
+            print_per_row = (time.perf_counter() - print_start) / (min(ticks, 300) * NUM_DRONES)
+
+        record = read_flight_record(path)
+        rows_read = sum(len(columns["time"]) for streams in record.values() for columns in streams.values())
+        file_size = os.path.getsize(path)
+
+    budget = BUDGET_PER_ROW * NUM_DRONES
+    p50, p99 = np.percentile(row_times, [50, 99]) * 1e6
+    tick_p50, tick_p99, tick_max = *np.percentile(tick_times, [50, 99]) * 1e6, tick_times.max() * 1e6
+    print(f"{NUM_DRONES} drones x {RATE_HZ} Hz, {DURATION:.0f} s: {stats['rows']} rows in {stats['tables']} tables, "
+          f"replayed in {replay_time:.2f} s, close {close_time * 1e3:.1f} ms")
+    print(f"setpoint row: p50 {p50:.2f} us, p99 {p99:.2f} us, budget {BUDGET_PER_ROW * 1e6:.0f} us "
+          f"(print(): {print_per_row * 1e6:.2f} us per setpoint line)")
+    print(f"setpoints of a swarm tick: p50 {tick_p50:.0f} us, p99 {tick_p99:.0f} us, max {tick_max:.0f} us, "
+          f"budget {budget * 1e6:.0f} us -> {'OK' if tick_p99 <= budget * 1e6 else 'OVER BUDGET'}")
+    print(f"telemetry rows of a swarm tick ({NUM_DRONES * len(STREAMS)} rows): p50 {np.percentile(telemetry_times, 50) * 1e6:.0f} us")
+    print(f"file: {file_size / 1e6:.1f} MB, {stats['chunks_written']} chunks, {stats['chunks_dropped']} dropped, "
+          f"{rows_read}/{stats['rows']} rows read back")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark of the on-disk generation cache (functions/generation_cache.py) on a 60k-row mission.
+
+Reports, with a fresh cache directory:
+- create_active_csv with a cold cache (compile + store + CSV), then again with the same
+  parameters (cache hit, CSV unchanged so not rewritten)
+- GenerationCache.compile on a hit against compile_mission
+- the offboard loader (TrajectoryCache.get) on the CSV: memory-mapped cache entry against parsing
+  the CSV
+
+Usage (from the repository root):
+    python -m benchmarks.bench_generation_cache
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from functions.create_active_csv import create_active_csv
+from functions.generation_cache import shared_generation_cache
+from functions.mission_compiler import compile_mission
+from functions.trajectory_cache import TrajectoryCache
+from functions.trajectory_file import read_trajectory_csv
+
+
+# 10-minute helix at 100 Hz -> about 60k rows
+mission_params = dict(
+    shape_name="helix", diameter=20.0, direction=1, maneuver_time=600.0, start_x=10, start_y=10,
+    initial_altitude=15, climb_rate=1.0, move_speed=2.0, hold_time=4.0, step_time=0.01,
+)
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = function(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1e3
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = shared_generation_cache
+        cache.directory = os.path.join(directory, "cache")
+        csv_file = os.path.join(directory, "active.csv")
+
+        _, cold = timed(create_active_csv, **mission_params, output_file=csv_file)
+        _, warm = timed(create_active_csv, **mission_params, output_file=csv_file)
+        print(f"create_active_csv: cold cache {cold:.1f} ms, same parameters again {warm:.1f} ms")
+
+        _, compiled = timed(compile_mission, **mission_params)
+        (mission, _), hit = timed(cache.compile, mission_params)
+        print(f"{mission.size} rows: compile_mission {compiled:.1f} ms, cache hit {hit:.1f} ms")
+
+        _, loader = timed(TrajectoryCache().get, csv_file)
+        _, parse = timed(read_trajectory_csv, csv_file)
+        print(f"offboard loader on the CSV: cache entry {loader:.1f} ms, CSV parsing {parse:.1f} ms")
+        print(f"cache: {cache.hits} hits, {cache.misses} misses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark of the batch mission generator (functions/mission_batch.py) on a 500-drone show.
+
+The spec has five groups of 100 drones, one shape each, with a per-drone altitude progression so
+that every drone has its own mission (CSV + binary). Reports:
+- cold run: every mission generated, with 1 worker and with one worker per CPU
+- warm run: nothing changed, every mission skipped from the content-hash manifest
+- incremental run: one group changed, only its 100 missions regenerated
+
+Usage (from the repository root):
+    python -m benchmarks.bench_mission_batch [num_drones]
+"""
+
+import copy
+import os
+import sys
+import tempfile
+
+from functions.mission_batch import generate_batch
+
+
+NUM_DRONES = 500
+SHAPES = ["circle", "square", "eight_shape", "helix", "star_shape"]
+
+
+def make_spec(output_dir, num_drones):
+    per_group = num_drones // len(SHAPES)
+    return {
+        "output_dir": output_dir,
+        "formats": ["csv", "traj"],
+        "swarm_manifest": os.path.join(output_dir, "swarm.csv"),
+        "defaults": {"diameter": 20.0, "maneuver_time": 90.0, "step_time": 0.1},
+        "groups": [
+            {"name": shape, "count": per_group, "shape_name": shape, "initial_altitude": {"start": 10.0, "step": 0.1},
+             "time_offset": {"start": 0.0, "step": 0.2}}
+            for shape in SHAPES
+        ],
+    }
+
+
+def main():
+    num_drones = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_DRONES
+    workers = os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as directory:
+        spec = make_spec(directory, num_drones)
+        serial = generate_batch(spec, max_workers=1, verbose=False)
+        print(f"cold, 1 worker:        {len(serial.generated)} generated in {serial.elapsed:.2f} s")
+        cold = generate_batch(spec, max_workers=workers, force=True, verbose=False)
+        print(f"cold, {workers} worker(s):     {len(cold.generated)} generated in {cold.elapsed:.2f} s")
+        warm = generate_batch(spec, max_workers=workers, verbose=False)
+        print(f"warm:                  {len(warm.generated)} generated, {len(warm.skipped)} skipped in {warm.elapsed:.2f} s")
+        changed = copy.deepcopy(spec)
+        changed["groups"][0]["diameter"] = 25.0
+        incremental = generate_batch(changed, max_workers=workers, verbose=False)
+        print(f"one group changed:     {len(incremental.generated)} generated, {len(incremental.skipped)} skipped "
+              f"in {incremental.elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Benchmark of the segment-based mission compiler.
+
+Compiles a 10-minute maneuver sampled at 100 Hz and reports the time spent building the
+mission arrays and the time spent writing them to CSV.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_mission_compiler
+"""
+
+import os
+import tempfile
+import time
+
+from functions.mission_compiler import compile_mission, write_mission_csv
+
+
+mission_params = dict(
+    shape_name="circle", diameter=20.0, direction=1, maneuver_time=600.0, start_x=10, start_y=10,
+    initial_altitude=15, climb_rate=1.0, move_speed=2.0, hold_time=4.0, step_time=0.01,
+)
+
+
+def main():
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        mission = compile_mission(**mission_params)
+        timings.append(time.perf_counter() - start)
+    print(f"compile_mission: {mission.size} rows in {min(timings) * 1e3:.2f} ms (best of {len(timings)})")
+
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "active.csv")
+        start = time.perf_counter()
+        write_mission_csv(mission, output_file)
+        print(f"write_mission_csv: {(time.perf_counter() - start) * 1e3:.2f} ms, {os.path.getsize(output_file) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
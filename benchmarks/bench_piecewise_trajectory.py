@@ -0,0 +1,78 @@
+"""
+Benchmark of the piecewise-polynomial trajectories (functions/piecewise_trajectory.py).
+
+For every shape of functions/trajectories.py, a 90 s mission sampled every 0.1 s is fitted with
+fit_piecewise and compared with the dense mission:
+- rows of the dense mission and knots of the piecewise one
+- size of the CSV, binary (.traj) and piecewise (.npz) files, and the CSV / .npz ratio
+- largest position error at the samples of the dense mission
+- consistency: median gap between the velocity of the player and the derivative of its
+  positions, evaluated at 1 kHz (the player can be queried at any rate)
+- time of one PiecewisePlayer.sample call against TrajectoryPlayer.sample
+
+Usage (from the repository root):
+    python -m benchmarks.bench_piecewise_trajectory
+"""
+
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from functions.mission_compiler import compile_mission, write_mission_csv
+from functions.piecewise_trajectory import PiecewisePlayer, fit_piecewise, load_piecewise, write_piecewise
+from functions.trajectory_file import write_trajectory_binary
+from functions.trajectory_player import TrajectoryPlayer
+
+
+SHAPES = ["circle", "square", "eight_shape", "helix", "heart_shape", "infinity_shape", "spiral_square",
+          "star_shape", "zigzag", "sine_wave"]
+mission_params = dict(
+    diameter=20.0, direction=1, maneuver_time=90.0, start_x=10, start_y=10, initial_altitude=15,
+    climb_rate=1.0, move_speed=2.0, hold_time=4.0, step_time=0.1,
+)
+SAMPLE_CALLS = 20000
+
+
+def time_sample(player, end_time):
+    query_times = np.linspace(0.0, end_time, SAMPLE_CALLS).tolist()
+    start = time.perf_counter()
+    for t in query_times:
+        player.sample(t)
+    return (time.perf_counter() - start) / SAMPLE_CALLS * 1e6
+
+
+def main():
+    print(f"{'shape':<16}{'rows':>6}{'knots':>7}{'CSV kB':>8}{'traj kB':>9}{'npz kB':>8}{'ratio':>7}"
+          f"{'pos err m':>11}{'consistency':>13}{'fit ms':>8}{'us/sample':>11}{'dense us':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file = os.path.join(directory, "mission.csv")
+        binary_file = os.path.join(directory, "mission.traj")
+        piecewise_file = os.path.join(directory, "mission.npz")
+        for shape in SHAPES:
+            mission = compile_mission(shape_name=shape, **mission_params)
+            start = time.perf_counter()
+            table = fit_piecewise(mission)
+            fit_time = time.perf_counter() - start
+            write_mission_csv(mission, csv_file)
+            write_trajectory_binary(mission, binary_file)
+            write_piecewise(table, piecewise_file)
+            sizes = [os.path.getsize(path) for path in (csv_file, binary_file, piecewise_file)]
+
+            piecewise = PiecewisePlayer(load_piecewise(piecewise_file))
+            dense = TrajectoryPlayer(mission)
+            values, _ = piecewise.sample_many(mission["t"])
+            position_error = np.linalg.norm(values[:, :3] - dense.sample_many(mission["t"])[0][:, :3], axis=1).max()
+            fine_times = np.arange(0.0, piecewise.end_time, 0.001)
+            fine, _ = piecewise.sample_many(fine_times)
+            gap = np.median(np.linalg.norm(np.gradient(fine[:, :3], fine_times, axis=0) - fine[:, 3:6], axis=1))
+
+            print(f"{shape:<16}{mission.size:>6}{table.times.size:>7}{sizes[0] / 1e3:>8.1f}{sizes[1] / 1e3:>9.1f}"
+                  f"{sizes[2] / 1e3:>8.1f}{sizes[0] / sizes[2]:>6.0f}x{position_error:>11.4f}{gap:>13.1e}"
+                  f"{fit_time * 1e3:>8.1f}{time_sample(piecewise, piecewise.end_time):>11.2f}"
+                  f"{time_sample(dense, dense.end_time):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
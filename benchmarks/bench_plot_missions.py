@@ -0,0 +1,52 @@
+"""
+Benchmark of the headless batch plotting of functions/export_and_plot_shape.py.
+
+Generates a directory of 500 missions (five shapes, 0.05 s step) with functions/mission_batch.py,
+then plots all of them with plot_trajectories (Agg canvas, LTTB-downsampled phases, one worker
+process per CPU). Reports the rows per mission against the points drawn, and the plotting time,
+in total and per mission per worker.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_plot_missions [num_missions]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from functions.export_and_plot_shape import DEFAULT_MAX_POINTS, find_trajectory_files, plot_trajectories
+from functions.mission_batch import generate_batch
+from functions.trajectory_file import read_trajectory_header
+
+
+NUM_MISSIONS = 500
+SHAPES = ["circle", "square", "eight_shape", "helix", "star_shape"]
+
+
+def main():
+    num_missions = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_MISSIONS
+    workers = os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as directory:
+        spec = {
+            "output_dir": directory,
+            "formats": ["traj"],
+            "defaults": {"maneuver_time": 90.0, "step_time": 0.05},
+            "groups": [{"name": shape, "count": num_missions // len(SHAPES), "shape_name": shape,
+                        "initial_altitude": {"start": 10.0, "step": 0.1}} for shape in SHAPES],
+        }
+        batch = generate_batch(spec, verbose=False)
+        files = find_trajectory_files(directory)
+        rows = [read_trajectory_header(path)["rows"] for path in files]
+        print(f"{len(files)} missions generated in {batch.elapsed:.2f} s, {min(rows)}-{max(rows)} rows each, "
+              f"drawn with at most {DEFAULT_MAX_POINTS} points")
+
+        start = time.perf_counter()
+        plots = plot_trajectories(files, max_workers=workers)
+        elapsed = time.perf_counter() - start
+        print(f"{len(plots)} plots with {workers} worker(s) in {elapsed:.2f} s "
+              f"({elapsed / len(plots) * workers * 1e3:.0f} ms per plot per worker)")
+
+
+if __name__ == "__main__":
+    main()
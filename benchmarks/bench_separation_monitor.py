@@ -0,0 +1,107 @@
+"""
+Per-tick cost of the swarm separation monitor (functions/separation_monitor.py) up to 1000 drones.
+
+Simulates N drones flying random smooth paths in a box sized for about one drone per 3 m cube
+at the same altitude band, and measures over TICKS ticks:
+- grid: find_close_pairs (functions/spatial_grid.py) on the positions
+- brute force: distances of all N² pairs with NumPy, the baseline the grid replaces
+- check: a full SeparationMonitor.check(), reading every position from a TelemetryStore ring
+  buffer and projecting it to the local frame, as done at run time
+
+Both pair finders are checked to report the same pairs.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_separation_monitor [N ...]
+"""
+
+import contextlib
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+from functions.separation_monitor import SeparationMonitor
+from functions.spatial_grid import find_close_pairs
+from functions.telemetry_store import TelemetryStore
+
+
+SWARM_SIZES = [10, 100, 300, 1000]
+TICKS = 200
+RATE_HZ = 10.0
+MIN_SEPARATION = 2.0
+SPACING = 3.0                   # mean distance between neighbors, in meters
+HOME = (47.397742, 8.545594, 488.0)
+EARTH_RADIUS = 6378137.0
+
+
+def brute_force_pairs(positions, radius):
+    distances = np.linalg.norm(positions[:, None, :] - positions[None, :, :], axis=2)
+    i, j = np.nonzero(np.triu(distances < radius, 1))
+    return np.column_stack([i, j])
+
+
+def to_global(positions):
+    lat0, lon0, alt0 = HOME
+    latitude = lat0 + np.degrees(positions[:, 0] / EARTH_RADIUS)
+    longitude = lon0 + np.degrees(positions[:, 1] / (EARTH_RADIUS * math.cos(math.radians(lat0))))
+    return np.column_stack([latitude, longitude, alt0 - positions[:, 2], -positions[:, 2]])
+
+
+def run(num_drones, rng):
+    side = SPACING * num_drones ** (1 / 3)
+    positions = rng.uniform(0, side, (num_drones, 3)) - (0, 0, side + 5)     # all above 5 m
+    velocity = rng.normal(scale=1.0, size=(num_drones, 3))
+
+    stores = {i: TelemetryStore(None) for i in range(num_drones)}
+    now = 0.0
+    monitor = SeparationMonitor(stores, min_separation=MIN_SEPARATION, clock=lambda: now)
+    for store in stores.values():
+        store.buffers["landed_state"].append(now, (2,))          # IN_AIR
+
+    grid_times, brute_times, check_times = [], [], []
+    violations = 0
+    for _ in range(TICKS):
+        now += 1.0 / RATE_HZ
+        velocity += rng.normal(scale=0.3, size=velocity.shape)
+        velocity *= 0.95
+        positions += velocity / RATE_HZ
+        for i, row in enumerate(to_global(positions).tolist()):
+            stores[i].buffers["position"].append(now, row)
+
+        start = time.perf_counter()
+        pairs, _ = find_close_pairs(positions, MIN_SEPARATION)
+        grid_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        brute = brute_force_pairs(positions, MIN_SEPARATION)
+        brute_times.append(time.perf_counter() - start)
+        if not np.array_equal(pairs, brute):
+            raise AssertionError(f"Grid and brute force disagree at {num_drones} drones")
+
+        start = time.perf_counter()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            violations += len(monitor.check())
+        check_times.append(time.perf_counter() - start)
+
+    return grid_times, brute_times, check_times, violations / TICKS
+
+
+def main():
+    sizes = [int(n) for n in sys.argv[1:]] or SWARM_SIZES
+    rng = np.random.default_rng(0)
+    budget = 1.0 / RATE_HZ
+    print(f"{TICKS} ticks per size, minimum separation {MIN_SEPARATION} m, times in ms (p50 / p99)")
+    print(f"{'drones':>7}{'grid':>16}{'brute force':>18}{'check':>16}{'violations/tick':>17}{'of budget':>11}")
+    for n in sizes:
+        grid, brute, check, violations = run(n, rng)
+        g50, g99 = np.percentile(grid, [50, 99]) * 1e3
+        b50, b99 = np.percentile(brute, [50, 99]) * 1e3
+        c50, c99 = np.percentile(check, [50, 99]) * 1e3
+        print(f"{n:>7}{g50:>8.3f} / {g99:<6.3f}{b50:>9.3f} / {b99:<7.3f}{c50:>7.3f} / {c99:<7.3f}{violations:>12.1f}"
+              f"{c99 / 1e3 / budget:>11.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark of the scalar vs. vectorized evaluation of the shapes in functions/trajectories.py.
+
+Every shape is evaluated over a full maneuver at 10 Hz, 50 Hz and 200 Hz, once with the
+per-sample Python loop used by create_active_csv and once with a single NumPy array of steps.
+Both results are compared to make sure the vectorized path gives the same numbers.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_shapes
+"""
+
+import time
+
+import numpy as np
+
+from functions.trajectories import map_shape_to_code
+
+
+SHAPES = ["eight_shape", "circle", "square", "helix", "heart_shape", "infinity_shape", "spiral_square", "star_shape", "zigzag", "sine_wave"]
+RATES_HZ = [10, 50, 200]
+maneuver_time = 90.0
+diameter = 20.0
+direction = 1
+initial_altitude = 15
+
+
+def best_of(fcn, repeats=3):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fcn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    print(f"{'shape':<16}{'rate':>6}{'samples':>9}{'scalar ms':>12}{'vector ms':>12}{'speedup':>10}{'max |diff|':>13}")
+    for rate in RATES_HZ:
+        step_time = 1.0 / rate
+        steps = int(maneuver_time / step_time)
+        for shape_name in SHAPES:
+            _, shape_fcn, shape_args = map_shape_to_code(shape_name)
+            args = (maneuver_time, diameter, direction, initial_altitude, step_time, *shape_args)
+
+            scalar_time, scalar = best_of(lambda: [shape_fcn(step, *args) for step in range(steps)])
+            vector_time, vector = best_of(lambda: shape_fcn(np.arange(steps), *args))
+
+            expected = np.array(scalar, dtype=float)
+            actual = np.hstack([vector.positions, vector.velocities, vector.accelerations])
+            max_diff = np.max(np.abs(expected - actual))
+
+            print(f"{shape_name:<16}{rate:>6}{steps:>9}{scalar_time * 1e3:>12.2f}{vector_time * 1e3:>12.3f}"
+                  f"{scalar_time / vector_time:>9.1f}x{max_diff:>13.2e}")
+
+
+if __name__ == "__main__":
+    main()
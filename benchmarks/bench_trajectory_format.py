@@ -0,0 +1,92 @@
+"""
+Benchmark of the trajectory loaders on a 1M-row mission.
+
+Compares, each in a fresh process, the load time and the peak resident memory of:
+- csv_dictreader: the csv.DictReader + float() parsing previously done in run_drone
+- csv_loadtxt: read_trajectory_csv (NumPy CSV parser)
+- binary_memmap: open_trajectory_binary, touching every column once
+
+Usage (from the repository root):
+    python -m benchmarks.bench_trajectory_format
+"""
+
+import csv
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from functions.mission_compiler import compile_mission, write_mission_csv
+from functions.trajectory_file import open_trajectory_binary, read_trajectory_csv, write_trajectory_binary
+
+
+# 10000 s maneuver at 100 Hz -> about 1M rows
+mission_params = dict(
+    shape_name="circle", diameter=20.0, direction=1, maneuver_time=10000.0, start_x=10, start_y=10,
+    initial_altitude=15, climb_rate=1.0, move_speed=2.0, hold_time=4.0, step_time=0.01,
+)
+LOADERS = ["csv_dictreader", "csv_loadtxt", "binary_memmap"]
+
+
+def load(kind, path):
+    if kind == "csv_dictreader":
+        waypoints = []
+        with open(path, newline="") as csvfile:
+            for row in csv.DictReader(csvfile):
+                waypoints.append((float(row["t"]), float(row["px"]), float(row["py"]), float(row["pz"]),
+                                  float(row["vx"]), float(row["vy"]), float(row["vz"]),
+                                  float(row["ax"]), float(row["ay"]), float(row["az"]), int(row["mode"])))
+        return len(waypoints)
+    if kind == "csv_loadtxt":
+        return len(read_trajectory_csv(path)["t"])
+    columns = open_trajectory_binary(path)
+    for column in columns.values():
+        column.sum()
+    return len(columns["t"])
+
+
+def peak_rss_kb():
+    # ru_maxrss is inherited from the parent across fork/exec on Linux, VmHWM is reset by exec
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def child(kind, path):
+    baseline = peak_rss_kb()
+    start = time.perf_counter()
+    rows = load(kind, path)
+    elapsed = time.perf_counter() - start
+    peak = peak_rss_kb()
+    print(f"{kind:<16}{rows:>10}{elapsed * 1e3:>12.1f}{(peak - baseline) / 1024:>14.1f}")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file = os.path.join(directory, "mission.csv")
+        binary_file = os.path.join(directory, "mission.traj")
+
+        mission = compile_mission(**mission_params)
+        write_mission_csv(mission, csv_file)
+        write_trajectory_binary(mission, binary_file)
+        print(f"{mission.size} rows: CSV {os.path.getsize(csv_file) / 1e6:.1f} MB, binary {os.path.getsize(binary_file) / 1e6:.1f} MB")
+        del mission
+
+        print(f"{'loader':<16}{'rows':>10}{'load ms':>12}{'peak RSS MB':>14}")
+        for kind in LOADERS:
+            path = binary_file if kind == "binary_memmap" else csv_file
+            subprocess.run([sys.executable, "-m", "benchmarks.bench_trajectory_format", kind, path], check=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        child(sys.argv[1], sys.argv[2])
+    else:
+        main()
@@ -0,0 +1,83 @@
+"""
+Virtual-time runs of the offboard stack against the fake MAVSDK (functions/fake_mavsdk.py).
+
+Flies the same small swarm through the same mission in real time and with VirtualClocks of
+increasing speed, records every setpoint sent by run_drone, and reports the wall time of each
+run and whether its setpoint sequence is identical to the real-time one.
+
+Usage (from the repository root; needs the mavsdk package for the offboard types):
+    python -m benchmarks.bench_virtual_time [speed ...]
+"""
+
+import asyncio
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+import offboard_multiple_from_csv as offboard
+from functions.clock import REAL_CLOCK, VirtualClock
+from functions.fake_mavsdk import FakeSwarm
+from functions.mission_compiler import compile_mission
+from functions.swarm_manifest import DroneSpec, ROLE_FLYER
+from functions.trajectory_file import write_trajectory_binary
+
+
+SPEEDS = [10.0, 50.0, 100.0]
+NUM_DRONES = 3
+mission_params = dict(
+    shape_name="eight_shape", diameter=10.0, direction=1, maneuver_time=30.0, start_x=5, start_y=5,
+    initial_altitude=5, climb_rate=1.0, move_speed=2.0, hold_time=2.0, step_time=0.05,
+)
+
+
+async def fly(trajectory_file, clock):
+    specs = [DroneSpec(i, 14540 + i, 50040 + i, trajectory_file, (0.0, 0.0, 0.0), 0.5 * i, float(i), ROLE_FLYER)
+             for i in range(NUM_DRONES)]
+    swarm = FakeSwarm([spec.drone_id for spec in specs], clock=clock.monotonic, sleep=clock.sleep)
+    setpoints = {spec.drone_id: [] for spec in specs}
+
+    def system_factory(drone_id, grpc_port=None):
+        system = swarm.system_factory(drone_id, grpc_port)
+        send = system.offboard.set_position_velocity_acceleration_ned
+
+        async def recording_send(position, velocity, acceleration):
+            setpoints[drone_id].append((position.north_m, position.east_m, position.down_m, position.yaw_deg,
+                                        velocity.north_m_s, velocity.east_m_s, velocity.down_m_s,
+                                        acceleration.north_m_s2, acceleration.east_m_s2, acceleration.down_m_s2))
+            await send(position, velocity, acceleration)
+
+        system.offboard.set_position_velocity_acceleration_ned = recording_send
+        return system
+
+    swarm.start()
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        await offboard.run_swarm(specs, system_factory=system_factory, clock=clock)
+    wall = time.perf_counter() - start
+    swarm.stop()
+    return wall, setpoints
+
+
+def main():
+    speeds = [float(s) for s in sys.argv[1:]] or SPEEDS
+    mission = compile_mission(**mission_params)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        trajectory_file = os.path.join(tmp, "mission.traj")
+        write_trajectory_binary(mission, trajectory_file)
+        print(f"mission: {mission['t'][-1]:.1f} s, {NUM_DRONES} drones")
+
+        reference_wall, reference = asyncio.run(fly(trajectory_file, REAL_CLOCK))
+        count = sum(len(s) for s in reference.values())
+        print(f"{'clock':<12}{'wall s':>9}{'speed-up':>10}{'setpoints':>11}  identical")
+        print(f"{'real':<12}{reference_wall:>9.2f}{1.0:>9.1f}x{count:>11}")
+        for speed in speeds:
+            wall, setpoints = asyncio.run(fly(trajectory_file, VirtualClock(speed)))
+            count = sum(len(s) for s in setpoints.values())
+            print(f"{f'virtual {speed:g}x':<12}{wall:>9.2f}{reference_wall / wall:>9.1f}x{count:>11}  {setpoints == reference}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Check the missions of a swarm manifest against each other before flying them.
+
+Applies the offsets of every drone of the manifest (as run_drone does) and lists the windows of
+mission time during which two drones are closer than the minimum separation:
+    python check_deconfliction.py swarm.csv --min-separation 2
+
+Exits with status 1 if there is any conflict.
+"""
+
+import argparse
+import sys
+
+from functions.deconfliction import check_deconfliction, print_deconfliction_report, sitl_home_positions
+from functions.swarm_manifest import read_swarm_manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the missions of a swarm manifest for separation conflicts.")
+    parser.add_argument("manifest", help="Swarm manifest CSV (see functions/swarm_manifest.py)")
+    parser.add_argument("--min-separation", type=float, default=2.0, help="Minimum distance between two drones, in meters")
+    parser.add_argument("--step", type=float, default=None, help="Period of the common time base (default: the trajectory sample period)")
+    parser.add_argument("--home-spacing", type=float, default=3.0, help="Distance between the homes of consecutive drone ids (PX4 SITL layout)")
+    args = parser.parse_args()
+
+    specs = read_swarm_manifest(args.manifest)
+    report = check_deconfliction(specs, min_separation=args.min_separation, step=args.step,
+                                 homes=sitl_home_positions(specs, args.home_spacing))
+    print_deconfliction_report(report, args.min_separation)
+    sys.exit(1 if report.windows else 0)
@@ -0,0 +1,34 @@
+"""
+Convert trajectory files between the CSV export format and the binary memory-mapped format.
+
+The direction is picked from the file extensions:
+    python convert_trajectory.py shapes/active.csv shapes/active.traj
+    python convert_trajectory.py shapes/active.traj shapes/active_export.csv
+"""
+
+import argparse
+
+from functions.mission_compiler import write_mission_csv
+from functions.trajectory_file import BINARY_EXTENSION, columns_to_mission, open_trajectory_binary, read_trajectory_csv, write_trajectory_binary
+
+
+def convert_trajectory(input_file, output_file):
+    if input_file.endswith(BINARY_EXTENSION):
+        columns = open_trajectory_binary(input_file)
+    else:
+        columns = read_trajectory_csv(input_file)
+
+    mission = columns_to_mission(columns)
+    if output_file.endswith(BINARY_EXTENSION):
+        write_trajectory_binary(mission, output_file)
+    else:
+        write_mission_csv(mission, output_file)
+    print(f"Converted {input_file} -> {output_file} ({mission.size} rows)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert trajectory files between CSV and the binary format.")
+    parser.add_argument("input_file", help="CSV or binary (.traj) trajectory file")
+    parser.add_argument("output_file", help="CSV or binary (.traj) trajectory file to create")
+    args = parser.parse_args()
+    convert_trajectory(args.input_file, args.output_file)
@@ -20,6 +20,7 @@ move_speed = 2.0                    # velocidade de movimento (em metros por seg
 hold_time = 4.0                     # tempo de espera ao final do movimento (em segundos)
 step_time = 0.1                     # intervalo de tempo entre os pontos da trajetória (em segundos)
 output_file = "shapes/active.csv"   # caminho do arquivo CSV de saída
+binary_file = "shapes/active.traj"  # caminho do arquivo binário (memory-mapped) de saída
 
 shape_name2="square"
 diameter2 = 20.0
@@ -33,6 +34,7 @@ move_speed2 = 2.0  # m/s
 hold_time2 = 4.0 #s
 step_time2= 0.1 #s
 output_file2 = "shapes/active2.csv"
+binary_file2 = "shapes/active2.traj"
 
 create_active_csv(
     shape_name=shape_name,
@@ -47,6 +49,7 @@ create_active_csv(
     hold_time = hold_time,
     step_time = step_time,
     output_file = output_file,
+    binary_file = binary_file,
 )
 
 create_active_csv(
@@ -62,10 +65,12 @@ create_active_csv(
     hold_time = hold_time2,
     step_time = step_time2,
     output_file = output_file2,
+    binary_file = binary_file2,
 )
 
+# Um gráfico por missão (shapes/active.png, shapes/active2.png), em vez de um único shapes/trajectory_plot.png
 output_file = "shapes/active.csv"
-export_and_plot_shape(output_file)
+export_and_plot_shape(output_file, plot_file="shapes/active.png")
 
 output_file2 = "shapes/active2.csv"
-export_and_plot_shape(output_file2)
+export_and_plot_shape(output_file2, plot_file="shapes/active2.png")
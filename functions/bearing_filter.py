@@ -0,0 +1,134 @@
+"""
+Target bearing estimation for the yaw controller of the camera drone.
+
+The tracker reports the pixel x of the target a few times per second, each report already
+100-300 ms old when it arrives. Instead of steering towards the last raw pixel offset, every
+detection is turned into a world bearing (heading of the drone at capture time + angle of the
+target in the image) and fed to an alpha-beta (constant angular velocity) filter. At each
+control tick the filter is predicted forward to the current time, which hides the detection
+latency and the gaps between detections. The filter resets itself when the track goes stale or
+the tracker switches to a different track id.
+
+Bearings and headings are in degrees; timestamps are time.time() seconds, the clock of the
+capture/receive stamps of the detection messages (functions/detection_protocol.py).
+"""
+
+import numpy as np
+
+
+def wrap_degrees(angle):
+    """Wrap an angle to [-180, 180) degrees."""
+    return (angle + 180.0) % 360.0 - 180.0
+
+
+def unwrap_degrees(angles):
+    """Angles in degrees without the 360 jumps between consecutive values (numpy.unwrap in degrees)."""
+    return np.degrees(np.unwrap(np.radians(angles)))
+
+
+def pixel_to_angle(pixel_x, image_width, horizontal_fov):
+    """Horizontal angle of a pixel column from the optical axis, in degrees (positive to the right)."""
+    return (pixel_x - image_width // 2) * horizontal_fov / image_width
+
+
+def heading_at(telemetry, timestamp):
+    """
+    Heading of the drone (attitude yaw_deg) at a past monotonic `timestamp`, interpolated from the
+    telemetry store ring buffer (see functions/telemetry_store.py), or None without attitude samples.
+    """
+    buffer = telemetry.buffers["attitude"]
+    if len(buffer) == 0:
+        return None
+    timestamps, values = buffer.ordered()
+    headings = unwrap_degrees(values[:, buffer.columns.index("yaw_deg")])
+    return float(wrap_degrees(np.interp(timestamp, timestamps, headings)))
+
+
+def alpha_smoothed_yaw(yaw, pixel_x, image_width, horizontal_fov, min_alpha=0.05, max_alpha=0.5, max_angle=45.0, deadband=0.5):
+    """
+    Yaw correction used by run_drone before the bearing filter: the last raw pixel offset, clamped
+    to max_angle and blended into the trajectory yaw with a factor growing with the offset.
+
+    Returns:
+        (new_yaw, angle, alpha)
+    """
+    center_x = image_width // 2
+    desvio_px = pixel_x - center_x
+    angle = pixel_to_angle(pixel_x, image_width, horizontal_fov)
+    if abs(angle) <= deadband:
+        return yaw, angle, 0.0
+    angle = max(min(angle, max_angle), -max_angle)
+    alpha = min_alpha + (max_alpha - min_alpha) * min(abs(desvio_px) / center_x, 1.0)
+    return (1 - alpha) * yaw + alpha * (yaw + angle), angle, alpha
+
+
+class BearingFilter:
+    """
+    Alpha-beta filter on the target bearing, with a constant angular velocity model.
+
+    Attributes:
+        bearing (float): Filtered bearing at time `timestamp`, in degrees
+        rate (float): Filtered bearing rate, in degrees per second
+        timestamp (float): Time of the last update, None before the first detection
+        resets (int): Number of times the filter was (re)initialized
+    """
+
+    def __init__(self, alpha=0.8, beta=0.5, stale_after=1.0, max_rate=90.0, max_horizon=0.5):
+        """
+        Args:
+            alpha (float, optional): Bearing gain in (0, 1]
+            beta (float, optional): Rate gain in (0, 2)
+            stale_after (float, optional): Seconds without detection after which the track is stale
+            max_rate (float, optional): Bound on the estimated bearing rate, in degrees per second
+            max_horizon (float, optional): Longest prediction, in seconds past the last detection
+        """
+        self.alpha = alpha
+        self.beta = beta
+        self.stale_after = stale_after
+        self.max_rate = max_rate
+        self.max_horizon = max_horizon
+        self.resets = 0
+        self.reset()
+
+    def reset(self):
+        self.bearing = None
+        self.rate = 0.0
+        self.timestamp = None
+        self.track_id = None
+
+    def is_stale(self, now):
+        return self.timestamp is None or now - self.timestamp > self.stale_after
+
+    def update(self, bearing, timestamp, track_id=None):
+        """Fuse a measured bearing taken at `timestamp`; older-than-state measurements are ignored."""
+        if self.is_stale(timestamp) or (track_id is not None and self.track_id is not None and track_id != self.track_id):
+            self.bearing = wrap_degrees(bearing)
+            self.rate = 0.0
+            self.timestamp = timestamp
+            self.track_id = track_id
+            self.resets += 1
+            return
+
+        dt = timestamp - self.timestamp
+        if dt <= 0:
+            return
+        predicted = self.bearing + self.rate * dt
+        residual = wrap_degrees(bearing - predicted)
+        self.bearing = wrap_degrees(predicted + self.alpha * residual)
+        self.rate = float(np.clip(self.rate + self.beta * residual / dt, -self.max_rate, self.max_rate))
+        self.timestamp = timestamp
+        if track_id is not None:
+            self.track_id = track_id
+
+    def predict(self, now):
+        """Bearing predicted at time `now`, or None if the track is stale."""
+        if self.is_stale(now):
+            return None
+        dt = min(max(now - self.timestamp, 0.0), self.max_horizon)
+        return wrap_degrees(self.bearing + self.rate * dt)
+
+
+def bearing_yaw(yaw, bearing, max_angle=45.0):
+    """Yaw command pointing at `bearing`, at most max_angle degrees away from the trajectory yaw."""
+    offset = max(min(wrap_degrees(bearing - yaw), max_angle), -max_angle)
+    return yaw + offset
@@ -0,0 +1,71 @@
+"""
+Injectable clocks for the offboard stack.
+
+Everything that waits or timestamps during a mission (setpoint scheduler, mission clock,
+telemetry store, detection handling, fake MAVSDK simulator) takes its time from a clock object
+with the same three functions as the standard library:
+- monotonic(): seconds on a monotonic clock (deadlines, telemetry timestamps)
+- time(): seconds since the epoch (stage timestamps of the detection messages)
+- sleep(delay): coroutine sleeping `delay` seconds of this clock
+
+REAL_CLOCK is the wall clock. A VirtualClock runs `speed` times faster than real time: with the
+simulated vehicles of functions/fake_mavsdk.py a 90 s mission takes 90 / speed seconds, and
+since the setpoints are indexed by tick number (see DeadlineScheduler) the setpoint sequence is
+the same as in real time.
+"""
+
+import asyncio
+import time
+
+
+class RealClock:
+    """Wall clock: time.monotonic, time.time and asyncio.sleep."""
+
+    speed = 1.0
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def time(self):
+        return time.time()
+
+    async def sleep(self, delay):
+        await asyncio.sleep(delay)
+
+
+class VirtualClock:
+    """
+    Clock running `speed` times faster than real time, starting at `start` seconds.
+
+    Attributes:
+        speed (float): Virtual seconds per real second
+    """
+
+    def __init__(self, speed=10.0, start=0.0, epoch=None):
+        """
+        Args:
+            speed (float, optional): Virtual seconds per real second
+            start (float, optional): Value of monotonic() when the clock is created
+            epoch (float, optional): Value of time() when the clock is created, defaults to time.time()
+        """
+        if speed <= 0:
+            raise ValueError(f"Invalid clock speed: {speed}")
+        self.speed = speed
+        self._real_start = time.monotonic()
+        self._start = start
+        self._epoch = time.time() if epoch is None else epoch
+
+    def elapsed(self):
+        return (time.monotonic() - self._real_start) * self.speed
+
+    def monotonic(self):
+        return self._start + self.elapsed()
+
+    def time(self):
+        return self._epoch + self.elapsed()
+
+    async def sleep(self, delay):
+        await asyncio.sleep(max(delay, 0.0) / self.speed)
+
+
+REAL_CLOCK = RealClock()
@@ -69,241 +69,66 @@ Flight Modes and Codes:
 Each flight mode is represented by an integer code. These codes are used to indicate the different phases of the flight in the CSV file.
 
 To create a valid CSV file for offboard control, make sure to adhere to the structure described above. Each row should represent a specific time step with the corresponding position, velocity, acceleration, and LED color values.
+
+Binary Output:
+--------------
+When `binary_file` is given (e.g. "shapes/active.traj"), the same mission is also written in the typed, columnar format of `functions/trajectory_file.py`. Loaders memory-map it instead of parsing the CSV, and `convert_trajectory.py` converts between both formats.
+
+Generation Cache:
+-----------------
+With `use_cache` (the default), missions are kept in a size-bounded on-disk cache keyed by their parameters and the source of the generators (see `functions/generation_cache.py`): generating the same mission again skips the compiler, and the offboard loader memory-maps the cached mission instead of parsing the CSV.
+
+Piecewise Output:
+-----------------
+When `piecewise_file` is given (e.g. "shapes/active.npz"), the mission is also fitted with quintic polynomial segments (see `functions/piecewise_trajectory.py`): a few dozen knots instead of a row every step_time, evaluated by the offboard player at the exact time of every setpoint, with position, velocity and acceleration consistent with each other.
 """
 
 
 
-import csv
-import math
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-import numpy as np
-import pandas as pd
+from functions.generation_cache import shared_generation_cache
+from functions.mission_compiler import compile_mission, write_mission_csv
+from functions.trajectory_file import write_trajectory_binary
+from functions.piecewise_trajectory import fit_piecewise, write_piecewise
 from functions.trajectories import *
 
 
 
 
 
-def create_active_csv(shape_name,diameter, direction, maneuver_time, start_x, start_y, initial_altitude, climb_rate,move_speed, hold_time , step_time, output_file="active.csv"):
+def create_active_csv(shape_name,diameter, direction, maneuver_time, start_x, start_y, initial_altitude, climb_rate,move_speed, hold_time , step_time, output_file="active.csv", binary_file=None, piecewise_file=None, use_cache=True):
 
-    map_shape_to_code(shape_name)
     shape_code, shape_fcn, shape_args = map_shape_to_code(shape_name)
 
     # The function returns the code, function, and arguments associated with the given shape name
     print(f"Shape Code: {shape_code}")
     print(f"Shape Function: {shape_fcn}")
     print(f"Shape Arguments: {shape_args}")
-   
-   
-    header = ["idx", "t", "px", "py", "pz", "vx", "vy", "vz", "ax", "ay", "az", "yaw", "mode", "ledr", "ledg", "ledb"]
-
-    with open(output_file, mode="w", newline="") as file:
-        writer = csv.writer(file)
-        writer.writerow(header)
-
-
-
-        # Calculate climb time and steps
-        climb_time = initial_altitude / climb_rate
-        climb_steps = int(climb_time / step_time)
-        # Write climb trajectory
-        for i in range(climb_steps):
-            t = i * step_time
-            x = 0
-            y = 0
-            z = (climb_rate * t) * -1
-            vx = 0.0
-            vy = 0.0
-            vz = -climb_rate
-            ax = 0
-            ay = 0
-            az = 0
-            yaw = 0
-            mode =10
-            row = [i, t, x, y, z, vx, vy, vz, ax, ay, az, yaw,mode, "nan", "nan", "nan"]
-            writer.writerow(row)
-
-
-        # Hold at intial altitude
-        hold_steps = int(hold_time / step_time)
-
-        for i in range(hold_steps):
-            t = climb_time + i * step_time
-            x = 0
-            y = 0
-            z = -1 * initial_altitude
-            vx = 0.0
-            vy = 0.0
-            vz = 0.0
-            ax = 0
-            ay = 0
-            az = 0
-            yaw = 0
-            mode = 20
-            row = [climb_steps + i, t, x, y, z, vx, vy, vz, 0,0,0, yaw,mode, "nan", "nan", "nan"]
-            writer.writerow(row)  
-
-    # Move to start position
-        move_start_distance = math.sqrt(start_x**2 + start_y**2)
-        move_start_time = move_start_distance / move_speed
-        move_start_steps = int(move_start_time / step_time)
-
-        for i in range(move_start_steps):
-            t = climb_time + hold_time+ i * step_time
-            ratio = i / move_start_steps
-            x = start_x * ratio
-            y = start_y * ratio
-            z = -1 * initial_altitude
-            vx = move_speed * (start_x / move_start_distance)
-            vy = move_speed * (start_y / move_start_distance)
-            vz = 0.0
-            ax = 0
-            ay = 0
-            az = 0
-            yaw = 0
-            mode = 30
-            row = [climb_steps + hold_steps + i, t, x, y, z, vx, vy, vz, 0 , 0 ,0, yaw,mode, "nan", "nan", "nan"]
-            writer.writerow(row)
-
-    # Hold start position for n seconds
-        hold_steps = int(hold_time / step_time)
-
-        for i in range(hold_steps):
-            t = climb_time + hold_time +move_start_time + i * step_time
-            x = start_x
-            y = start_y
-            z = -1 * initial_altitude
-            vx = 0.0
-            vy = 0.0
-            vz = 0.0
-            ax = 0
-            ay = 0
-            az = 0
-            yaw = 0
-            mode = 40
-            row = [climb_steps + hold_steps + move_start_steps + i, t, x, y, z, vx, vy, vz, 0, 0, 0, yaw,mode, "nan", "nan", "nan"]
-            writer.writerow(row)    
-
-        # Check if start position is different from first setpoint of maneuver
-        if 0 != shape_fcn(0, maneuver_time, diameter, direction, initial_altitude, step_time, *shape_args)[0] or 0 != shape_fcn(0, maneuver_time, diameter, direction, initial_altitude, step_time, *shape_args)[1]:
-            print("different Start and Manuever")
-            maneuver_start_x = shape_fcn(0, maneuver_time, diameter, direction, initial_altitude, step_time, *shape_args)[0];
-            maneuver_start_y = shape_fcn(0, maneuver_time, diameter, direction, initial_altitude, step_time, *shape_args)[1];
-            
-            print(f"Origin Start: {start_x} , {start_y}")
-            print(f"Manuever Start: {maneuver_start_x} , {maneuver_start_y}")
-
-            # Calculate distance and time required to move to first setpoint of maneuver
-            move_distance = math.sqrt(( maneuver_start_x)**2 + ( maneuver_start_y)**2)
-            move_time = move_distance / 2.0
-            move_steps = int(move_time / step_time)
-
-            # Move drone to first setpoint of maneuver at 2 m/s
-            for i in range(move_steps):
-                t = climb_time + move_start_time + hold_time + hold_time + i * step_time
-                ratio = i / move_steps
-                x = start_x + (maneuver_start_x  ) * ratio
-                y = start_y + (maneuver_start_y ) * ratio
-                z = -1 * initial_altitude
-                vx = move_speed * (maneuver_start_x ) / move_distance
-                vy = move_speed * (maneuver_start_y ) / move_distance
-                vz = 0.0
-                ax = 0
-                ay = 0
-                az = 0
-                yaw = 0
-                
-                mode = 50
-                row = [climb_steps + hold_steps + move_start_steps + hold_steps  + i, t, x, y, z, vx, vy, vz,0,0,0, yaw,mode, "nan", "nan", "nan"]
-                writer.writerow(row)
-
-            # Hold drone at first setpoint for 2 seconds
-            for i in range(hold_steps):
-                t = climb_time + hold_time + move_start_time + move_time + hold_time + i * step_time
-                x =  start_x + shape_fcn(0, maneuver_time, diameter, direction, initial_altitude, step_time, *shape_args)[0]
-                y = start_y + shape_fcn(0, maneuver_time, diameter, direction, initial_altitude, step_time, *shape_args)[1]
-                z = -1 * initial_altitude
-                vx = 0.0
-                vy = 0.0
-                vz = 0.0
-                ax = 0
-                ay = 0
-                az = 0
-                yaw = 0
-                mode = 60
-                row = [climb_steps + hold_steps + move_steps + move_start_steps + hold_steps  + i, t, x, y, z, vx, vy, vz, 0 ,0,0, yaw,mode, "nan", "nan", "nan"]
-                writer.writerow(row)
-
-            # Calculate the start time after maneuver start
-            start_time = climb_time + hold_time + move_start_time + move_time + hold_time  + hold_time
-        else:
-            # Calculate the start time after maneuver start
-            start_time = climb_time + hold_time + move_start_time + hold_time
-            move_distance=0
-            move_steps =0
-            move_time=0
-
-        # Calculate the total duration of the trajectory after maneuver start
-        total_duration = maneuver_time + start_time
-        total_steps = int(total_duration / step_time)
-        maneuver_steps = int(maneuver_time / step_time)
-
-    
-
-        # Fly the shape trajectory
-        last_x, last_y, last_z = 0, 0, 0  # Initialize variables to store the last position
-
-        for step in range(maneuver_steps):
-            x, y, z, vx, vy, vz, ax, ay, az = shape_fcn(step, maneuver_time, diameter, direction, initial_altitude, step_time, *shape_args)
-            x += start_x
-            y += start_y
-            yaw = 0
-            missionTime = start_time + step * step_time
-            mode = 70
-            row = [climb_steps + hold_steps + move_steps + hold_steps + move_steps + hold_steps + step, missionTime, x, y, z, vx, vy, vz, ax, ay, az, yaw, mode, "nan", "nan", "nan"]
-            writer.writerow(row)
-            last_x, last_y, last_z = x, y, z  # Update the last position
-
-           
-        # Hold drone at last maneuver setpoint for hold_time
-        for i in range(hold_steps):
-            t = start_time + maneuver_time + i * step_time
-            x, y, z = last_x, last_y, last_z  # Use the last position
-            vx = 0.0
-            vy = 0.0
-            vz = 0.0
-            ax = 0
-            ay = 0
-            az = 0
-            yaw = 0
-            mode = 80
-            row = [climb_steps + hold_steps + move_steps + hold_steps + move_steps + hold_steps + step + i, t, x, y, z, vx, vy, vz, ax, ay, az, yaw, mode, "nan", "nan", "nan"]
-            writer.writerow(row)
-
-        # Return to origin (0, 0, -initial_altitude)
-        return_distance = math.sqrt(last_x**2 + last_y**2 + ((-1 * initial_altitude) - last_z)**2)  # Use the last position
-        return_time = return_distance / move_speed
-        return_steps = int(return_time / step_time)
 
-        for i in range(return_steps):
-            t = start_time + maneuver_time + hold_time + i * step_time
-            ratio = i / return_steps
-            x_home = last_x * (1 - ratio)  # Use the last position
-            y_home = last_y * (1 - ratio)  # Use the last position
-            z_home = last_z + ((-1 * initial_altitude) - last_z) * ratio  # Use the last position
-            vx = - move_speed * last_x / return_distance  # Use the last position
-            vy = - move_speed * last_y / return_distance  # Use the last position
-            vz = ((-1 * initial_altitude) - last_z) / return_time  # Use the last position
-            ax = 0
-            ay = 0
-            az = 0
-            yaw = 0
-            mode = 90
-            row = [climb_steps + hold_steps + move_steps + hold_steps + move_steps + hold_steps + step + i + return_steps, t, x_home, y_home, z_home, vx, vy, vz, ax , ay , az, yaw,mode, "nan", "nan", "nan"]
-            writer.writerow(row)
-            
-            
+    # Every phase is built as one array block by the mission compiler, then written in a single pass
+    # With use_cache, a mission already generated with the same parameters is read from the cache (see functions/generation_cache.py)
+    params = dict(shape_name=shape_name, diameter=diameter, direction=direction, maneuver_time=maneuver_time, start_x=start_x, start_y=start_y,
+                  initial_altitude=initial_altitude, climb_rate=climb_rate, move_speed=move_speed, hold_time=hold_time, step_time=step_time)
+    if use_cache:
+        mission, entry = shared_generation_cache.compile(params)
+    else:
+        mission, entry = compile_mission(**params), None
+    if entry and shared_generation_cache.lookup_file(output_file) == entry:
+        # CSV already written from this cache entry and unchanged since: nothing to rewrite
+        print(f"{output_file} is up to date with the {shape_name}.")
+    else:
+        write_mission_csv(mission, output_file)
+        if entry:
+            # The offboard loader memory-maps the cache entry instead of parsing this CSV while it is unchanged
+            shared_generation_cache.link_file(output_file, entry)
         print(f"Created {output_file} with the {shape_name}.")
 
+    # Optional typed, memory-mappable copy of the same mission (see functions/trajectory_file.py)
+    if binary_file:
+        write_trajectory_binary(mission, binary_file)
+        print(f"Created {binary_file} with the {shape_name}.")
 
+    # Optional piecewise-polynomial copy, a few knots per phase (see functions/piecewise_trajectory.py)
+    if piecewise_file:
+        table = fit_piecewise(mission)
+        write_piecewise(table, piecewise_file)
+        print(f"Created {piecewise_file} with the {shape_name} ({table.times.size} knots).")
@@ -0,0 +1,200 @@
+"""
+Offline deconfliction check of the missions of a swarm.
+
+Every drone of a swarm manifest flies its trajectory file with its own offsets (see run_drone):
+position offset trajectory_offset, altitude raised by altitude_offset, start delayed by
+time_offset, in the local NED frame of its home. check_deconfliction places all of them on a
+common time base and a common frame (home + trajectory position) and finds every window during
+which two drones are closer than min_separation, without comparing all pairs at all samples:
+
+- time buckets: the common time base is cut into buckets of about a hundred samples; in each
+  bucket every drone is bounded by the box of its positions
+- broad phase: pairs of drones whose boxes come closer than the search radius, with the spatial
+  hash grid of functions/spatial_grid.py on the box centers (near-linear in the number of drones),
+  one grid query for all the buckets of a chunk of the time base
+- narrow phase: exact distances at every sample of the bucket, for the candidate pairs only
+
+Piecewise trajectory files are sampled every PIECEWISE_STEP seconds first.
+
+Before its start and after its end a drone stays at the first / last sample of its trajectory,
+i.e. on the ground at its home for the missions of mission_compiler.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from functions.piecewise_trajectory import PiecewiseTable, piecewise_to_trajectory_table
+from functions.spatial_grid import find_close_pairs
+from functions.trajectory_cache import get_trajectory_table
+
+
+# Interval [start_time, end_time] of mission time during which two drones are closer than the
+# minimum separation, with their smallest distance and when it happens
+ConflictWindow = namedtuple("ConflictWindow", ["drone_a", "drone_b", "start_time", "end_time", "min_distance", "min_time"])
+
+# windows: ConflictWindows sorted by start time; min_distance / closest_pair / closest_time: the
+# closest approach of the whole mission if it is below search_radius (None otherwise);
+# candidate_pairs: pairs of drones kept by the broad phase, summed over the time buckets
+DeconflictionReport = namedtuple("DeconflictionReport", ["windows", "min_distance", "closest_pair", "closest_time",
+                                                         "step", "samples", "candidate_pairs"])
+
+_NARROW_BATCH = 8192            # candidate pairs whose distances are computed at once
+PIECEWISE_STEP = 0.05           # sample period of the piecewise trajectories, in seconds
+
+
+def sitl_home_positions(specs, spacing=3.0):
+    """Homes of the PX4 SITL multi-vehicle layout: drone i at (0, spacing * i, 0) (NED)."""
+    return {spec.drone_id: (0.0, spacing * spec.drone_id, 0.0) for spec in specs}
+
+
+def _positions(trajectory, times, origin):
+    """(3, T) positions of a trajectory (sample times, contiguous (3, N) positions) at `times`, clamped to its ends, plus `origin`."""
+    sample_times, xyz = trajectory
+    return np.stack([np.interp(times, sample_times, xyz[k]) + origin[k] for k in range(3)])
+
+
+def _runs(mask):
+    """(rows, starts, ends) of the runs of True along axis 1 of a 2-D mask, ends exclusive."""
+    padded = np.zeros((mask.shape[0], mask.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    return rows, starts, ends
+
+
+def check_deconfliction(specs, min_separation=2.0, step=None, homes=None, search_radius=None, bucket_samples=128,
+                        chunk_samples=4096, tables=None):
+    """
+    Find the conflicts between the missions of a swarm.
+
+    Args:
+        specs (list): DroneSpecs of the swarm (see functions/swarm_manifest.py)
+        min_separation (float, optional): Minimum distance between two drones, in meters
+        step (float, optional): Period of the common time base, defaults to the smallest median
+            sample period of the trajectories
+        homes (dict, optional): drone_id -> (x, y, z) home in the common NED frame, defaults to
+            sitl_home_positions(specs)
+        search_radius (float, optional): Distance below which the closest approach is measured
+            exactly, defaults to 2 * min_separation
+        bucket_samples (int, optional): Samples per time bucket of the broad phase
+        chunk_samples (int, optional): Samples of every drone held in memory at once
+        tables (dict, optional): trajectory_file -> TrajectoryTable or PiecewiseTable, defaults
+            to loading the files
+
+    Returns:
+        A DeconflictionReport.
+    """
+    if homes is None:
+        homes = sitl_home_positions(specs)
+    if search_radius is None:
+        search_radius = 2.0 * min_separation
+    search_radius = max(search_radius, min_separation)
+    if tables is None:
+        tables = {path: get_trajectory_table(path) for path in {spec.trajectory_file for spec in specs}}
+    tables = {path: piecewise_to_trajectory_table(table, PIECEWISE_STEP) if isinstance(table, PiecewiseTable) else table
+              for path, table in tables.items()}
+
+    drone_ids = np.array([spec.drone_id for spec in specs])
+    # Contiguous position columns, so that np.interp does not copy a strided column at every call
+    trajectories = {path: (table.times, np.ascontiguousarray(table.values[:, :3].T)) for path, table in tables.items()}
+    drone_tables = [tables[spec.trajectory_file] for spec in specs]
+    origins = [np.add(homes[spec.drone_id], (spec.trajectory_offset[0], spec.trajectory_offset[1],
+                                              spec.trajectory_offset[2] - spec.altitude_offset)) for spec in specs]
+    if step is None:
+        step = min(float(np.median(np.diff(table.times))) for table in tables.values() if table.times.size > 1)
+    duration = max(spec.time_offset + float(table.times[-1]) for spec, table in zip(specs, drone_tables))
+    samples = int(np.floor(duration / step)) + 1
+
+    bucket = bucket_samples
+    chunk = max(chunk_samples // bucket, 1) * bucket
+    runs = []                           # (a, b, start, end, min_distance, min_sample), sample indices on the time base
+    closest = (np.inf, None, None)
+    candidate_pairs = 0
+    n = len(specs)
+    for chunk_start in range(0, samples, chunk):
+        count = min(chunk, samples - chunk_start)
+        buckets = -(-count // bucket)
+        # Last bucket padded with the last sample, the padding is masked out of the narrow phase
+        times = (chunk_start + np.minimum(np.arange(buckets * bucket), count - 1)) * step
+        positions = np.stack([_positions(trajectories[spec.trajectory_file], times - spec.time_offset, origin)
+                              for spec, origin in zip(specs, origins)])                          # (N, 3, T)
+        blocks = positions.reshape(n, 3, buckets, bucket)           # reductions over contiguous samples
+        low, high = blocks.min(axis=3), blocks.max(axis=3)
+        centers = (low + high) / 2                                  # (N, 3, buckets)
+        radii = np.linalg.norm(high - low, axis=1) / 2              # (N, buckets)
+
+        # Broad phase, all buckets of the chunk in one grid query: drones whose bounding spheres come
+        # within search_radius of each other in the same bucket
+        pairs, distances = find_close_pairs(centers.transpose(2, 0, 1).reshape(-1, 3), search_radius + 2 * radii.max(),
+                                            groups=np.repeat(np.arange(buckets), n))
+        b, i, j = pairs[:, 0] // n, pairs[:, 0] % n, pairs[:, 1] % n
+        keep = distances < search_radius + radii[i, b] + radii[j, b]
+        b, i, j = b[keep], i[keep], j[keep]
+        candidate_pairs += b.size
+        padding = (np.arange(bucket) >= count - (buckets - 1) * bucket)
+
+        # Narrow phase: exact distance at every sample of the bucket, for the candidates only
+        for batch in range(0, b.size, _NARROW_BATCH):
+            bb, ii, jj = b[batch:batch + _NARROW_BATCH], i[batch:batch + _NARROW_BATCH], j[batch:batch + _NARROW_BATCH]
+            d = np.sqrt(np.square(blocks[ii, :, bb] - blocks[jj, :, bb]).sum(axis=1))     # (P, bucket)
+            d[bb == buckets - 1] = np.where(padding, np.inf, d[bb == buckets - 1])
+            p, k = np.unravel_index(np.argmin(d), d.shape)
+            if d[p, k] < closest[0]:
+                closest = (float(d[p, k]), (ii[p], jj[p]), chunk_start + bb[p] * bucket + k)
+
+            conflict = d < min_separation
+            if conflict.any():
+                for row, start, end in zip(*_runs(conflict)):
+                    k = start + int(np.argmin(d[row, start:end]))
+                    offset = chunk_start + bb[row] * bucket
+                    runs.append((ii[row], jj[row], offset + start, offset + end, float(d[row, k]), offset + k))
+
+    # Merge the runs of a pair that continue across buckets
+    windows = []
+    merged = None
+    for a, b, start, end, distance, at in sorted(runs):
+        if merged is not None and (a, b) == merged[:2] and start == merged[3]:
+            best = (distance, at) if distance < merged[4] else merged[4:]
+            merged = (a, b, merged[2], end, *best)
+            continue
+        if merged is not None:
+            windows.append(merged)
+        merged = (a, b, start, end, distance, at)
+    if merged is not None:
+        windows.append(merged)
+
+    windows = sorted(
+        (ConflictWindow(int(drone_ids[a]), int(drone_ids[b]), start * step, (end - 1) * step, distance, at * step)
+         for a, b, start, end, distance, at in windows),
+        key=lambda window: (window.start_time, window.drone_a, window.drone_b),
+    )
+    min_distance, pair, at = closest
+    if min_distance >= search_radius:
+        min_distance, pair, at = None, None, None
+    return DeconflictionReport(
+        windows,
+        min_distance,
+        None if pair is None else (int(drone_ids[pair[0]]), int(drone_ids[pair[1]])),
+        None if at is None else at * step,
+        step,
+        samples,
+        candidate_pairs,
+    )
+
+
+def print_deconfliction_report(report, min_separation):
+    print(f"{report.samples} samples every {report.step:g} s, {report.candidate_pairs} candidate pair-buckets checked")
+    if report.min_distance is None:
+        print("Closest approach: no two drones come within the search radius")
+    else:
+        a, b = report.closest_pair
+        print(f"Closest approach: {report.min_distance:.2f} m between drones {a} and {b} at t={report.closest_time:.2f} s")
+    if not report.windows:
+        print(f"✅ No conflicts (minimum separation {min_separation:g} m)")
+        return
+    print(f"❌ {len(report.windows)} conflict windows (minimum separation {min_separation:g} m):")
+    for window in report.windows:
+        print(f"  drones {window.drone_a} and {window.drone_b}: t={window.start_time:.2f}..{window.end_time:.2f} s, "
+              f"closest {window.min_distance:.2f} m at t={window.min_time:.2f} s")
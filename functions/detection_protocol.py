@@ -0,0 +1,148 @@
+"""
+Detection wire protocol between interactive_tracker.py and the offboard controller.
+
+Binary message (version 1), little endian, 60 bytes:
+- magic b"DT" (2s), version (uint8), flags (uint8, bit 0 = detected)
+- frame sequence number (uint32)
+- capture, inference and send timestamps (3 x float64, time.time() seconds)
+- bounding box x1, y1, x2, y2 in pixels (4 x float32)
+- confidence (float32), track id (int32, -1 when not tracked)
+- image width and height in pixels (2 x uint16)
+
+The original JSON message ({"detected": ..., "position": [x, y]}) is still accepted as a fallback.
+Both formats decode to a dict with at least the "detected" and "position" keys.
+
+SequenceFilter drops the binary messages that arrive late or twice, while accepting a sequence
+that wraps around or starts again after a restart of the tracker.
+"""
+
+import json
+import struct
+import time
+
+
+DETECTION_MAGIC = b"DT"
+DETECTION_VERSION = 1
+FLAG_DETECTED = 0x01
+
+_DETECTION_STRUCT = struct.Struct("<2sBBIddd4ffiHH")
+
+SEQ_MODULUS = 1 << 32           # the sequence number is a uint32 on the wire
+SEQ_RESET_GAP = 1000            # frames: a larger step back is a new stream, not a late message
+REORDER_WINDOW = 1.0            # seconds: a late message was sent at most this long before the last one
+
+
+def encode_detection(seq, detected, bbox=None, confidence=0.0, track_id=-1, image_size=(0, 0),
+                     capture_ts=0.0, inference_ts=0.0, send_ts=None):
+    """
+    Pack a detection into the binary message.
+
+    Args:
+        seq (int): Sequence number of the video frame the detection comes from
+        detected (bool): True if an object was detected
+        bbox (tuple, optional): (x1, y1, x2, y2) of the detected object in pixels
+        confidence (float, optional): Detection confidence
+        track_id (int, optional): Tracker id of the object, -1 if unknown
+        image_size (tuple, optional): (width, height) of the frame in pixels
+        capture_ts (float, optional): time.time() when the frame was received from the camera
+        inference_ts (float, optional): time.time() when the detection finished
+        send_ts (float, optional): time.time() when the message is sent, defaults to now
+
+    Returns:
+        bytes: The encoded message
+    """
+    if send_ts is None:
+        send_ts = time.time()
+    x1, y1, x2, y2 = bbox if (detected and bbox is not None) else (0.0, 0.0, 0.0, 0.0)
+    width, height = image_size
+    return _DETECTION_STRUCT.pack(
+        DETECTION_MAGIC, DETECTION_VERSION, FLAG_DETECTED if detected else 0,
+        seq & 0xFFFFFFFF, capture_ts, inference_ts, send_ts,
+        x1, y1, x2, y2, confidence, track_id, width, height,
+    )
+
+
+def decode_binary_detection(data):
+    """Unpack a binary detection message into a message dict. Raises ValueError on bad input."""
+    if len(data) != _DETECTION_STRUCT.size:
+        raise ValueError(f"Detection message has {len(data)} bytes, expected {_DETECTION_STRUCT.size}")
+    (magic, version, flags, seq, capture_ts, inference_ts, send_ts,
+     x1, y1, x2, y2, confidence, track_id, width, height) = _DETECTION_STRUCT.unpack(data)
+    if magic != DETECTION_MAGIC:
+        raise ValueError(f"Bad detection message magic: {magic!r}")
+    if version != DETECTION_VERSION:
+        raise ValueError(f"Unsupported detection message version: {version}")
+
+    detected = bool(flags & FLAG_DETECTED)
+    return {
+        "version": version,
+        "seq": seq,
+        "detected": detected,
+        "position": [(x1 + x2) / 2, (y1 + y2) / 2] if detected else [None, None],
+        "bbox": (x1, y1, x2, y2) if detected else None,
+        "confidence": confidence,
+        "track_id": track_id,
+        "image_size": (width, height),
+        "capture_ts": capture_ts,
+        "inference_ts": inference_ts,
+        "send_ts": send_ts,
+    }
+
+
+def decode_json_detection(data):
+    """Decode a JSON detection message ({"detected": ..., "position": ...})."""
+    message = json.loads(data.decode("utf-8"))
+    if not isinstance(message, dict):
+        raise ValueError(f"Detection message is not an object: {message!r}")
+    return message
+
+
+def decode_detection(data):
+    """Decode a binary detection message, or a JSON one when the binary magic is missing."""
+    if data[:2] == DETECTION_MAGIC:
+        return decode_binary_detection(data)
+    return decode_json_detection(data)
+
+
+class SequenceFilter:
+    """
+    Drop old or repeated detections of a tracker stream.
+
+    A message is accepted when its sequence number is ahead of the last accepted one, modulo
+    SEQ_MODULUS (so the uint32 wrap is just another step forward). A message at or behind the
+    last one is a new stream (tracker restarted, its sequence starting again at 1) rather than a
+    late or duplicated message when it steps back more than reset_gap frames, or when its send
+    timestamp is newer than the last one or more than REORDER_WINDOW older (clock of another
+    epoch); it is dropped otherwise.
+
+    Attributes:
+        last_seq (int): Sequence number of the last accepted message, None before the first one
+        dropped (int): Messages dropped as late or repeated
+        resets (int): Messages accepted as the start of a new stream
+    """
+
+    def __init__(self, reset_gap=SEQ_RESET_GAP, reorder_window=REORDER_WINDOW):
+        self.reset_gap = reset_gap
+        self.reorder_window = reorder_window
+        self.last_seq = None
+        self.last_send_ts = None
+        self.dropped = 0
+        self.resets = 0
+
+    def accept(self, seq, send_ts=None):
+        """True if the message with this sequence number (and send timestamp) should be used."""
+        if self.last_seq is not None:
+            ahead = (seq - self.last_seq) % SEQ_MODULUS
+            if ahead == 0 or ahead > SEQ_MODULUS // 2:
+                behind = (self.last_seq - seq) % SEQ_MODULUS
+                restarted = behind > self.reset_gap
+                if send_ts is not None and self.last_send_ts is not None:
+                    restarted = (restarted or send_ts > self.last_send_ts
+                                 or send_ts < self.last_send_ts - self.reorder_window)
+                if not restarted:
+                    self.dropped += 1
+                    return False
+                self.resets += 1
+        self.last_seq = seq
+        self.last_send_ts = send_ts
+        return True
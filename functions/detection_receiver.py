@@ -0,0 +1,108 @@
+"""
+asyncio UDP receiver for the detection messages sent by interactive_tracker.py
+(binary or JSON, see functions/detection_protocol.py).
+
+Built on loop.create_datagram_endpoint: every datagram is decoded in datagram_received as soon as
+the event loop reads it, without polling, sleeping or a thread-pool slot. Only the newest message
+is kept; if several arrive before the detection callback gets to run, the older ones are counted
+as dropped-as-stale and never delivered.
+"""
+
+import asyncio
+import time
+
+from functions.detection_protocol import decode_detection
+
+
+class DetectionReceiver(asyncio.DatagramProtocol):
+    """
+    Datagram protocol keeping the newest decoded detection message.
+
+    Attributes:
+        received (int): Datagrams received
+        delivered (int): Messages handed to the callback
+        dropped_stale (int): Valid messages replaced by a newer one before being delivered
+        malformed (int): Datagrams that could not be decoded
+    """
+
+    def __init__(self, callback, decode=decode_detection, clock=time.time):
+        """
+        Args:
+            callback (coroutine function): Called with every delivered message
+            decode (callable, optional): bytes -> message dict, raising ValueError on bad input
+            clock (callable, optional): Clock of the receive_ts stamp, seconds since the epoch
+        """
+        self.callback = callback
+        self.decode = decode
+        self.clock = clock
+        self.received = 0
+        self.delivered = 0
+        self.dropped_stale = 0
+        self.malformed = 0
+        self.transport = None
+        self._latest = None
+        self._ready = asyncio.Event()
+        self._task = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self._task = asyncio.get_running_loop().create_task(self._deliver())
+
+    def datagram_received(self, data, addr):
+        self.received += 1
+        receive_ts = self.clock()
+        try:
+            message = self.decode(data)
+        except (ValueError, UnicodeDecodeError):
+            self.malformed += 1
+            return
+        message["receive_ts"] = receive_ts      # stage timestamp for the latency trace (functions/latency_trace.py)
+
+        if self._latest is not None:
+            self.dropped_stale += 1
+        self._latest = message
+        self._ready.set()
+
+    def error_received(self, exc):
+        print(f"❌ Erro no socket UDP de deteções: {exc}")
+
+    def connection_lost(self, exc):
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _deliver(self):
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            message, self._latest = self._latest, None
+            if message is None:
+                continue
+            self.delivered += 1
+            try:
+                await self.callback(message)
+            except Exception as e:
+                print(f"❌ Erro inesperado ao tratar a deteção: {e}")
+
+    def stats(self):
+        return {
+            "received": self.received,
+            "delivered": self.delivered,
+            "dropped_stale": self.dropped_stale,
+            "malformed": self.malformed,
+        }
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+
+
+async def start_detection_receiver(port, callback, host="127.0.0.1", decode=decode_detection, clock=time.time):
+    """
+    Bind the UDP port and start delivering detection messages to `callback`.
+
+    Returns:
+        The DetectionReceiver, whose counters can be read at any time and which is stopped with close().
+    """
+    loop = asyncio.get_running_loop()
+    _, receiver = await loop.create_datagram_endpoint(lambda: DetectionReceiver(callback, decode, clock), local_addr=(host, port))
+    return receiver
@@ -1,40 +1,85 @@
+"""
+3D plots of trajectory files, one colored line per flight phase.
+
+Every phase (run of rows with the same mode, see build_phase_index) is downsampled with LTTB
+(functions/lttb.py) before plotting: a mission of any length is drawn with at most max_points
+points, its corners and turns preserved. The plot is saved next to the trajectory file
+(shapes/active.csv -> shapes/active.png) unless another path is given.
+
+With show=False the figure is rendered with the Agg canvas only, without pyplot, so no display
+is needed. plot_trajectories renders many files like that over a process pool.
+"""
+
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 from mpl_toolkits.mplot3d import Axes3D
-import pandas as pd
 import numpy as np
 
-def export_and_plot_shape(output_file):
-    """
-    Load the trajectory data from a CSV file, plot the trajectory, and save the plot.
+from functions.lttb import lttb_indices
+from functions.piecewise_trajectory import PIECEWISE_EXTENSION, load_piecewise, piecewise_to_trajectory_table
+from functions.trajectory_file import BINARY_EXTENSION, binary_path_for, load_trajectory
+from functions.trajectory_player import build_phase_index
 
-    Parameters
-    ----------
-    output_file : str
-        The path to the CSV file containing the trajectory data.
-    """
-    # Load the data from the active.csv file
-    data = pd.read_csv(output_file)
 
-    # Extract the position coordinates and flight modes
-    x = data['px']
-    y = data['py']
-    z = -1*data['pz']
-    modes = data['mode']
+DEFAULT_MAX_POINTS = 1000
+PIECEWISE_PLOT_STEP = 0.05      # sample period of the piecewise trajectories, in seconds
 
-    # Create a 3D plot
-    fig = plt.figure()
-    ax = fig.add_subplot(111, projection='3d')
+# Set colormap (you can change these colors to anything you like)
+colors = {0: 'grey', 5: 'magenta', 10: 'orange', 20: 'yellow', 30: 'green', 40: 'blue', 50: 'purple', 60: 'brown', 70: 'red', 80: 'pink', 90: 'cyan', 100: 'black'}
+
+# Define flight mode names
+mode_names = {0: 'On the ground', 5: 'Transition to resume point', 10: 'Initial climbing', 20: 'Initial holding after climb', 30: 'Moving to start point', 40: 'Holding at start point', 50: 'Moving to maneuver start point', 60: 'Holding at maneuver start point', 70: 'Maneuvering (trajectory)', 80: 'Holding at end of trajectory', 90: 'Returning to home', 100: 'Landing'}
 
-    # Set colormap (you can change these colors to anything you like)
-    colors = {0: 'grey', 10: 'orange', 20: 'yellow', 30: 'green', 40: 'blue', 50: 'purple', 60: 'brown', 70: 'red', 80: 'pink', 90: 'cyan', 100: 'black'}
 
-    # Define flight mode names
-    mode_names = {0: 'On the ground', 10: 'Initial climbing', 20: 'Initial holding after climb', 30: 'Moving to start point', 40: 'Holding at start point', 50: 'Moving to maneuver start point', 60: 'Holding at maneuver start point', 70: 'Maneuvering (trajectory)', 80: 'Holding at end of trajectory', 90: 'Returning to home', 100: 'Landing'}
+def plot_path_for(trajectory_file, output_dir=None):
+    """Path of the plot of a trajectory file: same name with a .png extension, in output_dir if given."""
+    plot_file = os.path.splitext(trajectory_file)[0] + ".png"
+    if output_dir is not None:
+        plot_file = os.path.join(output_dir, os.path.basename(plot_file))
+    return plot_file
 
-    # Plot each segment with the corresponding color
-    for mode in np.unique(modes):
-        ix = np.where(modes == mode)
-        ax.plot(x.iloc[ix], y.iloc[ix], z.iloc[ix], color=colors[mode], label=mode_names[mode])
+
+def _load_positions(trajectory_file):
+    """(times, (N, 3) positions with z up, modes) of a CSV, binary or piecewise trajectory file."""
+    if trajectory_file.endswith(PIECEWISE_EXTENSION):
+        table = piecewise_to_trajectory_table(load_piecewise(trajectory_file), PIECEWISE_PLOT_STEP)
+        times, modes = table.times, table.modes
+        positions = table.values[:, :3] * (1.0, 1.0, -1.0)
+    else:
+        columns = load_trajectory(trajectory_file)
+        times, modes = np.asarray(columns["t"]), np.asarray(columns["mode"])
+        positions = np.column_stack([columns["px"], columns["py"], -np.asarray(columns["pz"])])
+    return times, positions, modes
+
+
+def _downsampled_phases(times, positions, modes, max_points):
+    """
+    (mode, (M, 3) positions) of every phase, LTTB-downsampled. The points are shared out between
+    the phases in proportion to their rows; every phase ends at the first point of the next one so
+    the line stays continuous.
+    """
+    phases = build_phase_index(times, modes)
+    segments = []
+    for phase in phases:
+        end = min(phase.end_row + 1, len(times))
+        rows = end - phase.start_row
+        budget = max(int(max_points * rows / len(times)), 3)
+        kept = phase.start_row + lttb_indices(positions[phase.start_row:end], budget)
+        segments.append((int(phase.mode), positions[kept]))
+    return segments
+
+
+def _draw(ax, segments):
+    labeled = set()
+    for mode, points in segments:
+        label = None if mode in labeled else mode_names.get(mode, str(mode))
+        labeled.add(mode)
+        ax.plot(points[:, 0], points[:, 1], points[:, 2], color=colors.get(mode, 'black'), label=label)
 
     # Set labels and title
     ax.set_xlabel('X')
@@ -45,8 +90,100 @@ def export_and_plot_shape(output_file):
     # Create legend
     ax.legend(loc='best')
 
+
+def export_and_plot_shape(output_file, plot_file=None, show=True, max_points=DEFAULT_MAX_POINTS):
+    """
+    Load the trajectory data from a trajectory file, plot the trajectory, and save the plot.
+
+    Parameters
+    ----------
+    output_file : str
+        The path to the CSV, binary (.traj) or piecewise (.npz) file containing the trajectory data.
+    plot_file : str, optional
+        The path of the PNG file to create, defaults to the trajectory file with a .png extension.
+    show : bool, optional
+        Also open the plot in a window. With False, the plot is rendered headless.
+    max_points : int, optional
+        Largest number of points drawn, shared out between the flight phases.
+
+    Returns
+    -------
+    str
+        The path of the PNG file.
+    """
+    if plot_file is None:
+        plot_file = plot_path_for(output_file)
+    segments = _downsampled_phases(*_load_positions(output_file), max_points)
+
+    if show:
+        fig = plt.figure()
+    else:
+        # Agg canvas without pyplot: no display, no global figure state
+        fig = Figure()
+        FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111, projection='3d')
+    _draw(ax, segments)
+
     # Save the figure before showing it
-    plt.savefig('shapes/trajectory_plot.png')
+    fig.savefig(plot_file)
+    if show:
+        plt.show()
+    return plot_file
+
+
+def _is_trajectory_csv(path):
+    """True if the header of a CSV has the trajectory columns (and not e.g. those of a swarm manifest)."""
+    with open(path, newline="") as file:
+        header = file.readline().strip().split(",")
+    return {"t", "px", "py", "pz", "mode"} <= set(header)
+
+
+def find_trajectory_files(directory):
+    """
+    Trajectory files of a directory, sorted; a binary or piecewise file written alongside a CSV is
+    not listed twice, and CSVs without the trajectory columns are left out.
+    """
+    files = set(glob.glob(os.path.join(directory, "*" + BINARY_EXTENSION)))
+    files.update(glob.glob(os.path.join(directory, "*" + PIECEWISE_EXTENSION)))
+    files.update(path for path in glob.glob(os.path.join(directory, "*.csv")) if _is_trajectory_csv(path))
+    return sorted(path for path in files
+                  if not (path.endswith(BINARY_EXTENSION) and os.path.splitext(path)[0] + ".csv" in files)
+                  and not (path.endswith(PIECEWISE_EXTENSION) and (os.path.splitext(path)[0] + ".csv" in files
+                                                                   or binary_path_for(path) in files)))
+
 
-    # Then show the plot
-    plt.show()
+def _plot_headless(job):
+    trajectory_file, plot_file, max_points = job
+    return export_and_plot_shape(trajectory_file, plot_file, show=False, max_points=max_points)
+
+
+def plot_trajectories(trajectory_files, output_dir=None, max_workers=None, max_points=DEFAULT_MAX_POINTS):
+    """
+    Plot many trajectory files headless, in parallel worker processes.
+
+    Parameters
+    ----------
+    trajectory_files : list of str or str
+        Trajectory files, or a directory whose trajectory files are all plotted.
+    output_dir : str, optional
+        Directory of the PNG files, defaults to next to every trajectory file.
+    max_workers : int, optional
+        Worker processes, defaults to the number of CPUs.
+    max_points : int, optional
+        Largest number of points drawn per plot.
+
+    Returns
+    -------
+    list of str
+        The paths of the PNG files, in the order of the trajectory files.
+    """
+    if isinstance(trajectory_files, str):
+        trajectory_files = find_trajectory_files(trajectory_files)
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+    jobs = [(path, plot_path_for(path, output_dir), max_points) for path in trajectory_files]
+    if not jobs:
+        return []
+    workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_plot_headless, jobs, chunksize=max(len(jobs) // (4 * workers), 1)))
@@ -0,0 +1,313 @@
+"""
+In-process stand-in for mavsdk.System, backed by a vectorized point-mass model of the swarm.
+
+Covers the parts of the MAVSDK API used by offboard_multiple_from_csv.run_drone:
+- connect, core.connection_state
+- telemetry.health, position, attitude_euler, velocity_ned, position_velocity_ned, landed_state
+- action.arm, land, disarm
+- offboard.start, stop, set_position_ned, set_position_velocity_acceleration_ned
+
+One FakeSwarm integrates every vehicle at once with NumPy (PD tracking of the offboard setpoint
+with feed-forward acceleration, bounded acceleration, first-order yaw, ground contact) and
+publishes the telemetry of all vehicles every few physics steps. It makes it possible to run
+hundreds of drones on one machine, without PX4 SITL, Gazebo or mavsdk_server, to measure the
+throughput and scheduling behavior of the controller.
+
+Usage:
+    swarm = FakeSwarm(drone_ids)
+    swarm.start()
+    await run_swarm(specs, system_factory=swarm.system_factory)
+    swarm.stop()
+"""
+
+import asyncio
+import math
+import time
+from collections import namedtuple
+from enum import Enum
+
+import numpy as np
+
+try:
+    from mavsdk.telemetry import LandedState
+except ImportError:     # the fake does not need MAVSDK; same values as mavsdk.telemetry.LandedState
+    class LandedState(Enum):
+        UNKNOWN = 0
+        ON_GROUND = 1
+        IN_AIR = 2
+        TAKING_OFF = 3
+        LANDING = 4
+
+
+# Same fields as the MAVSDK telemetry and core types
+ConnectionState = namedtuple("ConnectionState", ["is_connected"])
+Health = namedtuple("Health", ["is_gyrometer_calibration_ok", "is_accelerometer_calibration_ok", "is_magnetometer_calibration_ok",
+                               "is_local_position_ok", "is_global_position_ok", "is_home_position_ok", "is_armable"])
+Position = namedtuple("Position", ["latitude_deg", "longitude_deg", "absolute_altitude_m", "relative_altitude_m"])
+EulerAngle = namedtuple("EulerAngle", ["roll_deg", "pitch_deg", "yaw_deg", "timestamp_us"])
+VelocityNed = namedtuple("VelocityNed", ["north_m_s", "east_m_s", "down_m_s"])
+PositionNed = namedtuple("PositionNed", ["north_m", "east_m", "down_m"])
+PositionVelocityNed = namedtuple("PositionVelocityNed", ["position", "velocity"])
+
+EARTH_RADIUS = 6378137.0
+GRAVITY = 9.81
+HOME = (47.397742, 8.545594, 488.0)     # PX4 SITL default home (latitude, longitude, altitude)
+
+
+class FakeSwarm:
+    """
+    Point-mass model of a swarm of multicopters, all integrated in one NumPy step.
+
+    Positions are NED in meters relative to each vehicle's home. Vehicles are laid out on a line
+    `spacing` meters apart to the east of HOME.
+
+    Attributes:
+        position, velocity (np.ndarray): (N, 3) state of the vehicles
+        yaw (np.ndarray): (N,) heading in degrees
+        setpoints_received (np.ndarray): (N,) offboard setpoints received per vehicle
+        steps (int): Physics steps done
+    """
+
+    def __init__(self, drone_ids, physics_rate_hz=50.0, telemetry_rate_hz=10.0, spacing=3.0,
+                 kp=2.0, kd=3.0, max_acceleration=8.0, yaw_time_constant=0.3, land_speed=1.0,
+                 clock=time.monotonic, sleep=asyncio.sleep):
+        """
+        Args:
+            drone_ids (list): Ids of the vehicles, used by system_factory
+            physics_rate_hz (float, optional): Integration rate
+            telemetry_rate_hz (float, optional): Rate of every telemetry stream
+            spacing (float, optional): Distance between the homes of consecutive vehicles, in meters
+            kp, kd (float, optional): Position and velocity gains of the tracking controller
+            max_acceleration (float, optional): Bound on the commanded acceleration, in m/s²
+            yaw_time_constant (float, optional): Time constant of the heading response, in seconds
+            land_speed (float, optional): Descent speed while landing, in m/s
+            clock (callable, optional): Monotonic clock returning seconds
+            sleep (coroutine function, optional): Sleep matching the clock
+        """
+        self.index = {drone_id: i for i, drone_id in enumerate(drone_ids)}
+        n = len(self.index)
+        self.physics_period = 1.0 / physics_rate_hz
+        self.telemetry_every = max(int(round(physics_rate_hz / telemetry_rate_hz)), 1)
+        self.kp = kp
+        self.kd = kd
+        self.max_acceleration = max_acceleration
+        self.yaw_time_constant = yaw_time_constant
+        self.land_speed = land_speed
+        self.clock = clock
+        self.sleep = sleep
+
+        lat0, lon0, self.home_altitude = HOME
+        self.home_latitude = np.full(n, lat0)
+        self.home_longitude = lon0 + np.degrees(spacing * np.arange(n) / (EARTH_RADIUS * math.cos(math.radians(lat0))))
+
+        self.position = np.zeros((n, 3))
+        self.velocity = np.zeros((n, 3))
+        self.acceleration = np.zeros((n, 3))
+        self.yaw = np.zeros(n)
+        self.target_position = np.zeros((n, 3))
+        self.target_velocity = np.zeros((n, 3))
+        self.target_acceleration = np.zeros((n, 3))
+        self.target_yaw = np.zeros(n)
+        self.connected = np.zeros(n, dtype=bool)
+        self.armed = np.zeros(n, dtype=bool)
+        self.offboard = np.zeros(n, dtype=bool)
+        self.landing = np.zeros(n, dtype=bool)
+        self.setpoints_received = np.zeros(n, dtype=np.int64)
+        self.steps = 0
+        self._telemetry = asyncio.Event()
+        self._task = None
+
+    # ------------------------------------------------------------------
+
+    def system_factory(self, drone_id, grpc_port=None):
+        """Drop-in replacement for System(mavsdk_server_address=..., port=grpc_port)."""
+        return FakeSystem(self, self.index[drone_id])
+
+    def start(self):
+        """Start integrating the swarm in real time on the running event loop."""
+        self._task = asyncio.ensure_future(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        deadline = self.clock()
+        while True:
+            deadline += self.physics_period
+            delay = deadline - self.clock()
+            if delay > 0:
+                await self.sleep(delay)
+            self.step(self.physics_period)
+
+    def step(self, dt):
+        """Integrate every vehicle over dt seconds and publish telemetry when due."""
+        on_ground = self.position[:, 2] >= -0.05
+
+        # Landing: descend at land_speed above the position where land() was called
+        target_position = self.target_position.copy()
+        target_velocity = self.target_velocity.copy()
+        target_position[self.landing, 2] = self.position[self.landing, 2]
+        target_velocity[self.landing] = (0.0, 0.0, self.land_speed)
+
+        controlled = self.armed & (self.offboard | self.landing)
+        acceleration = (np.where(self.landing[:, None], 0.0, self.target_acceleration)
+                        + self.kp * (target_position - self.position) + self.kd * (target_velocity - self.velocity))
+        norm = np.linalg.norm(acceleration, axis=1, keepdims=True)
+        acceleration *= np.minimum(1.0, self.max_acceleration / np.maximum(norm, 1e-9))
+        # Vehicles not under control brake in the air and stay put on the ground
+        acceleration[~controlled] = -self.kd * self.velocity[~controlled]
+        acceleration[~controlled & on_ground] = 0.0
+        self.velocity[~controlled & on_ground] = 0.0
+
+        self.velocity += acceleration * dt
+        self.position += self.velocity * dt
+        below = self.position[:, 2] > 0.0                       # ground contact (down is positive)
+        self.position[below, 2] = 0.0
+        self.velocity[below, 2] = np.minimum(self.velocity[below, 2], 0.0)
+        self.acceleration = acceleration
+
+        yaw_error = (self.target_yaw - self.yaw + 180.0) % 360.0 - 180.0
+        self.yaw[controlled] += yaw_error[controlled] * min(dt / self.yaw_time_constant, 1.0)
+        self.yaw = (self.yaw + 180.0) % 360.0 - 180.0
+
+        self.steps += 1
+        if self.steps % self.telemetry_every == 0:
+            event, self._telemetry = self._telemetry, asyncio.Event()
+            event.set()
+
+    async def wait_telemetry(self):
+        await self._telemetry.wait()
+
+    # ------------------------------------------------------------------
+    # Telemetry of one vehicle, with the MAVSDK types
+
+    def sample_position(self, i):
+        north, east, down = self.position[i]
+        latitude = self.home_latitude[i] + math.degrees(north / EARTH_RADIUS)
+        longitude = self.home_longitude[i] + math.degrees(east / (EARTH_RADIUS * math.cos(math.radians(self.home_latitude[i]))))
+        return Position(float(latitude), float(longitude), float(self.home_altitude - down), float(-down))
+
+    def sample_attitude(self, i):
+        north, east, _ = self.acceleration[i]
+        yaw = math.radians(self.yaw[i])
+        forward = north * math.cos(yaw) + east * math.sin(yaw)      # tilt needed for the horizontal acceleration
+        right = -north * math.sin(yaw) + east * math.cos(yaw)
+        return EulerAngle(math.degrees(math.atan2(right, GRAVITY)), -math.degrees(math.atan2(forward, GRAVITY)),
+                          float(self.yaw[i]), int(self.clock() * 1e6))
+
+    def sample_velocity(self, i):
+        return VelocityNed(*(float(v) for v in self.velocity[i]))
+
+    def sample_position_velocity(self, i):
+        return PositionVelocityNed(PositionNed(*(float(p) for p in self.position[i])), self.sample_velocity(i))
+
+    def sample_landed_state(self, i):
+        on_ground = self.position[i, 2] >= -0.05 and abs(self.velocity[i, 2]) < 0.3
+        if on_ground:
+            return LandedState.ON_GROUND
+        return LandedState.LANDING if self.landing[i] else LandedState.IN_AIR
+
+    def sample_health(self, i):
+        ok = bool(self.connected[i])
+        return Health(True, True, True, ok, ok, ok, ok)
+
+
+class FakeSystem:
+    """One vehicle of a FakeSwarm, with the same attributes as mavsdk.System."""
+
+    def __init__(self, swarm, index):
+        self.swarm = swarm
+        self.index = index
+        self.core = _Core(swarm, index)
+        self.telemetry = _Telemetry(swarm, index)
+        self.action = _Action(swarm, index)
+        self.offboard = _Offboard(swarm, index)
+
+    async def connect(self, system_address=None):
+        self.swarm.connected[self.index] = True
+
+
+async def _stream(swarm, sample):
+    while True:
+        yield sample()
+        await swarm.wait_telemetry()
+
+
+class _Core:
+    def __init__(self, swarm, index):
+        self.swarm = swarm
+        self.index = index
+
+    def connection_state(self):
+        return _stream(self.swarm, lambda: ConnectionState(bool(self.swarm.connected[self.index])))
+
+
+class _Telemetry:
+    def __init__(self, swarm, index):
+        self.swarm = swarm
+        self.index = index
+
+    def health(self):
+        return _stream(self.swarm, lambda: self.swarm.sample_health(self.index))
+
+    def position(self):
+        return _stream(self.swarm, lambda: self.swarm.sample_position(self.index))
+
+    def attitude_euler(self):
+        return _stream(self.swarm, lambda: self.swarm.sample_attitude(self.index))
+
+    def velocity_ned(self):
+        return _stream(self.swarm, lambda: self.swarm.sample_velocity(self.index))
+
+    def position_velocity_ned(self):
+        return _stream(self.swarm, lambda: self.swarm.sample_position_velocity(self.index))
+
+    def landed_state(self):
+        return _stream(self.swarm, lambda: self.swarm.sample_landed_state(self.index))
+
+
+class _Action:
+    def __init__(self, swarm, index):
+        self.swarm = swarm
+        self.index = index
+
+    async def arm(self):
+        self.swarm.armed[self.index] = True
+
+    async def land(self):
+        self.swarm.offboard[self.index] = False
+        self.swarm.landing[self.index] = True
+
+    async def disarm(self):
+        self.swarm.armed[self.index] = False
+        self.swarm.offboard[self.index] = False
+        self.swarm.landing[self.index] = False
+
+
+class _Offboard:
+    def __init__(self, swarm, index):
+        self.swarm = swarm
+        self.index = index
+
+    async def start(self):
+        self.swarm.offboard[self.index] = True
+        self.swarm.landing[self.index] = False
+
+    async def stop(self):
+        self.swarm.offboard[self.index] = False
+
+    async def set_position_ned(self, position):
+        self._set(position, None, None)
+
+    async def set_position_velocity_acceleration_ned(self, position, velocity, acceleration):
+        self._set(position, velocity, acceleration)
+
+    def _set(self, position, velocity, acceleration):
+        i = self.index
+        self.swarm.target_position[i] = (position.north_m, position.east_m, position.down_m)
+        self.swarm.target_yaw[i] = position.yaw_deg
+        self.swarm.target_velocity[i] = (0.0, 0.0, 0.0) if velocity is None else (velocity.north_m_s, velocity.east_m_s, velocity.down_m_s)
+        self.swarm.target_acceleration[i] = (0.0, 0.0, 0.0) if acceleration is None else (acceleration.north_m_s2, acceleration.east_m_s2, acceleration.down_m_s2)
+        self.swarm.setpoints_received[i] += 1
@@ -0,0 +1,214 @@
+"""
+Flight data recorder: commanded setpoints, telemetry and detections of every drone.
+
+The control loop appends rows to preallocated buffers (one per drone and stream, a single
+struct.pack_into per row). A full buffer is handed to a background writer thread through a
+bounded queue and replaced by a fresh one; the writer transposes it to columns and appends it
+to the file. Appending a row never touches the disk, and if the writer falls behind and the
+queue is full the chunk is dropped and counted instead of blocking the loop. If writing fails
+(disk full, I/O error), the writer records the error, stops writing and keeps draining the queue,
+so neither the control loop nor close() ever blocks on it; stats() reports the error.
+
+File layout (".drec"):
+- prefix: magic b"DREC", format version (uint16), reserved (uint16)
+- chunks, each: chunk header length (uint32), chunk data length (uint64), UTF-8 JSON chunk header
+  with the drone id, stream name, number of rows and column names, then the data: one
+  contiguous little-endian float64 array per column
+
+read_flight_record loads a file back as {drone_id: {stream: {column: 1-D array}}}.
+"""
+
+import json
+import queue
+import struct
+import threading
+
+import numpy as np
+
+
+RECORD_MAGIC = b"DREC"
+RECORD_VERSION = 1
+RECORD_EXTENSION = ".drec"
+
+SETPOINT_COLUMNS = ("time", "mission_time", "px", "py", "pz", "vx", "vy", "vz", "ax", "ay", "az", "yaw", "mode", "lateness", "sent")
+DETECTION_COLUMNS = ("time", "seq", "detected", "x", "y", "confidence", "track_id", "capture_ts", "receive_ts")
+
+_PREFIX = struct.Struct("<4sHH")
+_CHUNK = struct.Struct("<IQ")
+_DTYPE = np.dtype("<f8")
+
+
+class RecordTable:
+    """
+    Row buffer of one stream of one drone, written to the file as columns.
+
+    Attributes:
+        columns (tuple): Column names
+        rows (int): Rows appended since the start
+    """
+
+    def __init__(self, recorder, drone_id, stream, columns, chunk_rows):
+        self.recorder = recorder
+        self.drone_id = drone_id
+        self.stream = stream
+        self.columns = tuple(columns)
+        self.chunk_rows = chunk_rows
+        self.rows = 0
+        self._row = struct.Struct(f"<{len(self.columns)}d")
+        self._buffer = bytearray(self._row.size * chunk_rows)
+        self._count = 0
+
+    def append(self, row):
+        """Append one row (a sequence with one number per column); never blocks."""
+        self._row.pack_into(self._buffer, self._count * self._row.size, *row)
+        self._count += 1
+        self.rows += 1
+        if self._count == self.chunk_rows:
+            self.flush()
+
+    def flush(self, wait=False):
+        """Hand the rows buffered so far to the writer and start a new buffer."""
+        if self._count == 0:
+            return
+        self.recorder._submit(self, self._buffer, self._count, wait)
+        self._buffer = bytearray(self._row.size * self.chunk_rows)
+        self._count = 0
+
+
+class FlightRecorder:
+    """
+    Recorder of the tables of a flight into one file, written by a background thread.
+
+    Attributes:
+        path (str): Output file
+        chunks_written (int): Chunks written to the file
+        chunks_dropped (int): Chunks dropped because the writer queue was full or writing failed
+        bytes_written (int): Bytes written to the file
+        error (Exception): First error of the writer, None while writing succeeds
+    """
+
+    def __init__(self, path, chunk_rows=1024, max_pending_chunks=1024):
+        """
+        Args:
+            path (str): Output file, truncated if it exists
+            chunk_rows (int, optional): Rows per buffer, i.e. per chunk in the file
+            max_pending_chunks (int, optional): Chunks waiting for the writer before new ones are dropped
+        """
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.chunks_written = 0
+        # Drop counters written by one thread each (no lock on the hot path), summed by chunks_dropped
+        self._dropped_by_caller = 0     # queue full, or writer gone at close()
+        self._dropped_by_writer = 0     # written after a write error
+        self.bytes_written = 0
+        self.error = None
+        self._tables = {}
+        self._queue = queue.Queue(maxsize=max_pending_chunks)
+        self._file = open(path, "wb")
+        self._file.write(_PREFIX.pack(RECORD_MAGIC, RECORD_VERSION, 0))
+        self._writer = threading.Thread(target=self._write_loop, name="flight-recorder", daemon=True)
+        self._writer.start()
+
+    @property
+    def chunks_dropped(self):
+        return self._dropped_by_caller + self._dropped_by_writer
+
+    def table(self, drone_id, stream, columns):
+        """RecordTable of a stream of a drone, created on first use."""
+        key = (drone_id, stream)
+        table = self._tables.get(key)
+        if table is None:
+            table = self._tables[key] = RecordTable(self, drone_id, stream, columns, self.chunk_rows)
+        return table
+
+    def _submit(self, table, buffer, count, wait=False):
+        try:
+            self._queue.put((table.drone_id, table.stream, table.columns, buffer, count), block=wait)
+        except queue.Full:
+            self._dropped_by_caller += 1
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            if self.error is not None:
+                self._dropped_by_writer += 1        # the file is broken: keep draining so nothing blocks on the queue
+                continue
+            try:
+                self._write_chunk(*item)
+            except Exception as error:
+                self.error = error
+                self._dropped_by_writer += 1
+
+    def _write_chunk(self, drone_id, stream, columns, buffer, count):
+        header = json.dumps({"drone_id": drone_id, "stream": stream, "rows": count, "columns": list(columns)}).encode("utf-8")
+        rows = np.frombuffer(buffer, dtype=_DTYPE, count=count * len(columns)).reshape(count, len(columns))
+        data = np.ascontiguousarray(rows.T).tobytes()
+        self._file.write(_CHUNK.pack(len(header), len(data)))
+        self._file.write(header)
+        self._file.write(data)
+        self.chunks_written += 1
+        self.bytes_written += _CHUNK.size + len(header) + len(data)
+
+    def close(self):
+        """Flush every table, wait for the writer and close the file."""
+        if self._file is None:
+            return
+        if self._writer.is_alive():
+            for table in self._tables.values():
+                table.flush(wait=True)
+            self._queue.put(None)
+            self._writer.join()
+        else:
+            # Writer gone (it never exits before close() unless killed): blocking on its queue would hang
+            self._dropped_by_caller += sum(1 for table in self._tables.values() if table._count)
+        try:
+            self._file.close()
+        except OSError as error:
+            if self.error is None:
+                self.error = error
+        self._file = None
+
+    def stats(self):
+        return {
+            "tables": len(self._tables),
+            "rows": sum(table.rows for table in self._tables.values()),
+            "chunks_written": self.chunks_written,
+            "chunks_dropped": self.chunks_dropped,
+            "bytes_written": self.bytes_written,
+            "error": None if self.error is None else str(self.error),
+        }
+
+
+def read_flight_record(path):
+    """
+    Read a flight record file.
+
+    Returns:
+        {drone_id: {stream: {column: 1-D float64 array}}}, rows in recording order.
+    """
+    chunks = {}
+    with open(path, "rb") as file:
+        magic, version, _ = _PREFIX.unpack(file.read(_PREFIX.size))
+        if magic != RECORD_MAGIC:
+            raise ValueError(f"{path} is not a flight record file")
+        if version != RECORD_VERSION:
+            raise ValueError(f"Unsupported flight record version {version} in {path}")
+        while True:
+            prefix = file.read(_CHUNK.size)
+            if len(prefix) < _CHUNK.size:
+                break
+            header_len, data_len = _CHUNK.unpack(prefix)
+            header, data = file.read(header_len), file.read(data_len)
+            if len(data) < data_len:
+                break                       # chunk cut short (recording interrupted)
+            header = json.loads(header)
+            data = np.frombuffer(data, dtype=_DTYPE).reshape(len(header["columns"]), header["rows"])
+            chunks.setdefault((header["drone_id"], header["stream"]), (header["columns"], []))[1].append(data)
+
+    record = {}
+    for (drone_id, stream), (columns, blocks) in chunks.items():
+        values = np.concatenate(blocks, axis=1)
+        record.setdefault(drone_id, {})[stream] = {name: values[i] for i, name in enumerate(columns)}
+    return record
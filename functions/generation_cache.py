@@ -0,0 +1,255 @@
+"""
+Persistent on-disk cache of generated missions.
+
+compile_mission always produces the same samples for the same parameters and the same generator
+source, so a generated mission is stored once in the binary trajectory format
+(functions/trajectory_file.py) under the hash of both:
+
+    <cache directory>/<hash>.traj
+
+- key: SHA-256 of the canonical JSON of the normalized parameters of create_active_csv
+  (MISSION_PARAMS; 20 and 20.0 give the same key) and of generator_fingerprint(), the source of
+  the modules that decide the samples (shape functions included), so editing a shape invalidates
+  its entries
+- LRU eviction: every hit sets the access time of the entry; after every store the least
+  recently used entries are deleted until the cache holds at most max_bytes, along with the
+  links (see below) to the deleted entries
+- writes go to a temporary file renamed into place, so concurrent processes (e.g. the process
+  pool of functions/mission_batch.py) never see a partial entry
+
+The trajectory files written from a cached mission are linked to their entry (link_file): the
+offboard loader (functions/trajectory_cache.py) then memory-maps the entry of a CSV instead of
+parsing it, as long as the CSV is unchanged. The cache directory is MISSION_CACHE_DIR from the
+environment, shapes/.cache of the repository by default (not of the working directory).
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from functions.mission_compiler import compile_mission
+from functions.trajectory_file import BINARY_EXTENSION, columns_to_mission, open_trajectory_binary, write_trajectory_binary
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "shapes", ".cache")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+MISSION_PARAMS = ("shape_name", "diameter", "direction", "maneuver_time", "start_x", "start_y", "initial_altitude",
+                  "climb_rate", "move_speed", "hold_time", "step_time")
+
+# Modules whose source decides the samples of a mission
+GENERATOR_MODULES = ("mission_compiler.py", "trajectories.py", "trajectory_file.py")
+
+_LINKS = "links"
+
+
+def normalize_param(name, value):
+    """Parameter value as hashed: strings for shape_name / role, ints for direction / ports, floats otherwise."""
+    if name in ("shape_name", "role"):
+        return str(value)
+    if name in ("direction", "udp_port", "grpc_port"):
+        return int(value)
+    return float(value)
+
+
+def generator_fingerprint(modules=GENERATOR_MODULES):
+    """Hash of the source of the modules (file names in functions/) that generate the missions."""
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in modules:
+        with open(os.path.join(directory, name), "rb") as file:
+            digest.update(name.encode() + b"\0" + file.read())
+    return digest.hexdigest()
+
+
+def _write_atomic(path, write):
+    """Call write(temporary_path) then rename the temporary file to path."""
+    directory = os.path.dirname(path) or "."
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(handle)
+    try:
+        write(temporary)
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+class GenerationCache:
+    """
+    Size-bounded LRU cache of compiled missions on disk.
+
+    Attributes:
+        directory (str): Cache directory
+        max_bytes (int): Largest total size of the entries
+        hits (int): Lookups served from the cache
+        misses (int): Lookups that compiled the mission
+        evictions (int): Entries deleted to stay under max_bytes
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or os.environ.get("MISSION_CACHE_DIR") or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._fingerprint = None
+        self._lock = threading.Lock()
+
+    def key(self, params):
+        """Cache key of the parameters of a mission (keyword arguments of compile_mission)."""
+        if self._fingerprint is None:
+            self._fingerprint = generator_fingerprint()
+        canonical = json.dumps({"params": {name: normalize_param(name, params[name]) for name in MISSION_PARAMS},
+                                "generator": self._fingerprint}, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key + BINARY_EXTENSION)
+
+    def _touch(self, path):
+        """Mark an entry as used now (access time), keeping its modification time for the loaders."""
+        try:
+            os.utime(path, (time.time(), os.stat(path).st_mtime))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def get(self, params):
+        """Path of the cached mission of `params`, or None."""
+        path = self.entry_path(self.key(params))
+        with self._lock:
+            if self._touch(path):
+                self.hits += 1
+                return path
+            self.misses += 1
+            return None
+
+    def put(self, params, mission):
+        """Store a compiled mission, evict the least recently used entries, and return the entry path."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.entry_path(self.key(params))
+        _write_atomic(path, lambda temporary: write_trajectory_binary(mission, temporary))
+        self.evict(keep=path)
+        return path
+
+    def compile(self, params):
+        """
+        Mission of `params` from the cache, compiled and stored on a miss.
+
+        Returns:
+            (mission, path): structured array of MISSION_DTYPE and path of the cache entry.
+        """
+        path = self.get(params)
+        if path is not None:
+            try:
+                return columns_to_mission(open_trajectory_binary(path)), path
+            except (OSError, ValueError):
+                pass                    # entry evicted or damaged since the lookup: compile it again
+        mission = compile_mission(**{name: params[name] for name in MISSION_PARAMS})
+        return mission, self.put(params, mission)
+
+    def evict(self, keep=None):
+        """
+        Delete the least recently used entries until the cache holds at most max_bytes (never
+        `keep`), then the links to the deleted entries.
+        """
+        # Other processes may evict the same entries concurrently: a file that vanished is skipped
+        keep = None if keep is None else os.path.basename(keep)
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith(BINARY_EXTENSION):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_atime, stat.st_size, entry.name))
+        total = sum(size for _, size, _ in entries)
+        evicted = False
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            try:
+                os.remove(os.path.join(self.directory, name))
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            evicted = True
+            total -= size
+        if evicted:
+            self.prune_links()
+
+    def prune_links(self):
+        """Delete the links whose cache entry or trajectory file no longer exists."""
+        directory = os.path.join(self.directory, _LINKS)
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                with open(path) as file:
+                    link = json.load(file)
+                stale = not (os.path.exists(os.path.join(self.directory, link["entry"])) and os.path.exists(link["file"]))
+            except FileNotFoundError:
+                continue                # pruned by another process
+            except (OSError, ValueError, KeyError, TypeError):
+                stale = True            # damaged link
+            if stale:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def _link_path(self, output_file):
+        name = hashlib.sha256(os.path.realpath(output_file).encode()).hexdigest()
+        return os.path.join(self.directory, _LINKS, name + ".json")
+
+    def link_file(self, output_file, entry):
+        """Record that `output_file`, as it is now on disk, holds the mission of the cache entry `entry`."""
+        stat = os.stat(output_file)
+        link = {"file": os.path.realpath(output_file), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size,
+                "entry": os.path.basename(entry)}
+        path = self._link_path(output_file)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        def write(temporary):
+            with open(temporary, "w") as file:
+                json.dump(link, file)
+        _write_atomic(path, write)
+
+    def lookup_file(self, path):
+        """
+        Cache entry holding the mission of trajectory file `path`, or None when the file was not
+        written from the cache or changed since, or its entry was evicted.
+        """
+        try:
+            with open(self._link_path(path)) as file:
+                link = json.load(file)
+            stat = os.stat(path)
+        except (OSError, ValueError):
+            return None
+        if link.get("mtime_ns") != stat.st_mtime_ns or link.get("size") != stat.st_size:
+            return None
+        entry = os.path.join(self.directory, link["entry"])
+        with self._lock:
+            if self._touch(entry):
+                self.hits += 1
+                return entry
+        return None
+
+
+shared_generation_cache = GenerationCache()
+
+
+def compile_mission_cached(params):
+    """compile_mission(**params) through the process-wide cache, as (mission, cache entry path)."""
+    return shared_generation_cache.compile(params)
@@ -0,0 +1,102 @@
+"""
+End-to-end latency instrumentation for the detection -> yaw path.
+
+Each traced item (a video frame, a detection message) carries a dict of stage timestamps, all
+taken with time.time() so they can be compared across the tracker and offboard processes
+running on the same machine. A LatencyTrace turns them into per-stage durations (time between
+consecutive stages) and a total (first to last stage), keeps a window of recent values for
+p50/p95/p99, prints a summary periodically and can append every item to a JSON-lines trace file.
+
+Stages used in this repository:
+- tracker (interactive_tracker.py): capture -> pickup -> inference -> send
+- offboard (offboard_multiple_from_csv.py): capture -> inference -> send -> receive -> handled -> setpoint
+"""
+
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+
+TRACKER_STAGES = ("capture", "pickup", "inference", "send")
+OFFBOARD_STAGES = ("capture", "inference", "send", "receive", "handled", "setpoint")
+
+
+class LatencyTrace:
+    """
+    Rolling per-stage latency statistics.
+
+    Attributes:
+        name (str): Label used in the printed summaries
+        stages (tuple): Stage names, in the order they happen
+        count (int): Items recorded
+    """
+
+    def __init__(self, name, stages, window=1000, summary_interval=5.0, trace_file=None):
+        """
+        Args:
+            name (str): Label used in the printed summaries
+            stages (tuple): Stage names, in the order they happen
+            window (int, optional): Number of recent items used for the percentiles
+            summary_interval (float, optional): Seconds between printed summaries, None to disable
+            trace_file (str, optional): Path of a JSON-lines file receiving every recorded item
+        """
+        self.name = name
+        self.stages = tuple(stages)
+        self.summary_interval = summary_interval
+        self.count = 0
+        self._durations = {key: deque(maxlen=window) for key in self._keys()}
+        self._trace = open(trace_file, "a") if trace_file else None
+        self._last_summary = time.monotonic()
+
+    def _keys(self):
+        return [f"{a}->{b}" for a, b in zip(self.stages, self.stages[1:])] + ["total"]
+
+    def record(self, stamps, seq=None):
+        """
+        Record the stage timestamps of one item.
+
+        Stages missing from `stamps` (or None) are skipped: the next present stage is measured
+        from the previous present one and reported under that pair of stage names. The total is
+        only recorded when the first stage is present.
+        """
+        present = [(stage, stamps[stage]) for stage in self.stages if stamps.get(stage) is not None]
+        if len(present) < 2:
+            return
+
+        for (a, ta), (b, tb) in zip(present, present[1:]):
+            key = f"{a}->{b}"
+            if key not in self._durations:
+                self._durations[key] = deque(maxlen=self._durations["total"].maxlen)
+            self._durations[key].append(tb - ta)
+        if present[0][0] == self.stages[0]:
+            self._durations["total"].append(present[-1][1] - present[0][1])
+        self.count += 1
+
+        if self._trace is not None:
+            self._trace.write(json.dumps({"trace": self.name, "seq": seq, "stamps": dict(present)}) + "\n")
+
+        if self.summary_interval is not None and time.monotonic() - self._last_summary >= self.summary_interval:
+            self.print_summary()
+
+    def summary(self):
+        """{stage pair or "total": {"n", "p50", "p95", "p99"}} in seconds, over the recent window."""
+        result = {}
+        for key, values in self._durations.items():
+            if values:
+                p50, p95, p99 = np.percentile(np.fromiter(values, dtype=float), [50, 95, 99])
+                result[key] = {"n": len(values), "p50": p50, "p95": p95, "p99": p99}
+        return result
+
+    def print_summary(self):
+        self._last_summary = time.monotonic()
+        for key, s in self.summary().items():
+            print(f"⏱️ {self.name} {key}: n={s['n']} p50={s['p50'] * 1e3:.1f}ms p95={s['p95'] * 1e3:.1f}ms p99={s['p99'] * 1e3:.1f}ms")
+        if self._trace is not None:
+            self._trace.flush()
+
+    def close(self):
+        if self._trace is not None:
+            self._trace.close()
+            self._trace = None
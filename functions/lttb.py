@@ -0,0 +1,52 @@
+"""
+Largest-Triangle-Three-Buckets (LTTB) downsampling.
+
+LTTB keeps the first and last point and one point per bucket in between: the one forming the
+largest triangle with the point kept in the previous bucket and the average of the next bucket.
+Corners and extremes survive, straight or still stretches collapse, so a plot of a few hundred
+points looks like the plot of every sample. The triangle area is computed in any number of
+dimensions, so the points can be 3-D positions as well as (time, value) pairs.
+"""
+
+import numpy as np
+
+
+def lttb_indices(points, threshold):
+    """
+    Indices of the points kept by LTTB.
+
+    Args:
+        points (array_like): (N, D) points, in path order
+        threshold (int): Number of points to keep
+
+    Returns:
+        Sorted int array of min(threshold, N) indices (at least 2), including 0 and N - 1.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if points.ndim == 1:
+        points = points[:, None]
+    n = points.shape[0]
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        return np.array([0, n - 1])
+
+    # Buckets of the inner points: bucket i is rows edges[i]..edges[i + 1]
+    edges = (np.arange(threshold - 1) * (n - 2) / (threshold - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+    averages = np.add.reduceat(points[1:n - 1], edges[:-1] - 1) / np.diff(edges)[:, None]
+    averages = np.vstack([averages, points[-1:]])
+
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = points[0]
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Twice the triangle areas (a, candidate, next average): |u|²|v|² - (u.v)² = |u x v|² in any dimension
+        u = points[start:end] - a
+        v = averages[i + 1] - a
+        areas = np.einsum("ij,ij->i", u, u) * v.dot(v) - np.square(u.dot(v))
+        best = start + int(np.argmax(areas))
+        kept[i + 1] = best
+        a = points[best]
+    return kept
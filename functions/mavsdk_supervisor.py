@@ -0,0 +1,192 @@
+"""
+Startup supervision for a swarm: mavsdk_server pool, readiness probes and retries.
+
+- MavsdkServerPool starts one mavsdk_server per drone concurrently and probes its gRPC port until
+  it accepts connections (mavsdk_server only opens it once the vehicle has been discovered). A
+  server that exits or does not become ready in time is restarted up to max_restarts times.
+- first() and retry() bound every startup wait (connection, health, arm, offboard start) with a
+  timeout, retrying the commands PX4 may transiently reject.
+- ReadinessTracker records when each drone reaches each startup stage and reports the time it
+  took for all drones to reach it, in particular the time to "all drones in offboard".
+"""
+
+import asyncio
+import time
+
+
+STARTUP_STAGES = ("server", "connected", "healthy", "armed", "offboard")
+
+
+class MavsdkServerError(RuntimeError):
+    """A mavsdk_server could not be started or did not become ready."""
+
+
+class MavsdkServerPool:
+    """
+    One supervised mavsdk_server process per drone.
+
+    Attributes:
+        processes (dict): drone_id -> asyncio.subprocess.Process of the ready servers
+        errors (dict): drone_id -> MavsdkServerError of the servers that never became ready
+    """
+
+    def __init__(self, specs, server_path="./mavsdk_server", host="127.0.0.1", ready_timeout=30.0,
+                 probe_interval=0.05, max_restarts=2, readiness=None):
+        """
+        Args:
+            specs (list): DroneSpec of the drones (see functions/swarm_manifest.py)
+            server_path (str, optional): Path of the mavsdk_server binary
+            host (str, optional): Address the gRPC ports are probed on
+            ready_timeout (float, optional): Seconds a server gets to open its gRPC port
+            probe_interval (float, optional): Seconds between two connection attempts on the port
+            max_restarts (int, optional): Restarts of a server that exited or timed out
+            readiness (ReadinessTracker, optional): Receives the "server" stage of each drone
+        """
+        self.specs = specs
+        self.server_path = server_path
+        self.host = host
+        self.ready_timeout = ready_timeout
+        self.probe_interval = probe_interval
+        self.max_restarts = max_restarts
+        self.readiness = readiness
+        self.processes = {}
+        self.errors = {}
+
+    async def start(self):
+        """Start every server concurrently; returns the DroneSpec of the drones whose server is ready."""
+        await asyncio.gather(*(self._start_server(spec) for spec in self.specs))
+        return [spec for spec in self.specs if spec.drone_id in self.processes]
+
+    async def _start_server(self, spec):
+        for attempt in range(self.max_restarts + 1):
+            process = await asyncio.create_subprocess_exec(self.server_path, "-p", str(spec.grpc_port), f"udp://:{spec.udp_port}")
+            try:
+                await asyncio.wait_for(self._probe(process, spec.grpc_port), self.ready_timeout)
+            except (asyncio.TimeoutError, MavsdkServerError) as error:
+                print(f"⚠️ mavsdk_server of drone {spec.drone_id} not ready (attempt {attempt + 1}/{self.max_restarts + 1}): {str(error) or 'timeout'}")
+                await _terminate(process)
+                continue
+            self.processes[spec.drone_id] = process
+            if self.readiness is not None:
+                self.readiness.mark(spec.drone_id, "server")
+            return
+        self.errors[spec.drone_id] = MavsdkServerError(f"mavsdk_server on gRPC port {spec.grpc_port} did not become ready")
+
+    async def _probe(self, process, port):
+        while True:
+            if process.returncode is not None:
+                raise MavsdkServerError(f"exited with code {process.returncode}")
+            try:
+                _, writer = await asyncio.open_connection(self.host, port)
+            except OSError:
+                await asyncio.sleep(self.probe_interval)
+                continue
+            writer.close()
+            return
+
+    async def stop(self, timeout=5.0):
+        """SIGTERM every server, SIGKILL the ones still running after `timeout` seconds."""
+        await asyncio.gather(*(_terminate(process, timeout) for process in self.processes.values()))
+        self.processes = {}
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+
+async def _terminate(process, timeout=5.0):
+    if process.returncode is not None:
+        return
+    process.terminate()
+    try:
+        await asyncio.wait_for(process.wait(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+
+
+async def first(stream, predicate, timeout):
+    """First item of an async stream satisfying `predicate`, raising asyncio.TimeoutError after `timeout` seconds."""
+    async def wait():
+        async for item in stream:
+            if predicate(item):
+                return item
+    return await asyncio.wait_for(wait(), timeout)
+
+
+async def retry(operation, label, retry_on=(), attempts=3, timeout=10.0, backoff=0.5):
+    """
+    Await operation() with a timeout, retrying on timeouts and on the `retry_on` exceptions.
+
+    Args:
+        operation (callable): Coroutine function without arguments
+        label (str): Name of the operation in the printed warnings
+        retry_on (tuple, optional): Exception types worth retrying
+        attempts (int, optional): Maximum number of attempts
+        timeout (float, optional): Seconds allowed per attempt
+        backoff (float, optional): Pause before attempt n is backoff * (n - 1) seconds
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return await asyncio.wait_for(operation(), timeout)
+        except (asyncio.TimeoutError, *retry_on) as error:
+            if attempt == attempts:
+                raise
+            print(f"⚠️ {label} failed (attempt {attempt}/{attempts}): {str(error) or 'timeout'}")
+            await asyncio.sleep(backoff * attempt)
+
+
+class ReadinessTracker:
+    """
+    Time at which each drone reached each startup stage, relative to the creation of the tracker.
+
+    Attributes:
+        reached (dict): stage -> {drone_id: seconds}
+        all_reached (dict): stage -> seconds at which the last drone reached it
+    """
+
+    def __init__(self, drone_ids, stages=STARTUP_STAGES, clock=time.monotonic):
+        self.drone_ids = set(drone_ids)
+        self.stages = tuple(stages)
+        self.clock = clock
+        self.start = clock()
+        self.reached = {stage: {} for stage in self.stages}
+        self.all_reached = {}
+        self._all_events = {stage: asyncio.Event() for stage in self.stages}
+
+    def mark(self, drone_id, stage):
+        self.reached[stage][drone_id] = self.clock() - self.start
+        self._check(stage)
+
+    def discard(self, drone_id):
+        """Stop waiting for a drone that failed during startup."""
+        self.drone_ids.discard(drone_id)
+        for stage in self.stages:
+            self._check(stage)
+
+    def _check(self, stage):
+        if stage not in self.all_reached and self.drone_ids <= self.reached[stage].keys():
+            elapsed = self.clock() - self.start
+            self.all_reached[stage] = elapsed
+            self._all_events[stage].set()
+            if self.drone_ids:
+                print(f"⏱️ All {len(self.drone_ids)} drones {stage} after {elapsed:.2f} s")
+
+    async def wait_all(self, stage):
+        """Wait until every drone not discarded has reached `stage`."""
+        self._check(stage)
+        await self._all_events[stage].wait()
+
+    def summary(self):
+        """{stage: {"drones", "first", "last"}} in seconds since the start, for the stages reached by at least one drone."""
+        return {
+            stage: {"drones": len(times), "first": min(times.values()), "last": max(times.values())}
+            for stage, times in self.reached.items() if times
+        }
+
+    def print_summary(self):
+        for stage, s in self.summary().items():
+            print(f"⏱️ Startup {stage}: {s['drones']}/{len(self.drone_ids)} drones, first {s['first']:.2f} s, last {s['last']:.2f} s")
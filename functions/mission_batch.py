@@ -0,0 +1,273 @@
+"""
+Batch generation of the per-drone missions of a swarm show from a declarative spec.
+
+The spec is a JSON file:
+
+    {
+        "output_dir": "shapes/show",
+        "formats": ["csv", "traj"],
+        "swarm_manifest": "shapes/show/swarm.csv",
+        "plot": true,
+        "defaults": {"diameter": 20.0, "maneuver_time": 90.0, "climb_rate": 1.0, "step_time": 0.1},
+        "groups": [
+            {"name": "ring", "drone_ids": [0, 1, 2, 3], "shape_name": "circle", "direction": 1,
+             "start_x": 10, "start_y": 10, "initial_altitude": {"start": 15, "step": 0.5},
+             "time_offset": [0, 1, 2, 3]},
+            {"name": "box", "count": 2, "shape_name": "square", "direction": -1,
+             "offset_y": {"start": 0, "step": 4}, "role": "flyer"}
+        ]
+    }
+
+Every group lists its drones ("drone_ids", or "count" drones numbered after the previous group)
+and gives every parameter either once for the whole group (a value), per drone (a list with one
+value per drone) or as a progression over the drones of the group ({"start": a, "step": b}).
+Missing parameters come from "defaults", then from DEFAULT_PARAMS. The parameters are those of
+create_active_csv (MISSION_PARAMS) plus the swarm manifest columns (MANIFEST_PARAMS), which are
+written to "swarm_manifest" when it is given.
+
+Every drone gets its own mission files, output_dir/drone_<id>.<format> ("csv", "traj" for the
+binary format, "npz" for the piecewise format). The missions are generated in parallel over a
+process pool; drones with identical parameters are compiled once. A manifest in output_dir
+(BATCH_MANIFEST) records, per drone, the hash of its parameters, its formats and the generator
+source (generator_fingerprint): on a re-run the drones whose hash did not change and whose files
+are still there are skipped. With "plot", every generated mission (and every mission whose plot
+is missing) is also plotted headless next to its files, output_dir/drone_<id>.png, over the same
+number of processes (see plot_trajectories).
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from functions.export_and_plot_shape import plot_path_for, plot_trajectories
+from functions.generation_cache import GENERATOR_MODULES, MISSION_PARAMS, generator_fingerprint, normalize_param, shared_generation_cache
+from functions.mission_compiler import write_mission_csv
+from functions.piecewise_trajectory import fit_piecewise, write_piecewise
+from functions.trajectory_file import write_trajectory_binary
+from functions.swarm_manifest import ROLE_CAMERA, ROLE_FLYER, DroneSpec, write_swarm_manifest
+
+
+BATCH_MANIFEST = "batch_manifest.json"
+BATCH_MANIFEST_VERSION = 1
+
+MANIFEST_PARAMS = ("offset_x", "offset_y", "offset_z", "altitude_offset", "time_offset", "role", "udp_port", "grpc_port")
+
+# Same values as csvCreator.py; udp_port and grpc_port default to 14540 + id and 50040 + id
+DEFAULT_PARAMS = dict(
+    shape_name="circle", diameter=20.0, direction=1, maneuver_time=90.0, start_x=10.0, start_y=10.0,
+    initial_altitude=15.0, climb_rate=1.0, move_speed=2.0, hold_time=4.0, step_time=0.1,
+    offset_x=0.0, offset_y=0.0, offset_z=0.0, altitude_offset=0.0, time_offset=0.0, role=ROLE_FLYER,
+)
+FORMATS = ("csv", "traj", "npz")
+
+# Modules whose source decides the content of the generated files
+_BATCH_MODULES = GENERATOR_MODULES + ("piecewise_trajectory.py",)
+
+# One drone of the spec: its mission parameters (dict of MISSION_PARAMS), the hash of everything
+# that decides its files, and the DroneSpec of the swarm manifest
+BatchMission = namedtuple("BatchMission", ["drone_id", "group", "params", "digest", "outputs", "spec"])
+
+# generated / skipped: drone ids; elapsed: seconds; manifest_file: the swarm manifest, or None
+BatchResult = namedtuple("BatchResult", ["generated", "skipped", "elapsed", "manifest_file"])
+
+
+def mission_digest(params, formats, fingerprint):
+    """Content hash of a mission: canonical JSON of its parameters and formats, plus the generator fingerprint."""
+    canonical = json.dumps({"params": params, "formats": sorted(formats), "generator": fingerprint},
+                           sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _group_value(group, name, k, count, defaults):
+    """Value of parameter `name` for the k-th of the `count` drones of a group."""
+    value = group.get(name, defaults.get(name, DEFAULT_PARAMS.get(name)))
+    if isinstance(value, list):
+        if len(value) != count:
+            raise ValueError(f"Group {group.get('name')!r}: {name} has {len(value)} values for {count} drones")
+        return value[k]
+    if isinstance(value, dict):
+        return value.get("start", 0.0) + value.get("step", 0.0) * k
+    return value
+
+
+def expand_spec(spec, fingerprint=None):
+    """
+    Missions of every drone of a spec (see the module docstring).
+
+    Returns:
+        List of BatchMission, in group order.
+    """
+    output_dir = spec.get("output_dir", "shapes")
+    formats = tuple(spec.get("formats", ("csv", "traj")))
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown formats {sorted(unknown)}, expected some of {FORMATS}")
+    defaults = spec.get("defaults", {})
+    if fingerprint is None:
+        fingerprint = generator_fingerprint(_BATCH_MODULES)
+
+    missions = []
+    next_id = 0
+    for index, group in enumerate(spec.get("groups", [])):
+        name = group.get("name", f"group{index}")
+        unknown = set(group) - set(MISSION_PARAMS) - set(MANIFEST_PARAMS) - {"name", "drone_ids", "count"}
+        if unknown:
+            raise ValueError(f"Group {name!r}: unknown parameters {sorted(unknown)}")
+        drone_ids = group.get("drone_ids", list(range(next_id, next_id + group.get("count", 1))))
+        for k, drone_id in enumerate(drone_ids):
+            values = {param: _group_value(group, param, k, len(drone_ids), defaults)
+                      for param in MISSION_PARAMS + MANIFEST_PARAMS}
+            params = {param: normalize_param(param, values[param]) for param in MISSION_PARAMS}
+            if values["role"] not in (ROLE_CAMERA, ROLE_FLYER):
+                raise ValueError(f"Invalid role {values['role']!r} for drone {drone_id} in group {name!r}")
+            outputs = tuple(os.path.join(output_dir, f"drone_{drone_id}.{extension}") for extension in formats)
+            udp_port = 14540 + drone_id if values["udp_port"] is None else int(values["udp_port"])
+            grpc_port = 50040 + drone_id if values["grpc_port"] is None else int(values["grpc_port"])
+            drone_spec = DroneSpec(
+                drone_id, udp_port, grpc_port, outputs[0],
+                (float(values["offset_x"]), float(values["offset_y"]), float(values["offset_z"])),
+                float(values["altitude_offset"]), float(values["time_offset"]), str(values["role"]),
+            )
+            missions.append(BatchMission(drone_id, name, params, mission_digest(params, formats, fingerprint),
+                                         outputs, drone_spec))
+        next_id = max(drone_ids, default=next_id - 1) + 1
+
+    ids = [mission.drone_id for mission in missions]
+    if len(set(ids)) != len(ids):
+        raise ValueError("Duplicate drone_id in the spec")
+    return missions
+
+
+def _generate(params, output_sets):
+    """
+    Process pool job: compile one mission (through the generation cache, see
+    functions/generation_cache.py) and write it to every set of output files.
+
+    Returns:
+        (rows, seconds)
+    """
+    start = time.perf_counter()
+    mission, entry = shared_generation_cache.compile(params)
+    piecewise = None
+    first = output_sets[0]
+    for path in first:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if path.endswith(".csv"):
+            write_mission_csv(mission, path)
+            shared_generation_cache.link_file(path, entry)
+        elif path.endswith(".traj"):
+            # Written from the mission in memory: another process may evict the cache entry at any time
+            write_trajectory_binary(mission, path)
+        else:
+            piecewise = fit_piecewise(mission) if piecewise is None else piecewise
+            write_piecewise(piecewise, path)
+    # Drones with the same parameters get copies of the same files
+    for outputs in output_sets[1:]:
+        for source, path in zip(first, outputs):
+            shutil.copyfile(source, path)
+            if path.endswith(".csv"):
+                shared_generation_cache.link_file(path, entry)
+    return mission.size, time.perf_counter() - start
+
+
+def _read_batch_manifest(path):
+    try:
+        with open(path) as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != BATCH_MANIFEST_VERSION:
+        return {}
+    return manifest.get("missions", {})
+
+
+def _write_batch_manifest(path, missions):
+    temporary = path + ".tmp"
+    with open(temporary, "w") as file:
+        json.dump({"version": BATCH_MANIFEST_VERSION, "missions": missions}, file, indent=1, sort_keys=True)
+    os.replace(temporary, path)
+
+
+def _up_to_date(entry, mission):
+    """True if the batch manifest entry of a drone matches its hash and its files are all still there, unchanged in size."""
+    if entry is None or entry.get("digest") != mission.digest:
+        return False
+    sizes = entry.get("sizes", {})
+    return all(os.path.exists(path) and os.path.getsize(path) == sizes.get(path) for path in mission.outputs)
+
+
+def generate_batch(spec, max_workers=None, force=False, verbose=True):
+    """
+    Generate the missions of a spec, skipping the ones that are up to date.
+
+    Args:
+        spec (dict or str): Spec (see the module docstring) or path of its JSON file
+        max_workers (int, optional): Processes of the pool, defaults to the number of CPUs
+        force (bool, optional): Regenerate every mission
+        verbose (bool, optional): Print one line per generated mission and a summary
+
+    Returns:
+        A BatchResult.
+    """
+    start = time.perf_counter()
+    if isinstance(spec, str):
+        with open(spec) as file:
+            spec = json.load(file)
+    missions = expand_spec(spec)
+    output_dir = spec.get("output_dir", "shapes")
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, BATCH_MANIFEST)
+    entries = _read_batch_manifest(manifest_path)
+
+    stale = [mission for mission in missions if force or not _up_to_date(entries.get(str(mission.drone_id)), mission)]
+    stale_ids = {mission.drone_id for mission in stale}
+    skipped = [mission.drone_id for mission in missions if mission.drone_id not in stale_ids]
+
+    # One job per distinct mission, every drone flying it gets a copy
+    jobs = {}
+    for mission in stale:
+        jobs.setdefault(mission.digest, []).append(mission)
+
+    if jobs:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {digest: pool.submit(_generate, group[0].params, [mission.outputs for mission in group])
+                       for digest, group in jobs.items()}
+            for digest, future in futures.items():
+                rows, seconds = future.result()
+                for mission in jobs[digest]:
+                    entries[str(mission.drone_id)] = {
+                        "digest": mission.digest,
+                        "group": mission.group,
+                        "params": mission.params,
+                        "sizes": {path: os.path.getsize(path) for path in mission.outputs},
+                    }
+                    if verbose:
+                        print(f"Created {', '.join(mission.outputs)} ({mission.params['shape_name']}, {rows} rows, {seconds:.2f} s)")
+
+    # Drones no longer in the spec are dropped from the manifest, their files are left in place
+    drone_ids = {str(mission.drone_id) for mission in missions}
+    entries = {key: entry for key, entry in entries.items() if key in drone_ids}
+    _write_batch_manifest(manifest_path, entries)
+
+    if spec.get("plot"):
+        to_plot = [mission.outputs[0] for mission in missions
+                   if mission.drone_id in stale_ids or not os.path.exists(plot_path_for(mission.outputs[0]))]
+        plot_trajectories(to_plot, max_workers=max_workers)
+        if verbose and to_plot:
+            print(f"Plotted {len(to_plot)} missions")
+
+    manifest_file = spec.get("swarm_manifest")
+    if manifest_file:
+        write_swarm_manifest([mission.spec for mission in missions], manifest_file)
+
+    result = BatchResult([mission.drone_id for mission in stale], skipped, time.perf_counter() - start, manifest_file)
+    if verbose:
+        print(f"{len(result.generated)} missions generated ({len(jobs)} distinct), {len(result.skipped)} up to date, "
+              f"in {result.elapsed:.2f} s")
+        if manifest_file:
+            print(f"Swarm manifest: {manifest_file}")
+    return result
@@ -0,0 +1,59 @@
+"""
+Swarm-wide mission clock.
+
+All drones fly on one timeline: mission time 0 is a single instant on the monotonic clock,
+chosen once every drone is ready (the start barrier), and drone i starts its trajectory at
+mission time offset_i. CLOCK_MONOTONIC is shared by all the processes of a machine, so the
+instant picked by swarm_orchestrator.py is valid in every worker process.
+
+A drone that becomes ready after the start joins the timeline at the current mission time
+instead of replaying its trajectory from t = 0 (see DeadlineScheduler.ticks).
+"""
+
+import asyncio
+import time
+
+
+class MissionClock:
+    """
+    Mission timeline on a monotonic clock.
+
+    Attributes:
+        start (float): Clock time of mission time 0, None until the start barrier is released
+    """
+
+    def __init__(self, clock=time.monotonic):
+        """
+        Args:
+            clock (callable, optional): Monotonic clock returning seconds
+        """
+        self.clock = clock
+        self.start = None
+        self._started = asyncio.Event()
+
+    def set_start(self, start):
+        """Release the start barrier: mission time 0 is clock time `start` (may be in the future)."""
+        if self.start is not None:
+            raise RuntimeError("Mission clock already started")
+        self.start = start
+        self._started.set()
+
+    def start_in(self, delay):
+        """Release the start barrier with mission time 0 `delay` seconds from now."""
+        self.set_start(self.clock() + delay)
+
+    @property
+    def started(self):
+        return self.start is not None
+
+    async def wait_started(self):
+        """Wait for the start barrier to be released."""
+        await self._started.wait()
+
+    def drone_start(self, offset=0.0):
+        """Clock time at which a drone with a scheduled offset starts its trajectory."""
+        return self.start + offset
+
+    def mission_time(self, offset=0.0):
+        """Current time on the trajectory of a drone with a scheduled offset (negative before its start)."""
+        return self.clock() - self.start - offset
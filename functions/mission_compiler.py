@@ -0,0 +1,217 @@
+"""
+Segment-based mission compiler.
+
+A mission is built as a sequence of flight phases (climb, hold, move to start, ...). Each phase is
+filled as one preallocated NumPy block, the blocks are joined once, and the resulting structured
+array is handed to a writer (see write_mission_csv). The row index and the phase start times are
+derived from the blocks themselves, so no hand-summed step offsets are needed.
+
+Flight Modes and Codes:
+- 10: Initial climbing state
+- 20: Initial holding after climb
+- 30: Moving to start point
+- 40: Holding at start point
+- 50: Moving to maneuvering start point
+- 60: Holding at maneuver start point
+- 70: Maneuvering (trajectory)
+- 80: Holding at the end of the trajectory coordinate
+- 90: Returning to home coordinate
+
+compile_transition builds the segment flown before resuming a mission mid-way (mode 5), see
+functions/mission_resume.py.
+"""
+
+import csv
+import math
+
+import numpy as np
+
+from functions.trajectories import map_shape_to_code
+
+
+MODE_CLIMB = 10
+MODE_HOLD_AFTER_CLIMB = 20
+MODE_MOVE_TO_START = 30
+MODE_HOLD_AT_START = 40
+MODE_MOVE_TO_MANEUVER = 50
+MODE_HOLD_AT_MANEUVER = 60
+MODE_MANEUVER = 70
+MODE_HOLD_AT_END = 80
+MODE_RETURN = 90
+MODE_TRANSITION = 5
+
+MODE_DESCRIPTIONS = {
+    0: "On the ground",
+    5: "Transition to the resume point",
+    10: "Initial climbing state",
+    20: "Initial holding after climb",
+    30: "Moving to start point",
+    40: "Holding at start point",
+    50: "Moving to maneuvering start point",
+    60: "Holding at maneuver start point",
+    70: "Maneuvering (trajectory)",
+    80: "Holding at the end of the trajectory coordinate",
+    90: "Returning to home coordinate",
+    100: "Landing"
+}
+
+# One row per sample, in the same column order as the CSV export (without the LED columns)
+MISSION_DTYPE = np.dtype([
+    ("idx", np.int64), ("t", np.float64),
+    ("px", np.float64), ("py", np.float64), ("pz", np.float64),
+    ("vx", np.float64), ("vy", np.float64), ("vz", np.float64),
+    ("ax", np.float64), ("ay", np.float64), ("az", np.float64),
+    ("yaw", np.float64), ("mode", np.int64),
+])
+
+CSV_HEADER = ["idx", "t", "px", "py", "pz", "vx", "vy", "vz", "ax", "ay", "az", "yaw", "mode", "ledr", "ledg", "ledb"]
+
+
+def _phase_block(steps, mode, start_time, step_time):
+    """
+    Allocate the block of a phase with its time and mode columns filled in.
+    All the other columns start at zero.
+    """
+    block = np.zeros(max(steps, 0), dtype=MISSION_DTYPE)
+    block["t"] = start_time + np.arange(block.size) * step_time
+    block["mode"] = mode
+    return block
+
+
+def _hold(steps, mode, start_time, step_time, position):
+    """Phase that keeps the drone still at `position` (x, y, z)."""
+    block = _phase_block(steps, mode, start_time, step_time)
+    block["px"], block["py"], block["pz"] = position
+    return block
+
+
+def _linear_move(steps, mode, start_time, step_time, start, end, duration):
+    """Phase that moves the drone in a straight line from `start` to `end` at constant velocity in `duration` seconds."""
+    block = _phase_block(steps, mode, start_time, step_time)
+    if block.size == 0:
+        return block
+
+    ratio = np.arange(block.size) / block.size
+    for axis, (p0, p1) in enumerate(zip(start, end)):
+        block["p" + "xyz"[axis]] = p0 + (p1 - p0) * ratio
+        block["v" + "xyz"[axis]] = (p1 - p0) / duration
+    return block
+
+
+def compile_mission(shape_name, diameter, direction, maneuver_time, start_x, start_y, initial_altitude, climb_rate, move_speed, hold_time, step_time):
+    """
+    Build the full mission of a shape as a structured array of MISSION_DTYPE.
+
+    Args:
+    Same parameters as create_active_csv, without the output file.
+
+    Returns:
+    A NumPy structured array with one row per sample, ready to be passed to a writer.
+    """
+    shape_code, shape_fcn, shape_args = map_shape_to_code(shape_name)
+    altitude = -1 * initial_altitude
+    phases = []
+    phase_start = 0.0
+
+    def add(block, duration):
+        nonlocal phase_start
+        phases.append(block)
+        phase_start += duration
+
+    # Climb to the initial altitude
+    climb_time = initial_altitude / climb_rate
+    climb = _phase_block(int(climb_time / step_time), MODE_CLIMB, phase_start, step_time)
+    climb["pz"] = (climb_rate * climb["t"]) * -1
+    climb["vz"] = -climb_rate
+    add(climb, climb_time)
+
+    hold_steps = int(hold_time / step_time)
+    add(_hold(hold_steps, MODE_HOLD_AFTER_CLIMB, phase_start, step_time, (0, 0, altitude)), hold_time)
+
+    # Move to start position and hold it
+    move_start_time = math.sqrt(start_x**2 + start_y**2) / move_speed
+    add(_linear_move(int(move_start_time / step_time), MODE_MOVE_TO_START, phase_start, step_time,
+                     (0, 0, altitude), (start_x, start_y, altitude), move_start_time), move_start_time)
+    add(_hold(hold_steps, MODE_HOLD_AT_START, phase_start, step_time, (start_x, start_y, altitude)), hold_time)
+
+    # Move to the first setpoint of the maneuver if it differs from the start position
+    maneuver_start_x, maneuver_start_y = shape_fcn(0, maneuver_time, diameter, direction, initial_altitude, step_time, *shape_args)[:2]
+    if maneuver_start_x != 0 or maneuver_start_y != 0:
+        maneuver_start = (start_x + maneuver_start_x, start_y + maneuver_start_y, altitude)
+        move_time = math.sqrt(maneuver_start_x**2 + maneuver_start_y**2) / move_speed
+        add(_linear_move(int(move_time / step_time), MODE_MOVE_TO_MANEUVER, phase_start, step_time,
+                         (start_x, start_y, altitude), maneuver_start, move_time), move_time)
+        add(_hold(hold_steps, MODE_HOLD_AT_MANEUVER, phase_start, step_time, maneuver_start), hold_time)
+
+    # Fly the shape trajectory, all samples evaluated in one call
+    maneuver = _phase_block(int(maneuver_time / step_time), MODE_MANEUVER, phase_start, step_time)
+    samples = shape_fcn(np.arange(maneuver.size), maneuver_time, diameter, direction, initial_altitude, step_time, *shape_args)
+    for axis, name in enumerate("xyz"):
+        maneuver["p" + name] = samples.positions[:, axis]
+        maneuver["v" + name] = samples.velocities[:, axis]
+        maneuver["a" + name] = samples.accelerations[:, axis]
+    maneuver["px"] += start_x
+    maneuver["py"] += start_y
+    add(maneuver, maneuver_time)
+
+    # Hold at the last maneuver setpoint, then return to (0, 0, -initial_altitude)
+    if maneuver.size:
+        last = (maneuver["px"][-1], maneuver["py"][-1], maneuver["pz"][-1])
+    else:
+        last = (start_x + maneuver_start_x, start_y + maneuver_start_y, altitude)
+    add(_hold(hold_steps, MODE_HOLD_AT_END, phase_start, step_time, last), hold_time)
+
+    home = (0, 0, altitude)
+    return_time = math.dist(last, home) / move_speed
+    add(_linear_move(int(return_time / step_time), MODE_RETURN, phase_start, step_time, last, home, return_time), return_time)
+
+    mission = np.concatenate(phases)
+    mission["idx"] = np.arange(mission.size)
+    return mission
+
+
+def compile_transition(start, end, yaw, move_speed, climb_rate, step_time, min_duration=0.0):
+    """
+    Build the segment that takes a drone from `start` to `end`, both (x, y, z) NED positions.
+
+    The drone first climbs or descends vertically to the altitude of `end` at climb_rate, then
+    flies in a straight line at move_speed, then holds at `end` until min_duration has elapsed
+    (e.g. to give every drone of a swarm the same transition time). All rows have mode
+    MODE_TRANSITION and the given yaw.
+
+    Returns:
+        (segment, duration): structured array of MISSION_DTYPE starting at t=0, and the time at
+        which the drone is at `end` and the mission can continue.
+    """
+    phases = []
+    phase_start = 0.0
+
+    def add(block, duration):
+        nonlocal phase_start
+        phases.append(block)
+        phase_start += duration
+
+    corner = (start[0], start[1], end[2])
+    climb_time = abs(end[2] - start[2]) / climb_rate
+    add(_linear_move(int(climb_time / step_time), MODE_TRANSITION, phase_start, step_time, start, corner, climb_time), climb_time)
+    move_time = math.dist(corner, end) / move_speed
+    add(_linear_move(int(move_time / step_time), MODE_TRANSITION, phase_start, step_time, corner, end, move_time), move_time)
+    hold_time = max(min_duration - phase_start, 0.0)
+    add(_hold(int(math.ceil(hold_time / step_time)), MODE_TRANSITION, phase_start, step_time, end), hold_time)
+
+    segment = np.concatenate(phases)
+    segment["yaw"] = yaw
+    segment["idx"] = np.arange(segment.size)
+    return segment, phase_start
+
+
+def write_mission_csv(mission, output_file):
+    """
+    Write a compiled mission to a CSV file with the columns of CSV_HEADER.
+    The LED columns are not used by the missions and are written as "nan".
+    """
+    led = ("nan", "nan", "nan")
+    with open(output_file, mode="w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(CSV_HEADER)
+        writer.writerows(row + led for row in mission.tolist())
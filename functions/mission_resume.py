@@ -0,0 +1,74 @@
+"""
+Resume a mission mid-way, from a phase or a mission time.
+
+After an aborted run the mission does not have to be replayed from the climb: resume_time looks
+up where to resume in the phase index of the trajectory (see build_phase_index), and
+resume_trajectory_table builds the trajectory to fly from the drone's current position, made of:
+- a transition segment (mode 5, see compile_transition) from the current position to the
+  trajectory position at the resume time
+- the rest of the mission from the resume time, shifted to start at the end of the transition
+
+Positions passed here are in the frame of the trajectory file, i.e. without the per-drone offset
+applied by TrajectoryPlayer.
+"""
+
+import numpy as np
+
+from functions.mission_compiler import compile_transition
+from functions.trajectory_player import PLAYER_COLUMNS, build_trajectory_table, find_phase
+
+
+def resume_time(table, phase=None, time=None):
+    """
+    Mission time at which to resume a trajectory.
+
+    Args:
+        table (TrajectoryTable): Trajectory to resume
+        phase (int, optional): Mode code of the phase to resume at the start of
+        time (float, optional): Mission time to resume at; with `phase`, the time relative to the
+            start of that phase
+
+    Returns:
+        The resume time, clamped to the trajectory.
+    """
+    start = float(table.times[0])
+    if phase is not None:
+        found = find_phase(table.phases, phase)
+        if found is None:
+            raise ValueError(f"Trajectory has no phase with mode {phase}, phases: {[p.mode for p in table.phases]}")
+        start = found.start_time
+    return min(max(start + (time or 0.0), float(table.times[0])), float(table.times[-1]))
+
+
+def resume_trajectory_table(table, resume_at, position, move_speed=2.0, climb_rate=1.0, step_time=0.1, min_transition=0.0):
+    """
+    Trajectory that flies from `position` to the trajectory at `resume_at`, then the rest of it.
+
+    Args:
+        table (TrajectoryTable): Trajectory to resume
+        resume_at (float): Mission time to resume at (see resume_time)
+        position (tuple): Current (x, y, z) NED position of the drone, in the trajectory frame
+        move_speed (float, optional): Horizontal speed of the transition, in m/s
+        climb_rate (float, optional): Vertical speed of the transition, in m/s
+        step_time (float, optional): Sample period of the transition segment
+        min_transition (float, optional): Shortest transition, the drone holds at the resume point
+            until then
+
+    Returns:
+        (table, transition): the new TrajectoryTable, starting at t=0, and the duration of the
+        transition, i.e. the time of the new table at which the mission continues.
+    """
+    times = table.times
+    resume_row = np.array([np.interp(resume_at, times, table.values[:, k]) for k in range(len(PLAYER_COLUMNS))])
+    resume_mode = table.modes[max(int(np.searchsorted(times, resume_at, side="right")) - 1, 0)]
+
+    segment, transition = compile_transition(tuple(position), tuple(resume_row[:3]), resume_row[9], move_speed,
+                                             climb_rate, step_time, min_transition)
+
+    # Rest of the mission: the state at resume_at, then every later sample, shifted by the transition
+    tail = np.flatnonzero(times > resume_at)
+    columns = {"t": np.r_[segment["t"], transition, times[tail] - resume_at + transition],
+               "mode": np.r_[segment["mode"], resume_mode, table.modes[tail]]}
+    for k, name in enumerate(PLAYER_COLUMNS):
+        columns[name] = np.r_[segment[name], resume_row[k], table.values[tail, k]]
+    return build_trajectory_table(columns), transition
@@ -0,0 +1,247 @@
+"""
+Piecewise-polynomial trajectories, evaluated on demand at any time.
+
+A dense mission stores one row every step_time, with velocity and acceleration columns that
+repeat what the positions already say, and hundreds of identical rows in the hold phases. A
+piecewise trajectory only keeps knots: the state (position, velocity and acceleration of x, y, z
+and yaw) at a few sample times. Between two knots the trajectory is the quintic Hermite
+polynomial matching both states, so the position, velocity and acceleration returned by the
+player are derivatives of one another, and continuous at the knots.
+
+fit_piecewise places a knot at the start of every phase and at the last sample, then splits
+every segment at its middle sample until the polynomial stays within the tolerances of every
+sample it replaces. Constant and linear phases (holds, moves) end up as a single segment. The
+velocity and acceleration of the samples are derived from their positions (second-order finite
+differences within each phase) rather than read from the velocity and acceleration columns,
+which do not match the positions for every shape of functions/trajectories.py. The knot yaw is
+unwrapped (continuous across ±180°) and the player wraps it back to [-180, 180).
+
+File format (".npz", written with numpy.savez_compressed): "times" (K,) knot times, "states"
+(K, 12) knot states in the order of STATE_COLUMNS, "modes" (K,) mode of the segment starting at
+each knot, "version".
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from functions.bearing_filter import unwrap_degrees, wrap_degrees
+from functions.trajectory_player import PLAYER_COLUMNS, TrajectoryPlayer, TrajectorySample, build_phase_index, build_trajectory_table
+
+
+PIECEWISE_EXTENSION = ".npz"
+PIECEWISE_VERSION = 1
+
+# Knot state: position, velocity and acceleration of x, y, z and yaw (degrees)
+STATE_COLUMNS = ("px", "py", "pz", "yaw", "vx", "vy", "vz", "yaw_rate", "ax", "ay", "az", "yaw_acceleration")
+
+# Read-only knot arrays shared by every player: times (K,), states (K, 12), modes (K,), the phase
+# index over the knots (see build_phase_index) and the (K - 1, 6, 4) monomial coefficients of
+# the segments, for x, y, z and yaw, in powers of the time since the start of the segment
+PiecewiseTable = namedtuple("PiecewiseTable", ["times", "states", "modes", "phases", "coefficients"])
+
+
+def _hermite_coefficients(t0, t1, s0, s1):
+    """
+    Monomial coefficients of the quintic Hermite segments between knot states s0 and s1.
+
+    Args:
+        t0, t1 (ndarray): (M,) start and end time of every segment
+        s0, s1 (ndarray): (M, 12) states at both ends, in the order of STATE_COLUMNS
+
+    Returns:
+        (M, 6, 4) array: c[:, k, channel] multiplies (t - t0)**k.
+    """
+    h = (t1 - t0)[:, None]
+    p0, v0, a0 = s0[:, 0:4], s0[:, 4:8], s0[:, 8:12]
+    p1, v1, a1 = s1[:, 0:4], s1[:, 4:8], s1[:, 8:12]
+    d = p1 - p0 - v0 * h - a0 * h ** 2 / 2
+    e = v1 - v0 - a0 * h
+    f = a1 - a0
+    return np.stack([
+        p0,
+        v0,
+        a0 / 2,
+        (10 * d - 4 * e * h + f * h ** 2 / 2) / h ** 3,
+        (-15 * d + 7 * e * h - f * h ** 2) / h ** 4,
+        (6 * d - 3 * e * h + f * h ** 2 / 2) / h ** 5,
+    ], axis=1)
+
+
+def _evaluate(coefficients, dt):
+    """(position, velocity, acceleration), each (M, 4), of segments with (M, 6, 4) coefficients at times dt (M,) into them."""
+    c = coefficients
+    dt = dt[:, None]
+    position = c[:, 0] + dt * (c[:, 1] + dt * (c[:, 2] + dt * (c[:, 3] + dt * (c[:, 4] + dt * c[:, 5]))))
+    velocity = c[:, 1] + dt * (2 * c[:, 2] + dt * (3 * c[:, 3] + dt * (4 * c[:, 4] + dt * 5 * c[:, 5])))
+    acceleration = 2 * c[:, 2] + dt * (6 * c[:, 3] + dt * (12 * c[:, 4] + dt * 20 * c[:, 5]))
+    return position, velocity, acceleration
+
+
+def build_piecewise_table(times, states, modes):
+    """
+    Prepare knots for playback.
+
+    Returns:
+        A PiecewiseTable whose arrays are marked read-only so it can be shared between players.
+    """
+    times = np.array(times, dtype=np.float64)
+    states = np.array(states, dtype=np.float64).reshape(-1, len(STATE_COLUMNS))
+    modes = np.array(modes)
+    if times.size == 0:
+        raise ValueError("Cannot play an empty trajectory")
+    if np.any(np.diff(times) <= 0):
+        raise ValueError("Knot times must be strictly increasing")
+    coefficients = _hermite_coefficients(times[:-1], times[1:], states[:-1], states[1:])
+    for array in (times, states, modes, coefficients):
+        array.flags.writeable = False
+    return PiecewiseTable(times, states, modes, build_phase_index(times, modes), coefficients)
+
+
+def fit_piecewise(mission, tolerance=0.01, velocity_tolerance=0.05, yaw_tolerance=0.5):
+    """
+    Fit a dense mission with quintic Hermite segments.
+
+    Args:
+        mission (mapping): Columns "t", PLAYER_COLUMNS and "mode", e.g. the result of
+            compile_mission or load_trajectory
+        tolerance (float, optional): Largest position error at any sample, in meters
+        velocity_tolerance (float, optional): Largest velocity error at any sample, in m/s
+        yaw_tolerance (float, optional): Largest yaw error at any sample, in degrees
+
+    Returns:
+        A PiecewiseTable with a knot at the start of every phase and at the last sample.
+    """
+    dense = build_trajectory_table(mission)
+    times, values, modes = dense.times, dense.values, dense.modes
+    keep = np.r_[True, np.diff(times) > 0]              # knots need strictly increasing times
+    times, values, modes = times[keep], values[keep], modes[keep]
+    positions = values[:, [PLAYER_COLUMNS.index(name) for name in ("px", "py", "pz", "yaw")]]
+    positions[:, 3] = unwrap_degrees(positions[:, 3])  # continuous yaw: the polynomials follow the shortest arc
+
+    # Velocity and acceleration of every sample from the positions, separately in every phase
+    velocities = np.zeros_like(positions)
+    accelerations = np.zeros_like(positions)
+    phases = build_phase_index(times, modes)
+    for phase in phases:
+        rows = slice(phase.start_row, phase.end_row)
+        if phase.end_row - phase.start_row >= 3:
+            velocities[rows] = np.gradient(positions[rows], times[rows], axis=0, edge_order=2)
+            accelerations[rows] = np.gradient(velocities[rows], times[rows], axis=0, edge_order=2)
+        elif phase.end_row - phase.start_row == 2:
+            velocities[rows] = np.diff(positions[rows], axis=0) / np.diff(times[rows])[:, None]
+    states = np.column_stack([positions, velocities, accelerations])
+
+    bounds = sorted({phase.start_row for phase in phases} | {times.size - 1})
+    pending = list(zip(bounds[:-1], bounds[1:]))
+    knots = set(bounds)
+    while pending:
+        a, b = pending.pop()
+        if b - a < 2:
+            continue
+        inner = np.arange(a + 1, b)
+        coefficients = _hermite_coefficients(times[a:a + 1], times[b:b + 1], states[a:a + 1], states[b:b + 1])
+        position, velocity, _ = _evaluate(np.repeat(coefficients, inner.size, axis=0), times[inner] - times[a])
+        position_error = np.linalg.norm(position[:, :3] - states[inner, 0:3], axis=1).max()
+        velocity_error = np.linalg.norm(velocity[:, :3] - states[inner, 4:7], axis=1).max()
+        yaw_error = np.abs(position[:, 3] - states[inner, 3]).max()
+        if position_error > tolerance or velocity_error > velocity_tolerance or yaw_error > yaw_tolerance:
+            middle = (a + b) // 2
+            knots.add(middle)
+            pending += [(a, middle), (middle, b)]
+
+    rows = np.array(sorted(knots))
+    return build_piecewise_table(times[rows], states[rows], modes[rows])
+
+
+def write_piecewise(table, output_file):
+    """Write a PiecewiseTable to a compressed .npz file."""
+    with open(output_file, "wb") as file:
+        np.savez_compressed(file, version=PIECEWISE_VERSION, times=table.times, states=table.states, modes=table.modes)
+
+
+def load_piecewise(path):
+    """Read a piecewise trajectory file written by write_piecewise, as a PiecewiseTable."""
+    with np.load(path) as data:
+        if int(data["version"]) != PIECEWISE_VERSION:
+            raise ValueError(f"Unsupported piecewise trajectory version {int(data['version'])} in {path}")
+        return build_piecewise_table(data["times"], data["states"], data["modes"])
+
+
+def piecewise_to_trajectory_table(table, step_time):
+    """Dense TrajectoryTable sampled every step_time, for the code that works on samples (resume, deconfliction)."""
+    times = np.r_[np.arange(table.times[0], table.times[-1], step_time), table.times[-1]]
+    values, modes = PiecewisePlayer(table).sample_many(times)
+    columns = {name: values[:, k] for k, name in enumerate(PLAYER_COLUMNS)}
+    columns["t"], columns["mode"] = times, modes
+    return build_trajectory_table(columns)
+
+
+class PiecewisePlayer(TrajectoryPlayer):
+    """
+    Player of a PiecewiseTable, with the interface of TrajectoryPlayer.
+
+    Attributes:
+        times (ndarray): Knot times, in seconds
+        values (ndarray): (K, 12) knot states in the order of STATE_COLUMNS
+        modes (ndarray): Mode of the segment starting at every knot
+        phases (tuple): Phase index over the knots
+        offset (tuple): (x, y, z) offset added to every position
+    """
+
+    def __init__(self, trajectory, offset=(0.0, 0.0, 0.0)):
+        """
+        Args:
+            trajectory (PiecewiseTable): Shared table (see fit_piecewise and load_piecewise)
+            offset (tuple, optional): (x, y, z) position offset
+        """
+        self.times, self.values, self.modes, self.phases, self.coefficients = trajectory
+        self.offset = tuple(float(o) for o in offset)
+        self._cursor = 0
+        # Python lists: sample() is called once per tick and indexing NumPy scalars costs more than the polynomial
+        self._segments = self.coefficients.tolist()
+        self._knot_times = self.times.tolist()
+        self._knot_modes = self.modes.tolist()
+
+    def sample(self, t):
+        """
+        Trajectory state at mission time t, evaluated from its segment.
+
+        Before the first knot the first knot state is returned, after the last knot the last one.
+        """
+        i = self.index_at(t)
+        if self.times.size == 1:
+            row = self.values[0].tolist()
+            p, v, a = row[0:4], row[4:8], row[8:12]
+        else:
+            s = min(i, len(self._knot_times) - 2)
+            t0 = self._knot_times[s]
+            dt = min(max(t - t0, 0.0), self._knot_times[s + 1] - t0)
+            c0, c1, c2, c3, c4, c5 = self._segments[s]
+            p = [c0[k] + dt * (c1[k] + dt * (c2[k] + dt * (c3[k] + dt * (c4[k] + dt * c5[k])))) for k in range(4)]
+            v = [c1[k] + dt * (2 * c2[k] + dt * (3 * c3[k] + dt * (4 * c4[k] + dt * 5 * c5[k]))) for k in range(4)]
+            a = [2 * c2[k] + dt * (6 * c3[k] + dt * (12 * c4[k] + dt * 20 * c5[k])) for k in range(4)]
+
+        ox, oy, oz = self.offset
+        return TrajectorySample(t, (p[0] + ox, p[1] + oy, p[2] + oz), (v[0], v[1], v[2]), (a[0], a[1], a[2]),
+                                wrap_degrees(p[3]), int(self._knot_modes[i]))
+
+    def sample_many(self, query_times):
+        """
+        Vectorized lookup for an array of mission times.
+
+        Returns:
+            (values, modes): (M, 10) array of the PLAYER_COLUMNS (offset applied) and the mode of
+            every query time.
+        """
+        query_times = np.asarray(query_times, dtype=np.float64)
+        indices = np.clip(np.searchsorted(self.times, query_times, side="right") - 1, 0, self.times.size - 1)
+        if self.times.size == 1:
+            state = np.repeat(self.values[:1], query_times.size, axis=0)
+            p, v, a = state[:, 0:4], state[:, 4:8], state[:, 8:12]
+        else:
+            segments = np.minimum(indices, self.times.size - 2)
+            dt = np.clip(query_times - self.times[segments], 0.0, self.times[segments + 1] - self.times[segments])
+            p, v, a = _evaluate(self.coefficients[segments], dt)
+        values = np.column_stack([p[:, :3] + self.offset, v[:, :3], a[:, :3], wrap_degrees(p[:, 3])])
+        return values, self.modes[indices]
@@ -0,0 +1,265 @@
+"""
+Live minimum-separation monitor of a swarm.
+
+At every tick the SeparationMonitor reads the latest global position of every airborne drone
+from the telemetry stores (see functions/telemetry_store.py), projects them to a common local
+NED frame and finds the pairs closer than min_separation with the spatial hash grid of
+functions/spatial_grid.py, in near-linear time instead of comparing every pair.
+
+Every new violating pair is reported once, with its distance. With a hold policy one drone of
+each violating pair is held (run_drone pauses its trajectory and keeps its position) until no
+drone is within release_ratio * min_separation of it any more, while the other keeps flying and
+clears the conflict:
+- HOLD_CLOSING holds the drone that is closing on the other, the one whose velocity (from the
+  velocity_ned telemetry) points the most towards the other drone; a pair that is already
+  moving apart (relative velocity . relative position >= 0) holds nobody
+- HOLD_HIGHER_ID holds the drone with the higher id, however the drones move. It is only safe
+  when the lower id leads (e.g. drones following each other in id order on the same path): if
+  the lower id is the one closing in, the hold parks the other drone in its path.
+
+Holds never wait on each other: a pair with a drone already held holds nobody else (HOLD_CLOSING),
+only a drone that is not held keeps a held drone held, and a drone held for max_hold_time is
+released and not held again until it is clear of every other drone. Head-on, the drone closing
+the fastest is held and the other keeps flying.
+"""
+
+import asyncio
+import math
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from functions.spatial_grid import find_close_pairs
+from functions.tick_scheduler import DeadlineScheduler, LatencyHistogram, POLICY_SKIP
+
+
+# Pair of drones closer than the minimum separation; time is on the monitor's clock
+Violation = namedtuple("Violation", ["drone_a", "drone_b", "distance", "time"])
+
+HOLD_NONE = "none"              # only report the violations
+HOLD_HIGHER_ID = "higher_id"    # hold the drone with the higher id of each violating pair (safe only if the lower id leads)
+HOLD_CLOSING = "closing"        # hold the drone closing on the other in each violating pair
+HOLD_POLICIES = (HOLD_NONE, HOLD_CLOSING, HOLD_HIGHER_ID)
+
+EARTH_RADIUS = 6378137.0
+_ON_GROUND = 1                  # mavsdk.telemetry.LandedState.ON_GROUND.value
+
+
+def global_to_local(latitude, longitude, altitude, reference):
+    """
+    NED coordinates, in meters, of global positions around a reference point.
+
+    Args:
+        latitude, longitude (ndarray): Degrees
+        altitude (ndarray): Absolute altitude in meters
+        reference (tuple): (latitude, longitude, altitude) of the origin
+
+    Returns:
+        (N, 3) array; equirectangular projection, accurate to centimeters over a few kilometers.
+    """
+    lat0, lon0, alt0 = reference
+    north = np.radians(latitude - lat0) * EARTH_RADIUS
+    east = np.radians(longitude - lon0) * EARTH_RADIUS * math.cos(math.radians(lat0))
+    return np.column_stack([north, east, alt0 - altitude])
+
+
+class SeparationMonitor:
+    """
+    Pairwise minimum separation check of every drone with telemetry, at a fixed rate.
+
+    Attributes:
+        held (set): Ids of the drones currently held
+        held_since (dict): drone_id -> time its current hold started, on the monitor's clock
+        hold_timeouts (int): Holds released after max_hold_time
+        active (dict): (drone_a, drone_b) -> Violation of the pairs violating at the last check
+        violations (int): Violating pairs reported since the start (a pair is counted again
+            after it has cleared)
+        min_distance (float): Smallest separation seen below the release distance
+        check_time (LatencyHistogram): Processing time of each check, in seconds
+    """
+
+    def __init__(self, telemetry_stores, min_separation=2.0, release_ratio=1.25, rate_hz=10.0, max_age=1.0,
+                 hold_policy=HOLD_NONE, max_hold_time=30.0, drone_ids=None, clock=time.monotonic, sleep=asyncio.sleep,
+                 on_violation=None):
+        """
+        Args:
+            telemetry_stores (dict): drone_id -> TelemetryStore, read at every check (drones can be added later)
+            min_separation (float, optional): Minimum distance between two drones, in meters
+            release_ratio (float, optional): A held drone is released when no drone is within
+                release_ratio * min_separation of it
+            rate_hz (float, optional): Check rate
+            max_age (float, optional): Positions older than this (seconds) are ignored
+            hold_policy (str, optional): One of HOLD_POLICIES
+            max_hold_time (float, optional): Longest hold in seconds; the drone is then released
+                and not held again until no drone is within the release distance of it
+            drone_ids (iterable, optional): Drones to monitor, defaults to every drone of telemetry_stores
+            clock (callable, optional): Monotonic clock of the telemetry stores
+            sleep (coroutine function, optional): Sleep matching the clock
+            on_violation (callable, optional): Called with each new Violation
+        """
+        if hold_policy not in HOLD_POLICIES:
+            raise ValueError(f"Unknown hold policy: {hold_policy}")
+        self.telemetry_stores = telemetry_stores
+        self.min_separation = min_separation
+        self.release_distance = min_separation * release_ratio
+        self.rate_hz = rate_hz
+        self.max_age = max_age
+        self.hold_policy = hold_policy
+        self.max_hold_time = max_hold_time
+        self.drone_ids = None if drone_ids is None else set(drone_ids)
+        self.clock = clock
+        self.sleep = sleep
+        self.on_violation = on_violation
+        self.reference = None
+        self.held = set()
+        self.held_since = {}
+        self.hold_timeouts = 0
+        self._timed_out = set()         # released after max_hold_time, not held again until clear
+        self.active = {}
+        self.violations = 0
+        self.min_distance = math.inf
+        self.checks = 0
+        self.check_time = LatencyHistogram("separation check", min_value=1e-6)
+
+    def is_held(self, drone_id):
+        return drone_id in self.held
+
+    def positions(self, with_velocities=False):
+        """
+        (drone_ids, positions) of the airborne drones with a recent position.
+
+        positions is an (N, 3) NED array in meters in a frame common to all drones, whose origin
+        is the first position seen. With with_velocities, an (N, 3) array of their NED velocities
+        in m/s is returned as well (zero when missing or older than max_age).
+        """
+        now = self.clock()
+        ids, rows, velocities = [], [], []
+        for drone_id, store in list(self.telemetry_stores.items()):
+            if self.drone_ids is not None and drone_id not in self.drone_ids:
+                continue
+            latest = store.latest_row("position")
+            if latest is None or now - latest[0] > self.max_age:
+                continue
+            landed = store.latest_row("landed_state")
+            if landed is not None and landed[1][0] == _ON_GROUND:
+                continue
+            ids.append(drone_id)
+            rows.append(latest[1])
+            if with_velocities:
+                velocity = store.latest_row("velocity_ned")
+                fresh = velocity is not None and now - velocity[0] <= self.max_age
+                velocities.append(velocity[1] if fresh else (0.0, 0.0, 0.0))
+        if not rows:
+            empty = (np.empty(0, dtype=np.int64), np.empty((0, 3)))
+            return empty + (np.empty((0, 3)),) if with_velocities else empty
+        rows = np.array(rows)
+        if self.reference is None:
+            self.reference = (rows[0, 0], rows[0, 1], rows[0, 2])
+        local = global_to_local(rows[:, 0], rows[:, 1], rows[:, 2], self.reference)
+        if with_velocities:
+            return np.array(ids), local, np.array(velocities, dtype=np.float64).reshape(-1, 3)
+        return np.array(ids), local
+
+    def check(self):
+        """
+        Check the separation of every pair of drones once.
+
+        Returns:
+            List of Violations of the pairs closer than min_separation.
+        """
+        now = self.clock()
+        if self.hold_policy == HOLD_CLOSING:
+            ids, positions, velocities = self.positions(with_velocities=True)
+        else:
+            ids, positions = self.positions()
+        pairs, distances = find_close_pairs(positions, self.release_distance)
+        self.checks += 1
+        if distances.size:
+            self.min_distance = min(self.min_distance, float(distances.min()))
+
+        first, second = ids[pairs[:, 0]], ids[pairs[:, 1]]
+        violating = distances < self.min_separation
+        active = {}
+        for a, b, distance in zip(first[violating].tolist(), second[violating].tolist(), distances[violating].tolist()):
+            key = (min(a, b), max(a, b))
+            active[key] = violation = Violation(key[0], key[1], distance, now)
+            if key not in self.active:
+                self.violations += 1
+                print(f"⚠️ Separation violation: drones {key[0]} and {key[1]} at {distance:.2f} m (minimum {self.min_separation:.2f} m)")
+                if self.on_violation is not None:
+                    self.on_violation(violation)
+        self.active = active
+
+        if self.hold_policy != HOLD_NONE:
+            if self.hold_policy == HOLD_HIGHER_ID:
+                hold = {b for _, b in active}
+            else:
+                hold = self._closing_drones(ids, positions, velocities, pairs[violating], self.held)
+            # Keep holding a drone while a drone that is not held is within the release distance of
+            # it: two held drones never keep each other held, so they cannot wait for each other forever
+            close_pairs = list(zip(first.tolist(), second.tolist()))
+            blocked = {a for a, b in close_pairs if b not in self.held} | {b for a, b in close_pairs if a not in self.held}
+            self._timed_out &= {drone_id for pair in close_pairs for drone_id in pair}
+            held = (hold | (self.held & blocked)) - self._timed_out
+            timed_out = {drone_id for drone_id in held & self.held
+                         if now - self.held_since[drone_id] >= self.max_hold_time}
+            for drone_id in timed_out:
+                print(f"⏱️ Drone {drone_id} held for {self.max_hold_time:.0f} s, releasing it")
+            self.hold_timeouts += len(timed_out)
+            self._timed_out |= timed_out
+            held -= timed_out
+            for drone_id in held - self.held:
+                print(f"⏸️ Holding drone {drone_id}")
+            for drone_id in self.held - held:
+                print(f"▶️ Releasing drone {drone_id}")
+            self.held = held
+            self.held_since = {drone_id: self.held_since.get(drone_id, now) for drone_id in held}
+        return list(active.values())
+
+    @staticmethod
+    def _closing_drones(ids, positions, velocities, pairs, held=()):
+        """
+        Drone closing on the other in each pair: the larger speed towards the other drone (the
+        higher id on a tie), none if the pair is moving apart (relative velocity . relative
+        position >= 0) or if one of its drones is in `held` or already picked in another pair.
+        """
+        i, j = pairs[:, 0], pairs[:, 1]
+        offsets = positions[j] - positions[i]
+        directions = offsets / np.maximum(np.linalg.norm(offsets, axis=1), 1e-9)[:, None]
+        closing_i = np.einsum("ij,ij->i", velocities[i], directions)        # speed of i towards j
+        closing_j = -np.einsum("ij,ij->i", velocities[j], directions)       # speed of j towards i
+        hold = set()
+        for a, b, speed_a, speed_b in zip(ids[i].tolist(), ids[j].tolist(), closing_i.tolist(), closing_j.tolist()):
+            if speed_a + speed_b <= 0.0:
+                continue                                                    # already moving apart
+            if a in held or b in held or a in hold or b in hold:
+                continue                                                    # never hold both drones of a pair
+            if speed_a > speed_b or (speed_a == speed_b and a > b):
+                hold.add(a)
+            else:
+                hold.add(b)
+        return hold
+
+    async def run(self):
+        """Check at rate_hz until cancelled; late checks are skipped, not run back to back."""
+        scheduler = DeadlineScheduler(rate_hz=self.rate_hz, policy=POLICY_SKIP, clock=self.clock, sleep=self.sleep)
+        async for _ in scheduler.ticks():
+            start = time.perf_counter()
+            self.check()
+            self.check_time.record(time.perf_counter() - start)
+
+    def summary(self):
+        return {
+            "checks": self.checks,
+            "violations": self.violations,
+            "min_distance": self.min_distance,
+            "hold_timeouts": self.hold_timeouts,
+            "check_time": self.check_time.summary(),
+        }
+
+    def print_summary(self):
+        min_distance = f"{self.min_distance:.2f} m" if self.min_distance < math.inf else f"> {self.release_distance:.2f} m"
+        print(f"Separation monitor: {self.checks} checks, {self.violations} violations, {self.hold_timeouts} hold timeouts, "
+              f"closest approach {min_distance}, "
+              f"check p99 {self.check_time.percentile(99) * 1e3:.2f} ms")
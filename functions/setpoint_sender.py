@@ -0,0 +1,76 @@
+"""
+Offboard setpoint sender with delta suppression.
+
+During the hold phases (modes 20, 40, 60 and 80) the trajectory is constant, yet the setpoint
+loop would build new MAVSDK messages and make a gRPC call at every tick. The SetpointSender
+only forwards a setpoint when it differs from the last one sent, or when keepalive_interval
+has elapsed since the last call, so an unchanged setpoint is still refreshed at a minimum
+rate. The default of 0.25 s (4 Hz) stays above the 2 Hz PX4 requires to enter and stay in
+offboard mode and well inside its offboard loss timeout (COM_OF_LOSS_T), independently of the
+setpoint resending done by mavsdk_server. Callers force every tick through while the setpoint
+is driven by something other than the trajectory (e.g. target tracking).
+"""
+
+import time
+
+
+class SetpointSender:
+    """
+    Forward changed setpoints to the vehicle, and unchanged ones at a keep-alive rate.
+
+    Attributes:
+        sent (int): Setpoints forwarded to the vehicle
+        skipped (int): Unchanged setpoints not forwarded
+    """
+
+    def __init__(self, send, keepalive_interval=0.25, tolerance=1e-6, clock=time.monotonic):
+        """
+        Args:
+            send (coroutine function): Called with (position, velocity, acceleration, yaw) to send a setpoint
+            keepalive_interval (float, optional): Longest time without sending, in seconds
+            tolerance (float, optional): Largest difference of any component still counted as unchanged
+            clock (callable, optional): Monotonic clock returning seconds
+        """
+        self.send_fcn = send
+        self.keepalive_interval = keepalive_interval
+        self.tolerance = tolerance
+        self.clock = clock
+        self.sent = 0
+        self.skipped = 0
+        self._last = None
+        self._last_time = None
+
+    def _unchanged(self, setpoint):
+        return self._last is not None and all(abs(a - b) <= self.tolerance for a, b in zip(setpoint, self._last))
+
+    async def send(self, position, velocity, acceleration, yaw, force=False, now=None):
+        """
+        Send a setpoint unless it is unchanged and the keep-alive is not due.
+
+        Args:
+            force (bool, optional): Send even if unchanged
+            now (float, optional): Time of the setpoint, e.g. its scheduled tick time, defaults to clock()
+
+        Returns:
+            True if the setpoint was sent
+        """
+        setpoint = (*position, *velocity, *acceleration, yaw)
+        if now is None:
+            now = self.clock()
+        if not force and self._unchanged(setpoint) and now - self._last_time < self.keepalive_interval:
+            self.skipped += 1
+            return False
+
+        await self.send_fcn(position, velocity, acceleration, yaw)
+        self.sent += 1
+        self._last = setpoint
+        self._last_time = now
+        return True
+
+    def stats(self):
+        total = self.sent + self.skipped
+        return {"sent": self.sent, "skipped": self.skipped, "saved": self.skipped / total if total else 0.0}
+
+    def print_summary(self, label=""):
+        s = self.stats()
+        print(f"{label} setpoints: sent={s['sent']} skipped={s['skipped']} ({s['saved']:.0%} of the calls saved)")
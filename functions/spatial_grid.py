@@ -0,0 +1,86 @@
+"""
+Uniform spatial hash grid for close-pair queries between many points.
+
+find_close_pairs returns every pair of points closer than a radius without comparing all N²
+pairs: points are binned into cubic cells of side `radius`, so a close pair is always in the
+same cell or in two adjacent cells. The cells are sorted once, and for each of the 13
+"forward" neighbor offsets plus the cell itself the candidates of every point are found with a
+binary search in the sorted cell keys. Everything is vectorized with NumPy; the cost is
+O(N log N + candidates), near-linear as long as the points are not packed much denser than one
+per radius³.
+
+With `groups`, only points of the same group are paired: several independent sets of points
+(e.g. the drones at successive time buckets) are then queried in a single call.
+"""
+
+import itertools
+
+import numpy as np
+
+
+# The cell itself and the 13 neighbor offsets that come after it in lexicographic order: every
+# pair of adjacent cells is visited exactly once
+_FORWARD_OFFSETS = [offset for offset in itertools.product((-1, 0, 1), repeat=3) if offset >= (0, 0, 0)]
+
+
+def _cell_keys(cells, dims):
+    return (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+
+
+def find_close_pairs(positions, radius, groups=None):
+    """
+    Pairs of points closer than `radius`.
+
+    Args:
+        positions (array_like): (N, 3) point coordinates (2-D points can be passed with z = 0)
+        radius (float): Distance below which a pair is reported
+        groups (array_like, optional): (N,) non-negative integer group of every point; only
+            points of the same group are paired
+
+    Returns:
+        (pairs, distances): (M, 2) int array of point indices with pairs[:, 0] < pairs[:, 1],
+        sorted, and the (M,) distances of the pairs.
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    n = positions.shape[0]
+    if n < 2 or radius <= 0:
+        return np.empty((0, 2), dtype=np.int64), np.empty(0)
+
+    # Integer cell of every point, shifted so that every neighbor cell has a non-negative key
+    cells = np.floor(positions / radius).astype(np.int64)
+    cells -= cells.min(axis=0) - 1
+    dims = cells.max(axis=0) + 2
+    keys = _cell_keys(cells, dims)
+    if groups is not None:
+        # Neighbor keys stay inside [0, dims) on every axis, so they never reach another group
+        keys += np.asarray(groups, dtype=np.int64) * int(np.prod(dims))
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+
+    first, second = [], []
+    points = np.arange(n)
+    for offset in _FORWARD_OFFSETS:
+        neighbor_keys = keys + _cell_keys(np.array([offset]), dims)[0]
+        lo = np.searchsorted(sorted_keys, neighbor_keys, side="left")
+        counts = np.searchsorted(sorted_keys, neighbor_keys, side="right") - lo
+        total = int(counts.sum())
+        if total == 0:
+            continue
+        # Candidate j of point i: order[lo[i] + k] for k in range(counts[i])
+        i = np.repeat(points, counts)
+        k = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        j = order[np.repeat(lo, counts) + k]
+        if offset == (0, 0, 0):
+            keep = i < j                    # same cell: each pair once, no self pairs
+            i, j = i[keep], j[keep]
+        first.append(i)
+        second.append(j)
+
+    if not first:
+        return np.empty((0, 2), dtype=np.int64), np.empty(0)
+    i, j = np.concatenate(first), np.concatenate(second)
+    distances = np.linalg.norm(positions[i] - positions[j], axis=1)
+    close = distances < radius
+    pairs = np.sort(np.column_stack([i[close], j[close]]), axis=1)
+    order = np.lexsort((pairs[:, 1], pairs[:, 0]))
+    return pairs[order], distances[close][order]
@@ -0,0 +1,90 @@
+"""
+Swarm manifest: one row per drone with its ports, trajectory file, offsets and role.
+
+CSV columns:
+- drone_id: MAVSDK instance id of the drone
+- udp_port: MAVLink UDP port of the drone (PX4 SITL instance i listens on 14540 + i)
+- grpc_port: port of the mavsdk_server of the drone
+- trajectory_file: trajectory CSV or binary (.traj) file flown by the drone
+- offset_x, offset_y, offset_z: trajectory offset in meters (NED)
+- altitude_offset: extra altitude in meters
+- time_offset: start delay of the drone in seconds
+- role: "camera" for the drone carrying the camera (yaw follows the detections), "flyer" otherwise
+"""
+
+import csv
+from collections import namedtuple
+
+
+ROLE_CAMERA = "camera"
+ROLE_FLYER = "flyer"
+
+DroneSpec = namedtuple("DroneSpec", ["drone_id", "udp_port", "grpc_port", "trajectory_file", "trajectory_offset", "altitude_offset", "time_offset", "role"])
+
+MANIFEST_HEADER = ["drone_id", "udp_port", "grpc_port", "trajectory_file", "offset_x", "offset_y", "offset_z", "altitude_offset", "time_offset", "role"]
+
+
+def read_swarm_manifest(path):
+    """
+    Read a swarm manifest CSV.
+
+    Returns:
+        List of DroneSpec, in file order.
+    """
+    specs = []
+    with open(path, newline="") as file:
+        for row in csv.DictReader(file):
+            role = row.get("role") or ROLE_FLYER
+            if role not in (ROLE_CAMERA, ROLE_FLYER):
+                raise ValueError(f"Invalid role {role!r} for drone {row['drone_id']} in {path}")
+            specs.append(DroneSpec(
+                drone_id=int(row["drone_id"]),
+                udp_port=int(row["udp_port"]),
+                grpc_port=int(row["grpc_port"]),
+                trajectory_file=row["trajectory_file"],
+                trajectory_offset=(float(row["offset_x"]), float(row["offset_y"]), float(row["offset_z"])),
+                altitude_offset=float(row["altitude_offset"]),
+                time_offset=float(row.get("time_offset") or 0.0),
+                role=role,
+            ))
+
+    ids = [spec.drone_id for spec in specs]
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"Duplicate drone_id in {path}")
+    return specs
+
+
+def write_swarm_manifest(specs, path):
+    with open(path, mode="w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(MANIFEST_HEADER)
+        for spec in specs:
+            writer.writerow([spec.drone_id, spec.udp_port, spec.grpc_port, spec.trajectory_file, *spec.trajectory_offset,
+                             spec.altitude_offset, spec.time_offset, spec.role])
+
+
+def default_swarm_manifest(num_drones, camera_drone_id=2, time_offset=1, altitude_steps=0.5):
+    """
+    Manifest equivalent to the historical hardcoded setup of offboard_multiple_from_csv.main():
+    even drones fly shapes/active.csv, odd drones shapes/active2.csv, drone i starts i * time_offset
+    seconds late and flies altitude_steps * i meters higher.
+    """
+    return [
+        DroneSpec(
+            drone_id=i,
+            udp_port=14540 + i,
+            grpc_port=50040 + i,
+            trajectory_file="shapes/active.csv" if i % 2 == 0 else "shapes/active2.csv",
+            trajectory_offset=(0.0, 0.0, 0.0),
+            altitude_offset=altitude_steps * i,
+            time_offset=float(i * time_offset),
+            role=ROLE_CAMERA if i == camera_drone_id else ROLE_FLYER,
+        )
+        for i in range(num_drones)
+    ]
+
+
+def shard_manifest(specs, num_workers):
+    """Split the drones round-robin into at most num_workers non-empty shards."""
+    shards = [specs[i::num_workers] for i in range(max(num_workers, 1))]
+    return [shard for shard in shards if shard]
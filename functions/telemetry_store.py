@@ -0,0 +1,196 @@
+"""
+Continuous per-drone telemetry store.
+
+A TelemetryStore keeps the MAVSDK telemetry streams of one drone open for the whole flight and
+writes every sample into a fixed-size, timestamped NumPy ring buffer. The control loop and the
+loggers read the latest value (O(1)) or a time window from the store instead of opening their
+own subscriptions.
+
+Streams and ring buffer columns:
+- position: latitude_deg, longitude_deg, absolute_altitude_m, relative_altitude_m
+- attitude: roll_deg, pitch_deg, yaw_deg (heading)
+- velocity_ned: north_m_s, east_m_s, down_m_s
+- position_ned: north_m, east_m, down_m (local position, the frame of the offboard setpoints)
+- landed_state: value of the mavsdk.telemetry.LandedState enum
+
+A subscription that ends or raises is recorded in `ended`, and wait_for on that stream raises
+instead of waiting for a sample that will never come.
+"""
+
+import asyncio
+import time
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed-capacity buffer of timestamped rows; the oldest rows are overwritten when full.
+
+    Attributes:
+        columns (tuple): Column names of the rows
+        capacity (int): Maximum number of rows kept
+        count (int): Total number of rows ever appended
+    """
+
+    def __init__(self, capacity, columns):
+        self.columns = tuple(columns)
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity)
+        self.values = np.zeros((capacity, len(self.columns)))
+        self.count = 0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, timestamp, row):
+        i = self.count % self.capacity
+        self.timestamps[i] = timestamp
+        self.values[i] = row
+        self.count += 1
+
+    def latest(self):
+        """(timestamp, row) of the newest sample, or None when empty."""
+        if self.count == 0:
+            return None
+        i = (self.count - 1) % self.capacity
+        return self.timestamps[i], self.values[i]
+
+    def ordered(self):
+        """(timestamps, values) of every kept row, oldest first."""
+        if self.count <= self.capacity:
+            return self.timestamps[:self.count], self.values[:self.count]
+        start = self.count % self.capacity
+        order = np.r_[start:self.capacity, 0:start]
+        return self.timestamps[order], self.values[order]
+
+    def window(self, seconds, now):
+        """(timestamps, values) of the rows with timestamp in [now - seconds, now], oldest first."""
+        timestamps, values = self.ordered()
+        first = np.searchsorted(timestamps, now - seconds, side="left")
+        return timestamps[first:], values[first:]
+
+
+def _position_row(position):
+    return (position.latitude_deg, position.longitude_deg, position.absolute_altitude_m, position.relative_altitude_m)
+
+
+def _attitude_row(attitude):
+    return (attitude.roll_deg, attitude.pitch_deg, attitude.yaw_deg)
+
+
+def _velocity_row(velocity):
+    return (velocity.north_m_s, velocity.east_m_s, velocity.down_m_s)
+
+
+def _position_ned_row(position_velocity):
+    position = position_velocity.position
+    return (position.north_m, position.east_m, position.down_m)
+
+
+def _landed_state_row(state):
+    return (state.value,)
+
+
+# name: (telemetry method, ring buffer columns, sample -> row)
+STREAMS = {
+    "position": ("position", ("latitude_deg", "longitude_deg", "absolute_altitude_m", "relative_altitude_m"), _position_row),
+    "attitude": ("attitude_euler", ("roll_deg", "pitch_deg", "yaw_deg"), _attitude_row),
+    "velocity_ned": ("velocity_ned", ("north_m_s", "east_m_s", "down_m_s"), _velocity_row),
+    "position_ned": ("position_velocity_ned", ("north_m", "east_m", "down_m"), _position_ned_row),
+    "landed_state": ("landed_state", ("landed_state",), _landed_state_row),
+}
+
+
+class TelemetryStore:
+    """
+    Telemetry of one drone, fed by long-lived subscriptions to the STREAMS.
+
+    Attributes:
+        buffers (dict): Stream name -> RingBuffer
+        ended (dict): Stream name -> exception that ended its subscription, or None if it ended
+            without an error (or was stopped)
+    """
+
+    def __init__(self, drone, capacity=512, clock=time.monotonic, streams=STREAMS, on_sample=None):
+        """
+        Args:
+            drone (mavsdk.System): Connected drone
+            capacity (int, optional): Rows kept per stream
+            clock (callable, optional): Clock used to timestamp the samples
+            streams (dict, optional): Streams to follow, see STREAMS
+            on_sample (callable, optional): Called with (stream name, timestamp, row) for every sample, e.g. to record it
+        """
+        self.drone = drone
+        self.clock = clock
+        self.streams = streams
+        self.on_sample = on_sample
+        self.buffers = {name: RingBuffer(capacity, columns) for name, (_, columns, _) in streams.items()}
+        self._raw = {}
+        self._updated = {name: asyncio.Event() for name in streams}
+        self.ended = {}
+        self._tasks = []
+
+    def start(self):
+        """Open one subscription task per stream."""
+        for name, (method, _, to_row) in self.streams.items():
+            self._tasks.append(asyncio.ensure_future(self._follow(name, getattr(self.drone.telemetry, method), to_row)))
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    async def _follow(self, name, subscribe, to_row):
+        buffer = self.buffers[name]
+        try:
+            async for sample in subscribe():
+                timestamp, row = self.clock(), to_row(sample)
+                buffer.append(timestamp, row)
+                if self.on_sample is not None:
+                    self.on_sample(name, timestamp, row)
+                self._raw[name] = sample
+                self._wake(name)
+        except Exception as error:
+            self.ended[name] = error
+        finally:
+            self.ended.setdefault(name, None)
+            self._wake(name)                # the waiters raise instead of waiting forever
+
+    def _wake(self, name):
+        # Wake up the waiters of this stream, new waiters wait on a fresh event
+        event, self._updated[name] = self._updated[name], asyncio.Event()
+        event.set()
+
+    def latest(self, name):
+        """Newest MAVSDK object received on a stream, or None."""
+        return self._raw.get(name)
+
+    def latest_row(self, name):
+        """(timestamp, row) of the newest sample of a stream, or None."""
+        return self.buffers[name].latest()
+
+    def age(self, name):
+        """Seconds since the newest sample of a stream, or None if nothing was received."""
+        latest = self.buffers[name].latest()
+        return None if latest is None else self.clock() - latest[0]
+
+    def window(self, name, seconds):
+        """(timestamps, values) of the samples of the last `seconds` seconds, oldest first."""
+        return self.buffers[name].window(seconds, self.clock())
+
+    async def wait_for(self, name, predicate=lambda sample: True):
+        """
+        Wait until the newest sample of a stream satisfies `predicate`, and return it.
+
+        Raises:
+            RuntimeError: The subscription of the stream ended before such a sample arrived
+        """
+        while True:
+            sample = self._raw.get(name)
+            if sample is not None and predicate(sample):
+                return sample
+            if name in self.ended:
+                error = self.ended[name]
+                raise RuntimeError(f"Telemetry stream {name} ended" + (f": {error}" if error is not None else "")) from error
+            await self._updated[name].wait()
@@ -0,0 +1,193 @@
+"""
+Drift-free deadline scheduler for the offboard setpoint loop.
+
+Tick k is due at start + k * period on the monotonic clock, so the time spent sending the
+setpoint (and any other work done in the tick) does not accumulate as drift, unlike
+`await asyncio.sleep(period); t += period`. Per-tick lateness and send latency are recorded
+in log-spaced histograms that can be printed or dumped as JSON at the end of a flight.
+"""
+
+import asyncio
+import json
+import math
+import time
+from collections import namedtuple
+
+
+# index: tick number, mission_time: scheduled time of the tick since the start (index * period),
+# lateness: how late the tick was handed to the loop, in seconds
+Tick = namedtuple("Tick", ["index", "mission_time", "lateness"])
+
+POLICY_CATCH_UP = "catch_up"    # run every missed tick back to back until the loop is on time again
+POLICY_SKIP = "skip"            # drop the missed ticks and resume at the next deadline
+
+
+class LatencyHistogram:
+    """
+    Histogram of durations (seconds) with logarithmic bins.
+
+    Values below min_value fall in the first bin and values above max_value in the last one;
+    the exact count, mean and maximum are tracked separately.
+    """
+
+    def __init__(self, name, min_value=1e-5, max_value=10.0, bins_per_decade=20):
+        self.name = name
+        self.min_value = min_value
+        self.bins_per_decade = bins_per_decade
+        self.num_bins = int(math.ceil(math.log10(max_value / min_value) * bins_per_decade)) + 1
+        self.counts = [0] * self.num_bins
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def _bin(self, value):
+        if value <= self.min_value:
+            return 0
+        return min(int(math.log10(value / self.min_value) * self.bins_per_decade) + 1, self.num_bins - 1)
+
+    def upper_edge(self, index):
+        """Upper edge (seconds) of a bin."""
+        return self.min_value * 10 ** (index / self.bins_per_decade)
+
+    def record(self, value):
+        self.counts[self._bin(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Add the values of another histogram with the same bins (e.g. to aggregate several drones)."""
+        if (other.min_value, other.bins_per_decade, other.num_bins) != (self.min_value, self.bins_per_decade, self.num_bins):
+            raise ValueError(f"Cannot merge histogram {other.name} with different bins into {self.name}")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p):
+        """Upper bound of the p-th percentile (0-100), at the resolution of the bins."""
+        if self.count == 0:
+            return 0.0
+        target = self.count * p / 100.0
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and count:
+                return min(self.upper_edge(index), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "summary": self.summary(),
+            "bin_upper_edges": [self.upper_edge(i) for i in range(self.num_bins)],
+            "counts": self.counts,
+        }
+
+
+class DeadlineScheduler:
+    """
+    Fixed-rate tick generator driven by absolute deadlines on a monotonic clock.
+
+    Attributes:
+        rate_hz (float): Tick rate, typically 10 to 100 Hz
+        period (float): Tick period in seconds
+        policy (str): POLICY_CATCH_UP or POLICY_SKIP, applied when the loop misses deadlines
+        lateness (LatencyHistogram): Delay between each deadline and the tick being handed out
+        send_latency (LatencyHistogram): Durations recorded with record_send
+        skipped_ticks (int): Ticks dropped by the skip policy
+    """
+
+    def __init__(self, rate_hz=10.0, policy=POLICY_CATCH_UP, clock=time.monotonic, sleep=asyncio.sleep):
+        """
+        Args:
+            rate_hz (float, optional): Tick rate in Hz
+            policy (str, optional): What to do with missed deadlines
+            clock (callable, optional): Monotonic clock returning seconds
+            sleep (coroutine function, optional): Sleep matching the clock
+        """
+        if rate_hz <= 0:
+            raise ValueError(f"Invalid tick rate: {rate_hz} Hz")
+        if policy not in (POLICY_CATCH_UP, POLICY_SKIP):
+            raise ValueError(f"Invalid tick policy: {policy}")
+
+        self.rate_hz = rate_hz
+        self.period = 1.0 / rate_hz
+        self.policy = policy
+        self.clock = clock
+        self.sleep = sleep
+        self.lateness = LatencyHistogram("tick_lateness")
+        self.send_latency = LatencyHistogram("send_latency")
+        self.skipped_ticks = 0
+
+    async def ticks(self, start=None):
+        """
+        Yield a Tick at every deadline, forever.
+
+        A start in the past (a drone joining a mission already under way) begins at the latest
+        deadline on that timeline, without replaying the ticks due before it.
+
+        Args:
+            start (float, optional): Clock time of tick 0, defaults to now
+        """
+        if start is None:
+            start = self.clock()
+        index = max(math.floor((self.clock() - start) / self.period), 0)
+        while True:
+            deadline = start + index * self.period
+            now = self.clock()
+            if now < deadline:
+                await self.sleep(deadline - now)
+                now = self.clock()
+
+            lateness = max(now - deadline, 0.0)
+            self.lateness.record(lateness)
+            yield Tick(index, index * self.period, lateness)
+
+            index += 1
+            if self.policy == POLICY_SKIP:
+                # Resume at the first deadline that is still in the future
+                due = int((self.clock() - start) / self.period) + 1
+                if due > index:
+                    self.skipped_ticks += due - index
+                    index = due
+
+    def record_send(self, duration):
+        """Record how long the setpoint call of a tick took."""
+        self.send_latency.record(duration)
+
+    def summary(self):
+        return {
+            "rate_hz": self.rate_hz,
+            "policy": self.policy,
+            "skipped_ticks": self.skipped_ticks,
+            "lateness": self.lateness.summary(),
+            "send_latency": self.send_latency.summary(),
+        }
+
+    def print_summary(self, label=""):
+        for histogram in (self.lateness, self.send_latency):
+            s = histogram.summary()
+            print(f"{label} {histogram.name}: n={s['count']} mean={s['mean'] * 1e3:.2f}ms p50={s['p50'] * 1e3:.2f}ms "
+                  f"p95={s['p95'] * 1e3:.2f}ms p99={s['p99'] * 1e3:.2f}ms max={s['max'] * 1e3:.2f}ms")
+        if self.skipped_ticks:
+            print(f"{label} skipped ticks: {self.skipped_ticks}")
+
+    def dump(self, path):
+        """Write the summary and both histograms to a JSON file."""
+        with open(path, "w") as file:
+            json.dump({
+                **self.summary(),
+                "histograms": [self.lateness.to_dict(), self.send_latency.to_dict()],
+            }, file, indent=2)
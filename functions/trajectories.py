@@ -1,5 +1,37 @@
 import time
 import math
+from collections import namedtuple
+
+import numpy as np
+
+
+# Structure-of-arrays result returned by every shape function when `step` is a NumPy array.
+# Each field is an array of shape (len(step), 3) holding the x, y, z components.
+ShapeSamples = namedtuple("ShapeSamples", ["positions", "velocities", "accelerations"])
+
+
+def _backend(step):
+    """
+    Select the math backend for a shape function.
+
+    Scalar steps keep using the `math` module so the per-sample path is unchanged,
+    NumPy arrays of steps are evaluated in one pass with `numpy`.
+    """
+    return np if isinstance(step, np.ndarray) else math
+
+
+def _pack(step, x, y, z, vx, vy, vz, ax, ay, az):
+    """
+    Return the 9-tuple for a scalar step, or a ShapeSamples structure-of-arrays for an array of steps.
+    Constant components (e.g. vz = 0) are broadcast to the length of `step`.
+    """
+    if not isinstance(step, np.ndarray):
+        return x, y, z, vx, vy, vz, ax, ay, az
+
+    def stack(*components):
+        return np.stack([np.broadcast_to(np.asarray(c, dtype=float), step.shape) for c in components], axis=-1)
+
+    return ShapeSamples(stack(x, y, z), stack(vx, vy, vz), stack(ax, ay, az))
 
 
 def map_shape_to_code(shape_name):
@@ -11,6 +43,10 @@ def map_shape_to_code(shape_name):
 
     Returns:
     A tuple of shape_code, shape_fcn and shape_args.
+
+    Every shape_fcn accepts either a scalar step, returning the 9-tuple
+    (x, y, z, vx, vy, vz, ax, ay, az), or a NumPy array of steps, returning a
+    ShapeSamples(positions, velocities, accelerations) structure-of-arrays.
     """
 
     # Define a dictionary to map shape names to their enumeration or number codes and respective function calls
@@ -38,122 +74,128 @@ def map_shape_to_code(shape_name):
 
 
 def sine_wave_trajectory(step, maneuver_time, diameter, direction, initial_alt, step_time, turns):
+    xp = _backend(step)
     t = step * step_time
-    theta = 2 * direction * math.pi * t / maneuver_time * turns
+    theta = 2 * direction * xp.pi * t / maneuver_time * turns
 
     x = diameter * t / maneuver_time
-    y = diameter * math.sin(theta)
+    y = diameter * xp.sin(theta)
     z = -1 * initial_alt
 
     vx = diameter / maneuver_time
-    vy = diameter * math.cos(theta) * 2 * direction * math.pi * turns / maneuver_time
+    vy = diameter * xp.cos(theta) * 2 * direction * xp.pi * turns / maneuver_time
     vz = 0
 
-    ax = -diameter * math.sin(theta) * 2 * direction * math.pi * turns / maneuver_time ** 2
-    ay = diameter * math.cos(theta) * 4 * direction * math.pi * turns ** 2 / maneuver_time ** 2
+    ax = -diameter * xp.sin(theta) * 2 * direction * xp.pi * turns / maneuver_time ** 2
+    ay = diameter * xp.cos(theta) * 4 * direction * xp.pi * turns ** 2 / maneuver_time ** 2
     az = 0
 
-    return x, y, z, vx, vy, vz, ax, ay, az
+    return _pack(step, x, y, z, vx, vy, vz, ax, ay, az)
 
 
 
 
 def infinity_shape_trajectory(step, maneuver_time, diameter, direction, initial_alt, step_time):
+    xp = _backend(step)
     t = step * step_time
-    theta = 2 * direction * math.pi * t / maneuver_time
+    theta = 2 * direction * xp.pi * t / maneuver_time
 
-    x = (diameter / 2) * math.sin(theta)
-    y = direction * (diameter / 4) * math.sin(2 * theta)
+    x = (diameter / 2) * xp.sin(theta)
+    y = direction * (diameter / 4) * xp.sin(2 * theta)
     z = -1 * initial_alt
 
-    vx = (diameter / 2) * math.cos(theta) * 2 * direction * math.pi / maneuver_time
-    vy = direction * (diameter / 4) * math.cos(2 * theta) * 4 * direction * math.pi / maneuver_time
+    vx = (diameter / 2) * xp.cos(theta) * 2 * direction * xp.pi / maneuver_time
+    vy = direction * (diameter / 4) * xp.cos(2 * theta) * 4 * direction * xp.pi / maneuver_time
     vz = 0
 
-    ax = -(diameter / 2) * math.sin(theta) * 4 * direction * math.pi * math.cos(theta) / maneuver_time ** 2
-    ay = -direction * (diameter / 4) * math.sin(2 * theta) * 8 * direction * math.pi * math.cos(2 * theta) / maneuver_time ** 2
+    ax = -(diameter / 2) * xp.sin(theta) * 4 * direction * xp.pi * xp.cos(theta) / maneuver_time ** 2
+    ay = -direction * (diameter / 4) * xp.sin(2 * theta) * 8 * direction * xp.pi * xp.cos(2 * theta) / maneuver_time ** 2
     az = 0
 
-    return x, y, z, vx, vy, vz, ax, ay, az
+    return _pack(step, x, y, z, vx, vy, vz, ax, ay, az)
 
 
 def spiral_square_trajectory(step, maneuver_time, diameter, direction, initial_alt, step_time, turns):
+    xp = _backend(step)
     t = step * step_time
-    theta = 2 * direction * math.pi * t / maneuver_time * turns
+    theta = 2 * direction * xp.pi * t / maneuver_time * turns
 
     r = diameter * t / maneuver_time
-    x = r * math.cos(theta)
-    y = r * math.sin(theta)
+    x = r * xp.cos(theta)
+    y = r * xp.sin(theta)
     z = -1 * initial_alt
 
-    vx = diameter * (math.cos(theta) - t * math.sin(theta)) / maneuver_time
-    vy = diameter * (math.sin(theta) + t * math.cos(theta)) / maneuver_time
+    vx = diameter * (xp.cos(theta) - t * xp.sin(theta)) / maneuver_time
+    vy = diameter * (xp.sin(theta) + t * xp.cos(theta)) / maneuver_time
     vz = 0
 
-    ax = -diameter * math.sin(theta) * 2 * direction * math.pi * turns / maneuver_time ** 2
-    ay = diameter * math.cos(theta) * 4 * direction * math.pi * turns ** 2 / maneuver_time ** 2
+    ax = -diameter * xp.sin(theta) * 2 * direction * xp.pi * turns / maneuver_time ** 2
+    ay = diameter * xp.cos(theta) * 4 * direction * xp.pi * turns ** 2 / maneuver_time ** 2
     az = 0
 
-    return x, y, z, vx, vy, vz, ax, ay, az
+    return _pack(step, x, y, z, vx, vy, vz, ax, ay, az)
 
 def star_shape_trajectory(step, maneuver_time, diameter, direction, initial_alt, step_time, points):
+    xp = _backend(step)
     t = step * step_time
-    theta = 2 * direction * math.pi * t / maneuver_time
+    theta = 2 * direction * xp.pi * t / maneuver_time
 
-    r = diameter * (1 - math.sin(points * theta))
-    x = r * math.cos(theta)
-    y = r * math.sin(theta)
+    r = diameter * (1 - xp.sin(points * theta))
+    x = r * xp.cos(theta)
+    y = r * xp.sin(theta)
     z = -1 * initial_alt
 
-    vx = diameter * (math.cos(theta) - points * math.cos(points * theta)) / maneuver_time
-    vy = diameter * (math.sin(theta) - points * math.sin(points * theta)) / maneuver_time
+    vx = diameter * (xp.cos(theta) - points * xp.cos(points * theta)) / maneuver_time
+    vy = diameter * (xp.sin(theta) - points * xp.sin(points * theta)) / maneuver_time
     vz = 0
 
-    ax = -diameter * math.sin(theta) * 4 * direction * math.pi * points * math.cos(theta) / maneuver_time ** 2
-    ay = -diameter * math.sin(2 * theta) * 8 * direction * math.pi * points * math.cos(2 * theta) / maneuver_time ** 2
+    ax = -diameter * xp.sin(theta) * 4 * direction * xp.pi * points * xp.cos(theta) / maneuver_time ** 2
+    ay = -diameter * xp.sin(2 * theta) * 8 * direction * xp.pi * points * xp.cos(2 * theta) / maneuver_time ** 2
     az = 0
 
-    return x, y, z, vx, vy, vz, ax, ay, az
+    return _pack(step, x, y, z, vx, vy, vz, ax, ay, az)
 
 
 def zigzag_trajectory(step, maneuver_time, diameter, direction, initial_alt, step_time, turns):
+    xp = _backend(step)
     t = step * step_time
-    theta = 2 * direction * math.pi * t / maneuver_time * turns
+    theta = 2 * direction * xp.pi * t / maneuver_time * turns
 
     x = diameter * t / maneuver_time
-    y = diameter * math.sin(theta)
+    y = diameter * xp.sin(theta)
     z = -1 * initial_alt
 
     vx = diameter / maneuver_time
-    vy = diameter * math.cos(theta) * 2 * direction * math.pi * turns / maneuver_time
+    vy = diameter * xp.cos(theta) * 2 * direction * xp.pi * turns / maneuver_time
     vz = 0
 
-    ax = -diameter * math.sin(theta) * 2 * direction * math.pi * turns / maneuver_time ** 2
-    ay = diameter * math.cos(theta) * 4 * direction * math.pi * turns ** 2 / maneuver_time ** 2
+    ax = -diameter * xp.sin(theta) * 2 * direction * xp.pi * turns / maneuver_time ** 2
+    ay = diameter * xp.cos(theta) * 4 * direction * xp.pi * turns ** 2 / maneuver_time ** 2
     az = 0
 
-    return x, y, z, vx, vy, vz, ax, ay, az
+    return _pack(step, x, y, z, vx, vy, vz, ax, ay, az)
 
 def heart_shape_trajectory(step, maneuver_time, diameter, direction, initial_alt, step_time):
+    xp = _backend(step)
     t = step * step_time
-    theta = 2 * direction * math.pi * t / maneuver_time
+    theta = 2 * direction * xp.pi * t / maneuver_time
 
     radius = diameter / 2
     scale_factor = 30 / 400  # Adjust the scale factor to match the desired ratio
 
-    x = scale_factor * radius * 16 * math.sin(theta) ** 3
-    y = radius * (13 * math.cos(theta) - 5 * math.cos(2 * theta) - 2 * math.cos(3 * theta) - math.cos(4 * theta)) / 13
+    x = scale_factor * radius * 16 * xp.sin(theta) ** 3
+    y = radius * (13 * xp.cos(theta) - 5 * xp.cos(2 * theta) - 2 * xp.cos(3 * theta) - xp.cos(4 * theta)) / 13
     z = -1 * initial_alt
 
-    vx = scale_factor * radius * 48 * math.pi * math.sin(theta) ** 2 * math.cos(theta) / maneuver_time
-    vy = radius * (13 * math.sin(theta) - 10 * math.sin(2 * theta) - 6 * math.sin(3 * theta) - 4 * math.sin(4 * theta)) * 2 * math.pi / (13 * maneuver_time)
+    vx = scale_factor * radius * 48 * xp.pi * xp.sin(theta) ** 2 * xp.cos(theta) / maneuver_time
+    vy = radius * (13 * xp.sin(theta) - 10 * xp.sin(2 * theta) - 6 * xp.sin(3 * theta) - 4 * xp.sin(4 * theta)) * 2 * xp.pi / (13 * maneuver_time)
     vz = 0
 
-    ax = -scale_factor * radius * 48 * math.pi * math.sin(theta) ** 3 * math.cos(theta) / maneuver_time ** 2
-    ay = -radius * (13 * math.cos(theta) - 10 * math.cos(2 * theta) - 6 * math.cos(3 * theta) - 4 * math.cos(4 * theta)) * 4 * math.pi ** 2 / (13 * maneuver_time ** 2)
+    ax = -scale_factor * radius * 48 * xp.pi * xp.sin(theta) ** 3 * xp.cos(theta) / maneuver_time ** 2
+    ay = -radius * (13 * xp.cos(theta) - 10 * xp.cos(2 * theta) - 6 * xp.cos(3 * theta) - 4 * xp.cos(4 * theta)) * 4 * xp.pi ** 2 / (13 * maneuver_time ** 2)
     az = 0
 
-    return x, y, z, vx, vy, vz, ax, ay, az
+    return _pack(step, x, y, z, vx, vy, vz, ax, ay, az)
 
 
 
@@ -161,73 +203,81 @@ def heart_shape_trajectory(step, maneuver_time, diameter, direction, initial_alt
 
 
 def helix_trajectory(step, maneuver_time, diameter, direction, initial_alt, step_time, end_altitude, turns):
+    xp = _backend(step)
     t = step * step_time
-    theta = 2 * direction * math.pi * t / maneuver_time * turns
+    theta = 2 * direction * xp.pi * t / maneuver_time * turns
 
-    x = (diameter / 2) * math.cos(theta)
-    y = (diameter / 2) * math.sin(theta)
+    x = (diameter / 2) * xp.cos(theta)
+    y = (diameter / 2) * xp.sin(theta)
     z = -1 * (initial_alt + (end_altitude - initial_alt) * (t / maneuver_time))
 
-    vx = -(diameter / 2) * math.sin(theta) * 2 * direction * math.pi * turns / maneuver_time
-    vy = (diameter / 2) * math.cos(theta) * 2 * direction * math.pi * turns / maneuver_time
+    vx = -(diameter / 2) * xp.sin(theta) * 2 * direction * xp.pi * turns / maneuver_time
+    vy = (diameter / 2) * xp.cos(theta) * 2 * direction * xp.pi * turns / maneuver_time
     vz = -1 * (initial_alt - end_altitude) / maneuver_time
 
-    ax = -(diameter / 2) * math.cos(theta) * 4 * direction * math.pi * turns ** 2 / maneuver_time ** 2
-    ay = -(diameter / 2) * math.sin(theta) * 4 * direction * math.pi * turns ** 2 / maneuver_time ** 2
+    ax = -(diameter / 2) * xp.cos(theta) * 4 * direction * xp.pi * turns ** 2 / maneuver_time ** 2
+    ay = -(diameter / 2) * xp.sin(theta) * 4 * direction * xp.pi * turns ** 2 / maneuver_time ** 2
     az = -1 * (initial_alt - end_altitude) / maneuver_time ** 2
 
-    return x, y, z, vx, vy, vz, ax, ay, az
+    return _pack(step, x, y, z, vx, vy, vz, ax, ay, az)
 
 
 
 
 def eight_shape_trajectory(step, maneuver_time, diameter, direction,initial_alt, step_time):
+    xp = _backend(step)
     t = step * step_time
-    theta = 2 * direction * math.pi * t / maneuver_time
+    theta = 2 * direction * xp.pi * t / maneuver_time
 
-    x = (diameter / 2) * math.sin(theta)
-    y = direction * (diameter / 4) * math.sin(2 * theta)
+    x = (diameter / 2) * xp.sin(theta)
+    y = direction * (diameter / 4) * xp.sin(2 * theta)
     z = -1 * initial_alt
 
-    vx = (diameter / 2) * math.cos(theta) * 2 * direction * math.pi / maneuver_time
-    vy = direction * (diameter / 4) * math.cos(2 * theta) * 4 * direction * math.pi / maneuver_time
+    vx = (diameter / 2) * xp.cos(theta) * 2 * direction * xp.pi / maneuver_time
+    vy = direction * (diameter / 4) * xp.cos(2 * theta) * 4 * direction * xp.pi / maneuver_time
     vz = 0
 
-    ax = -(diameter / 2) * math.sin(theta) * 4 * direction * math.pi **2 / maneuver_time **2
-    ay = -direction * (diameter / 4) * math.sin(2 * theta) * 8 * direction * math.pi **2 / maneuver_time **2
+    ax = -(diameter / 2) * xp.sin(theta) * 4 * direction * xp.pi **2 / maneuver_time **2
+    ay = -direction * (diameter / 4) * xp.sin(2 * theta) * 8 * direction * xp.pi **2 / maneuver_time **2
     az = 0
 
-    return x, y, z, vx, vy, vz, ax, ay, az
+    return _pack(step, x, y, z, vx, vy, vz, ax, ay, az)
 
 
 def circle_trajectory(step, maneuver_time, diameter, direction, initial_alt, step_time):
+    xp = _backend(step)
     t = step * step_time
-    theta = 2 * direction * math.pi * t / maneuver_time
+    theta = 2 * direction * xp.pi * t / maneuver_time
 
-    x = (diameter / 2) * math.cos(theta)
-    y = (diameter / 2) * math.sin(theta)
+    x = (diameter / 2) * xp.cos(theta)
+    y = (diameter / 2) * xp.sin(theta)
     z = -1 * initial_alt
 
-    vx = -(diameter / 2) * math.sin(theta) * 2 * direction * math.pi / maneuver_time
-    vy = (diameter / 2) * math.cos(theta) * 2 * direction * math.pi / maneuver_time
+    vx = -(diameter / 2) * xp.sin(theta) * 2 * direction * xp.pi / maneuver_time
+    vy = (diameter / 2) * xp.cos(theta) * 2 * direction * xp.pi / maneuver_time
     vz = 0
 
-    ax = -(diameter / 2) * math.cos(theta) * 4 * direction * math.pi ** 2 / maneuver_time ** 2
-    ay = -(diameter / 2) * math.sin(theta) * 4 * direction * math.pi ** 2 / maneuver_time ** 2
+    ax = -(diameter / 2) * xp.cos(theta) * 4 * direction * xp.pi ** 2 / maneuver_time ** 2
+    ay = -(diameter / 2) * xp.sin(theta) * 4 * direction * xp.pi ** 2 / maneuver_time ** 2
     az = 0
 
-    return x, y, z, vx, vy, vz, ax, ay, az
+    return _pack(step, x, y, z, vx, vy, vz, ax, ay, az)
 
 def square_trajectory(step, maneuver_time, diameter, direction, initial_alt, step_time):
+    xp = _backend(step)
     t = step * step_time
-    side_length = diameter / math.sqrt(2)
+    side_length = diameter / xp.sqrt(2)
     side_time = maneuver_time / 4
     side_steps = int(maneuver_time / (4 * step_time))
 
     current_side = step // side_steps
     side_progress = (step % side_steps) / side_steps
 
-    if current_side == 0:
+    if xp is np:
+        sides = [current_side == 0, current_side == 1, current_side == 2]
+        x = np.select(sides, [side_length * side_progress, side_length, side_length * (1 - side_progress)], 0)
+        y = np.select(sides, [0, side_length * side_progress, side_length], side_length * (1 - side_progress))
+    elif current_side == 0:
         x = side_length * side_progress
         y = 0
     elif current_side == 1:
@@ -245,15 +295,25 @@ def square_trajectory(step, maneuver_time, diameter, direction, initial_alt, ste
 
     z = -1 * initial_alt
 
-    vx = side_length / side_time if (current_side == 0 or current_side == 2) else 0
-    vy = side_length / side_time if (current_side == 1 or current_side == 3) else 0
+    if xp is np:
+        even_side = (current_side == 0) | (current_side == 2)
+        odd_side = (current_side == 1) | (current_side == 3)
+        vx = np.where(even_side, side_length / side_time, 0)
+        vy = np.where(odd_side, side_length / side_time, 0)
+    else:
+        vx = side_length / side_time if (current_side == 0 or current_side == 2) else 0
+        vy = side_length / side_time if (current_side == 1 or current_side == 3) else 0
     vz = 0
 
     if direction == -1:
         vx, vy = vy, vx
 
-    ax = -side_length / side_time ** 2 * math.sin(2 * direction * math.pi * t / maneuver_time) if (current_side == 0 or current_side == 2) else 0
-    ay = -side_length / side_time ** 2 * math.cos(2 * direction * math.pi * t / maneuver_time) if (current_side == 1 or current_side == 3) else 0
+    if xp is np:
+        ax = np.where(even_side, -side_length / side_time ** 2 * np.sin(2 * direction * np.pi * t / maneuver_time), 0)
+        ay = np.where(odd_side, -side_length / side_time ** 2 * np.cos(2 * direction * np.pi * t / maneuver_time), 0)
+    else:
+        ax = -side_length / side_time ** 2 * math.sin(2 * direction * math.pi * t / maneuver_time) if (current_side == 0 or current_side == 2) else 0
+        ay = -side_length / side_time ** 2 * math.cos(2 * direction * math.pi * t / maneuver_time) if (current_side == 1 or current_side == 3) else 0
     az = 0
 
-    return x, y, z, vx, vy, vz, ax, ay, az
+    return _pack(step, x, y, z, vx, vy, vz, ax, ay, az)
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""
+Process-wide cache of parsed trajectory files.
+
+Every drone task used to reopen and reparse its trajectory file and keep its own offset copy of
+every row. The cache parses each file once per (path, modification time) and hands out the same
+read-only TrajectoryTable to every caller; per-drone offsets are applied by TrajectoryPlayer at
+lookup time, so no per-drone copy of the data is made.
+
+A CSV written from the generation cache (see functions/generation_cache.py) is read from its
+cache entry, memory-mapped, instead of being parsed.
+
+Piecewise trajectory files (".npz", see functions/piecewise_trajectory.py) are cached the same
+way, as a PiecewiseTable to be played by PiecewisePlayer.
+"""
+
+import os
+import threading
+
+from functions.generation_cache import shared_generation_cache
+from functions.piecewise_trajectory import PIECEWISE_EXTENSION, load_piecewise
+from functions.trajectory_file import BINARY_EXTENSION, load_trajectory, resolve_trajectory_path
+from functions.trajectory_player import build_trajectory_table
+
+
+class TrajectoryCache:
+    """
+    Cache of TrajectoryTables keyed by file path and modification time.
+
+    A file that changes on disk is parsed again on the next lookup and the stale entry is dropped.
+
+    Attributes:
+        hits (int): Lookups served from the cache
+        misses (int): Lookups that parsed the file
+    """
+
+    def __init__(self):
+        self._tables = {}           # real path -> (mtime_ns, TrajectoryTable)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path):
+        """
+        Shared TrajectoryTable of a trajectory file (CSV or binary, see load_trajectory), or
+        PiecewiseTable of a piecewise trajectory file.
+        """
+        piecewise = path.endswith(PIECEWISE_EXTENSION)
+        source = path if piecewise else resolve_trajectory_path(path)
+        if not piecewise and not source.endswith(BINARY_EXTENSION):
+            entry = shared_generation_cache.lookup_file(source)
+            if entry is not None:
+                try:
+                    return self._get(entry, piecewise)
+                except (OSError, ValueError):
+                    pass            # entry evicted (e.g. by another process) or damaged since the lookup: parse the CSV
+        return self._get(source, piecewise)
+
+    def _get(self, source, piecewise):
+        source = os.path.realpath(source)
+        mtime = os.stat(source).st_mtime_ns
+        with self._lock:
+            entry = self._tables.get(source)
+            if entry is not None and entry[0] == mtime:
+                self.hits += 1
+                return entry[1]
+
+            table = load_piecewise(source) if piecewise else build_trajectory_table(load_trajectory(source))
+            self._tables[source] = (mtime, table)
+            self.misses += 1
+            return table
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+
+
+shared_trajectory_cache = TrajectoryCache()
+
+
+def get_trajectory_table(path):
+    """TrajectoryTable of `path` from the process-wide cache."""
+    return shared_trajectory_cache.get(path)
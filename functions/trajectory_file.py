@@ -0,0 +1,163 @@
+"""
+Binary, memory-mapped trajectory format.
+
+The CSV files in "shapes/" stay as the export format, but parsing them costs a float() call per
+value. The binary format stores the same columns as typed, contiguous arrays so loaders can
+np.memmap them without any parsing.
+
+File layout:
+- prefix: magic b"DTRJ", format version (uint16), reserved (uint16), header length (uint32), data offset (uint64)
+- header: UTF-8 JSON with the number of rows, the mode code descriptions and, for every column,
+  its name, dtype and byte offset relative to the data offset
+- data: one contiguous array per column, each aligned to 64 bytes
+
+Loaders return a dict mapping the column name to a 1-D array, so the result can be indexed like the
+structured array returned by compile_mission (e.g. trajectory["px"]).
+"""
+
+import json
+import os
+import struct
+
+import numpy as np
+
+from functions.mission_compiler import MISSION_DTYPE, MODE_DESCRIPTIONS
+
+
+TRAJECTORY_MAGIC = b"DTRJ"
+TRAJECTORY_VERSION = 1
+BINARY_EXTENSION = ".traj"
+
+_PREFIX = struct.Struct("<4sHHIQ")
+_ALIGNMENT = 64
+
+
+def _align(offset):
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def write_trajectory_binary(mission, output_file):
+    """
+    Write a mission (structured array or dict of columns) to the binary trajectory format.
+
+    Args:
+    mission: Mission with the columns of MISSION_DTYPE, e.g. the result of compile_mission.
+    output_file: Path of the binary file to create.
+    """
+    columns = [np.ascontiguousarray(mission[name], dtype=MISSION_DTYPE[name].newbyteorder("<")) for name in MISSION_DTYPE.names]
+    rows = len(columns[0])
+
+    layout = []
+    offset = 0
+    for name, column in zip(MISSION_DTYPE.names, columns):
+        layout.append({"name": name, "dtype": column.dtype.str, "offset": offset})
+        offset = _align(offset + column.nbytes)
+
+    header = json.dumps({
+        "rows": rows,
+        "columns": layout,
+        "modes": {str(code): description for code, description in MODE_DESCRIPTIONS.items()},
+    }).encode("utf-8")
+    data_offset = _align(_PREFIX.size + len(header))
+
+    with open(output_file, "wb") as file:
+        file.write(_PREFIX.pack(TRAJECTORY_MAGIC, TRAJECTORY_VERSION, 0, len(header), data_offset))
+        file.write(header)
+        for entry, column in zip(layout, columns):
+            file.seek(data_offset + entry["offset"])
+            file.write(column.tobytes())
+
+
+def read_trajectory_header(path):
+    """
+    Read the prefix and JSON header of a binary trajectory file.
+
+    Returns:
+    The header dict, with the data offset of the file added under "data_offset".
+    """
+    with open(path, "rb") as file:
+        prefix = file.read(_PREFIX.size)
+        if len(prefix) < _PREFIX.size:
+            raise ValueError(f"{path} is not a trajectory file: truncated header")
+        magic, version, _, header_length, data_offset = _PREFIX.unpack(prefix)
+        if magic != TRAJECTORY_MAGIC:
+            raise ValueError(f"{path} is not a trajectory file: bad magic {magic!r}")
+        if version != TRAJECTORY_VERSION:
+            raise ValueError(f"Unsupported trajectory file version {version} in {path}")
+        header = json.loads(file.read(header_length).decode("utf-8"))
+    header["data_offset"] = data_offset
+    return header
+
+
+def open_trajectory_binary(path):
+    """
+    Memory-map a binary trajectory file.
+
+    Returns:
+    A dict mapping every column name to a read-only 1-D array backed by the file.
+    """
+    header = read_trajectory_header(path)
+    rows = header["rows"]
+    if rows == 0:
+        return {entry["name"]: np.empty(0, dtype=entry["dtype"]) for entry in header["columns"]}
+
+    raw = np.memmap(path, dtype=np.uint8, mode="r")
+    columns = {}
+    for entry in header["columns"]:
+        dtype = np.dtype(entry["dtype"])
+        start = header["data_offset"] + entry["offset"]
+        columns[entry["name"]] = raw[start:start + rows * dtype.itemsize].view(dtype)
+    return columns
+
+
+def read_trajectory_csv(path):
+    """
+    Parse a trajectory CSV file (see CSV_HEADER) into a dict of column arrays.
+    The LED columns are not loaded.
+    """
+    with open(path, newline="") as file:
+        header = file.readline().strip().split(",")
+    names = [name for name in MISSION_DTYPE.names if name in header]
+    values = np.loadtxt(path, delimiter=",", skiprows=1, usecols=[header.index(name) for name in names], ndmin=2)
+    return {name: values[:, i].astype(MISSION_DTYPE[name]) for i, name in enumerate(names)}
+
+
+def binary_path_for(csv_path):
+    """Path of the binary file written alongside a trajectory CSV (shapes/active.csv -> shapes/active.traj)."""
+    return os.path.splitext(csv_path)[0] + BINARY_EXTENSION
+
+
+def resolve_trajectory_path(path):
+    """
+    File actually read by load_trajectory for `path`: the binary file next to a CSV when it
+    exists and is not older than the CSV, the path itself otherwise.
+    """
+    if not path.endswith(BINARY_EXTENSION):
+        binary_path = binary_path_for(path)
+        if os.path.exists(binary_path) and os.path.getmtime(binary_path) >= os.path.getmtime(path):
+            return binary_path
+    return path
+
+
+def load_trajectory(path):
+    """
+    Load a trajectory file as a dict of column arrays.
+
+    Binary files are memory-mapped. For a CSV path, the binary file next to it is used instead
+    when it is up to date (see resolve_trajectory_path), so the CSV is only parsed as a fallback.
+    """
+    path = resolve_trajectory_path(path)
+    if path.endswith(BINARY_EXTENSION):
+        return open_trajectory_binary(path)
+    return read_trajectory_csv(path)
+
+
+def columns_to_mission(columns):
+    """Pack a dict of column arrays back into a structured array of MISSION_DTYPE."""
+    mission = np.zeros(len(columns["t"]), dtype=MISSION_DTYPE)
+    for name in MISSION_DTYPE.names:
+        if name in columns:
+            mission[name] = columns[name]
+    if "idx" not in columns:
+        mission["idx"] = np.arange(mission.size)
+    return mission
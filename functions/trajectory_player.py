@@ -0,0 +1,204 @@
+"""
+Time-indexed trajectory player.
+
+Looks up a trajectory at any mission time in O(1) amortized (monotonic cursor) or O(log n)
+(bisection on the sorted time column), and linearly interpolates position, velocity,
+acceleration and yaw between the two surrounding samples. The commanded rate is therefore
+independent of the step_time the trajectory was generated with. Yaw is interpolated along the
+shortest arc (179° to -179° goes through 180°, not 0°) and returned in [-180, 180).
+
+Every table also carries a phase index (one Phase per run of consecutive rows with the same
+mode), built once when the trajectory is loaded, so a phase can be looked up without scanning
+the mode column (see functions/mission_resume.py).
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from functions.bearing_filter import unwrap_degrees, wrap_degrees
+
+
+# position, velocity and acceleration are (x, y, z) tuples, yaw is in degrees
+TrajectorySample = namedtuple("TrajectorySample", ["time", "position", "velocity", "acceleration", "yaw", "mode"])
+
+# Columns interpolated by the player, in the order of TrajectoryTable.values
+PLAYER_COLUMNS = ("px", "py", "pz", "vx", "vy", "vz", "ax", "ay", "az", "yaw")
+
+# Run of consecutive rows with the same mode: rows [start_row, end_row), from start_time until
+# end_time (the start of the next phase, or the last sample time for the last phase)
+Phase = namedtuple("Phase", ["mode", "start_time", "end_time", "start_row", "end_row"])
+
+# Read-only arrays shared by every player of the same trajectory:
+# times (N,), values (N, 10) with the PLAYER_COLUMNS, modes (N,), and the tuple of Phases
+TrajectoryTable = namedtuple("TrajectoryTable", ["times", "values", "modes", "phases"])
+
+
+def build_phase_index(times, modes):
+    """
+    Phases of a trajectory, in time order.
+
+    Args:
+        times (ndarray): Sorted sample times
+        modes (ndarray): Mode code of every sample
+
+    Returns:
+        Tuple of Phase, one per run of consecutive samples with the same mode.
+    """
+    starts = np.flatnonzero(np.diff(modes) != 0) + 1
+    start_rows = np.r_[0, starts]
+    end_rows = np.r_[starts, times.size]
+    end_times = np.r_[times[starts], times[-1]]
+    return tuple(
+        Phase(int(modes[start]), float(times[start]), float(end_time), int(start), int(end))
+        for start, end, end_time in zip(start_rows, end_rows, end_times)
+    )
+
+
+def find_phase(phases, mode):
+    """First Phase of `phases` flown in `mode`, or None."""
+    return next((phase for phase in phases if phase.mode == mode), None)
+
+
+def build_trajectory_table(trajectory):
+    """
+    Prepare a trajectory for playback.
+
+    Args:
+        trajectory (mapping): Columns "t", PLAYER_COLUMNS and "mode", e.g. the result of
+            load_trajectory or compile_mission. "yaw" defaults to 0 when missing.
+
+    Returns:
+        A TrajectoryTable whose arrays are marked read-only so it can be shared between players,
+        with its phase index.
+    """
+    times = np.array(trajectory["t"], dtype=np.float64)
+    if times.size == 0:
+        raise ValueError("Cannot play an empty trajectory")
+    if np.any(np.diff(times) < 0):
+        raise ValueError("Trajectory times must be sorted")
+
+    values = np.column_stack([
+        np.asarray(trajectory[name], dtype=np.float64) if name in _columns(trajectory) else np.zeros(times.size)
+        for name in PLAYER_COLUMNS
+    ])
+    modes = np.array(trajectory["mode"])
+    for array in (times, values, modes):
+        array.flags.writeable = False
+    return TrajectoryTable(times, values, modes, build_phase_index(times, modes))
+
+
+class TrajectoryPlayer:
+    """
+    Interpolating player over a trajectory sorted by time.
+
+    The trajectory arrays are never modified: the position offset is added at lookup time, so
+    many players (one per drone) can share the same TrajectoryTable.
+
+    Attributes:
+        times (ndarray): Sorted sample times, in seconds
+        values (ndarray): (N, 10) array with the PLAYER_COLUMNS of every sample
+        modes (ndarray): Flight mode code of every sample
+        phases (tuple): Phase index of the trajectory (see build_phase_index)
+        offset (tuple): (x, y, z) offset added to the position of every sample
+    """
+
+    def __init__(self, trajectory, offset=(0.0, 0.0, 0.0)):
+        """
+        Args:
+            trajectory (TrajectoryTable or mapping): Shared table, or columns to build one from
+                (see build_trajectory_table)
+            offset (tuple, optional): (x, y, z) position offset
+        """
+        if not isinstance(trajectory, TrajectoryTable):
+            trajectory = build_trajectory_table(trajectory)
+        self.times, self.values, self.modes, self.phases = trajectory
+        self.offset = tuple(float(o) for o in offset)
+        self._cursor = 0
+
+    @property
+    def start_time(self):
+        return float(self.times[0])
+
+    @property
+    def end_time(self):
+        return float(self.times[-1])
+
+    def phase(self, mode):
+        """First Phase flown in `mode`, or None."""
+        return find_phase(self.phases, mode)
+
+    def phase_at(self, t):
+        """Phase containing mission time t (clamped to the trajectory)."""
+        row = self.index_at(t)
+        starts = [phase.start_row for phase in self.phases]
+        return self.phases[int(np.searchsorted(starts, row, side="right")) - 1]
+
+    def index_at(self, t):
+        """
+        Index i of the sample with times[i] <= t < times[i + 1], clamped to the trajectory.
+
+        Consecutive queries with increasing t (the normal case in the control loop) only move
+        the cursor forward, other queries fall back to a binary search.
+        """
+        times = self.times
+        last = times.size - 1
+        i = self._cursor
+        if times[i] <= t:
+            # Fast path: same or next sample as the previous query
+            if i == last or t < times[i + 1]:
+                return i
+            if i + 1 == last or t < times[i + 2]:
+                self._cursor = i + 1
+                return i + 1
+        i = int(np.searchsorted(times, t, side="right")) - 1
+        self._cursor = min(max(i, 0), last)
+        return self._cursor
+
+    def sample(self, t):
+        """
+        Interpolated trajectory state at mission time t.
+
+        Before the first sample the first sample is returned, after the last sample the last one.
+        The mode is the one of the sample at or before t.
+        """
+        i = self.index_at(t)
+        if i + 1 < self.times.size and self.times[i] <= t:
+            t0, t1 = self.times[i], self.times[i + 1]
+            fraction = (t - t0) / (t1 - t0) if t1 > t0 else 0.0
+            row = (self.values[i] + fraction * (self.values[i + 1] - self.values[i])).tolist()
+            yaw0, yaw1 = float(self.values[i, 9]), float(self.values[i + 1, 9])
+            row[9] = float(wrap_degrees(yaw0 + fraction * wrap_degrees(yaw1 - yaw0)))  # shortest arc
+        else:
+            row = self.values[i].tolist()
+            row[9] = wrap_degrees(row[9])
+
+        ox, oy, oz = self.offset
+        return TrajectorySample(
+            t,
+            (row[0] + ox, row[1] + oy, row[2] + oz),
+            (row[3], row[4], row[5]),
+            (row[6], row[7], row[8]),
+            row[9],
+            int(self.modes[i]),
+        )
+
+    def sample_many(self, query_times):
+        """
+        Vectorized lookup for an array of mission times.
+
+        Returns:
+            (values, modes): (M, 10) array of interpolated PLAYER_COLUMNS (offset applied) and the
+            mode of every query time.
+        """
+        query_times = np.asarray(query_times, dtype=np.float64)
+        values = np.column_stack([np.interp(query_times, self.times, self.values[:, k]) for k in range(len(PLAYER_COLUMNS) - 1)]
+                                 + [wrap_degrees(np.interp(query_times, self.times, unwrap_degrees(self.values[:, 9])))])
+        values[:, :3] += self.offset
+        indices = np.clip(np.searchsorted(self.times, query_times, side="right") - 1, 0, self.times.size - 1)
+        return values, self.modes[indices]
+
+
+def _columns(trajectory):
+    names = getattr(getattr(trajectory, "dtype", None), "names", None)
+    return names if names is not None else trajectory.keys()
@@ -0,0 +1,21 @@
+"""
+Generate the per-drone missions of a swarm show from a JSON spec (see functions/mission_batch.py).
+
+The missions are generated in parallel; missions whose parameters did not change since the last
+run are skipped:
+    python generate_missions.py swarm_missions.json
+    python generate_missions.py swarm_missions.json --workers 8 --force
+"""
+
+import argparse
+
+from functions.mission_batch import generate_batch
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the missions of a swarm show from a JSON spec.")
+    parser.add_argument("spec", help="JSON spec of the missions (see functions/mission_batch.py)")
+    parser.add_argument("--workers", type=int, default=None, help="Processes generating missions (default: number of CPUs)")
+    parser.add_argument("--force", action="store_true", help="Regenerate every mission, even the up-to-date ones")
+    args = parser.parse_args()
+    generate_batch(args.spec, max_workers=args.workers, force=args.force)
@@ -8,6 +8,8 @@ from ultralytics import YOLO
 from ultralytics.utils import LOGGER
 from ultralytics.utils.plotting import Annotator, colors
 from opencv_gazebo import Video
+from functions.detection_protocol import encode_detection
+from functions.latency_trace import LatencyTrace, TRACKER_STAGES
 import socket
 import json 
 
@@ -19,6 +21,8 @@ show_fps = True  # Se True, mostra o FPS atual no canto superior esquerdo
 show_conf = True  # Exibe ou oculta a pontuação de confiança
 save_video = True  # Defina como True para salvar o vídeo de saída
 video_output_path = "interactive_tracker_output.avi"  # Nome do arquivo de vídeo de saída
+latency_trace_file = None  # Caminho de um arquivo JSON-lines com os timestamps de cada frame enviado (None para desativar)
+latency_summary_interval = 5.0  # Intervalo (s) entre os resumos de latência (p50/p95/p99) por etapa
 
 
 conf = 0.6  # Confiança mínima para deteção de objetos (menor = mais deteções, possivelmente mais falsos positivos)
@@ -58,9 +62,13 @@ selected_center = None
 
 UDP_IP = "127.0.0.1"  # IP do receptor, nesse caso, localhost
 UDP_PORT = 9999       # Porta UDP para enviar os dados
+use_binary_protocol = True  # True: mensagem binária com sequência e timestamps, False: JSON antigo
 sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM) # Cria o socket UDP
 last_udp_send = time.time()  # Marca o tempo do último envio UDP
 
+# Latência por etapa: chegada do frame -> leitura no loop -> fim da inferência -> envio UDP
+latency_trace = LatencyTrace("tracker", TRACKER_STAGES, summary_interval=latency_summary_interval, trace_file=latency_trace_file)
+
 # -----------------------------------------------
 
 
@@ -168,10 +176,11 @@ fps_counter, fps_timer, fps_display = 0, time.time(), 0
 
 # Loop principal
 while True:
-    if not video.frame_available():
+    # Frame, número de sequência e instante em que foi recebido, lidos de uma só vez (publicados juntos pela thread do GStreamer)
+    im, frame_seq, capture_ts = video.latest_frame()
+    if im is None:
         continue
-
-    im = video.frame()  # Captura o frame atual do vídeo
+    pickup_ts = time.time()                 # Instante em que o loop leu o frame
     print(f"✅ Frame recebido: shape={im.shape}")
 
 
@@ -181,11 +190,15 @@ while True:
         vw = cv2.VideoWriter(video_output_path, cv2.VideoWriter_fourcc(*"mp4v"), 30, (w, h))  # ajuste o FPS conforme necessário
 
     results = model.track(im, conf=conf, iou=iou, max_det=max_det, tracker=tracker, **track_args)  # Executa o rastreamento no frame atual
+    inference_ts = time.time()                                                                     # Instante do fim da inferência
     annotator = Annotator(im)                                                                      # Cria um objeto Annotator para desenhar caixas e rótulos
     detections = results[0].boxes.data if results[0].boxes is not None else []                     # Obtém as deteções do primeiro resultado
     detected_objects = []                                                                          # Lista para armazenar os objetos detetados
     object_detected = False                                                                        # Variável para verificar se algum objeto foi detetado
     object_position = None                                                                         # Posição do objeto detetado                                              
+    object_bbox = None                                                                             # Caixa delimitadora do objeto detetado
+    object_conf = 0.0                                                                              # Confiança da deteção
+    object_track_id = -1                                                                           # ID de rastreamento do objeto detetado
 
     for track in detections:                                                                  
         track = track.tolist()
@@ -199,6 +212,9 @@ while True:
         if not object_detected:                 # Ao detetar:
             cx, cy = get_center(x1, y1, x2, y2)  # Calcula o centro da caixa delimitadora
             object_position = (cx, cy)           # Armazena a posição do objeto detetado
+            object_bbox = (x1, y1, x2, y2)       # Armazena a caixa delimitadora
+            object_conf = float(track[5] if len(track) == 7 else track[4])  # Armazena a confiança
+            object_track_id = track_id           # Armazena o ID de rastreamento
             object_detected = True               # Marca que um objeto foi detetado
 
         color = colors(track_id, True)          
@@ -246,10 +262,20 @@ while True:
             "detected": object_detected,  # (True/False) 
             "position": object_position if object_position else [None, None] # (x,y) ou [None, None] se não detetado
         }
-        message = json.dumps(data).encode('utf-8')
+        send_ts = time.time()
+        if use_binary_protocol:
+            # Mensagem binária versionada (functions/detection_protocol.py) com sequência do frame e timestamps
+            data.update(seq=frame_seq, track_id=object_track_id, confidence=object_conf)
+            message = encode_detection(
+                frame_seq, object_detected, bbox=object_bbox, confidence=object_conf, track_id=object_track_id,
+                image_size=(im.shape[1], im.shape[0]), capture_ts=capture_ts, inference_ts=inference_ts, send_ts=send_ts,
+            )
+        else:
+            message = json.dumps(data).encode('utf-8')
         try:
             sock.sendto(message, (UDP_IP, UDP_PORT))
             print(f"📤 Enviado UDP: {data}")
+            latency_trace.record({"capture": capture_ts, "pickup": pickup_ts, "inference": inference_ts, "send": send_ts}, seq=frame_seq)
         except Exception as e:
             print(f"Erro ao enviar UDP: {e}")
         last_udp_send = current_time
@@ -273,6 +299,9 @@ while True:
         LOGGER.info("🟢 TRACKING RESET")
         selected_object_id = None
 
+latency_trace.print_summary()
+latency_trace.close()
+
 if save_video and vw is not None:  
     vw.release()
 cv2.destroyAllWindows()
\ No newline at end of file
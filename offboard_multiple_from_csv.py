@@ -1,56 +1,56 @@
-import os
 import asyncio
+import math
 from mavsdk import System
-import csv
 from mavsdk.offboard import PositionNedYaw, VelocityNedYaw, AccelerationNed, OffboardError
 from mavsdk.telemetry import LandedState
 from mavsdk.action import ActionError
 from mavsdk.telemetry import *
-import subprocess
-import signal
-import socket
-import json
 
+from functions.trajectory_cache import get_trajectory_table
+from functions.detection_receiver import start_detection_receiver
+from functions.detection_protocol import SequenceFilter
+from functions.trajectory_player import TrajectoryPlayer
+from functions.piecewise_trajectory import PiecewisePlayer, PiecewiseTable, piecewise_to_trajectory_table
+from functions.tick_scheduler import DeadlineScheduler, POLICY_CATCH_UP
+from functions.latency_trace import LatencyTrace, OFFBOARD_STAGES
+from functions.telemetry_store import TelemetryStore, STREAMS
+from functions.flight_recorder import SETPOINT_COLUMNS, DETECTION_COLUMNS
+from functions.setpoint_sender import SetpointSender
+from functions.swarm_manifest import ROLE_CAMERA, default_swarm_manifest
+from functions.mavsdk_supervisor import MavsdkServerPool, ReadinessTracker, first, retry
+from functions.mission_clock import MissionClock
+from functions.clock import REAL_CLOCK
+from functions.separation_monitor import SeparationMonitor, HOLD_CLOSING, HOLD_NONE
+from functions.mission_resume import resume_time, resume_trajectory_table
+from functions.bearing_filter import BearingFilter, alpha_smoothed_yaw, bearing_yaw, heading_at, pixel_to_angle
 
-global_position_telemetry = {}
 
-# Função para obter a posição global do drone
-async def get_global_position_telemetry(drone_id, drone):
-    async for global_position in drone.telemetry.position():
-        global_position_telemetry[drone_id] = global_position
-        break
+YAW_FILTER_BEARING = "bearing"      # yaw na direção do alvo prevista pelo filtro alfa-beta no instante do tick
+YAW_FILTER_LEGACY = "legacy"        # suavização alfa do último desvio em píxeis (comportamento anterior)
 
-# ------------------------------------------------------------------
 
-# Função para escutar mensagens UDP e chamar a função de callback
-async def listen_udp_for_detection(udp_listen_port, detection_callback):
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    sock.bind(("127.0.0.1", udp_listen_port))
-    sock.setblocking(False)
+# Telemetria contínua de cada drone (posição, atitude, velocidade NED, estado de pouso), por drone_id
+telemetry_stores = {}
+# Scheduler do loop de setpoints de cada drone (atraso dos ticks, latência de envio), por drone_id
+tick_schedulers = {}
 
-    loop = asyncio.get_event_loop()
 
-    while True:
-        try:
-            # recvfrom retorna (data, addr)
-            data, _ = await loop.run_in_executor(None, sock.recvfrom, 1024)
-            message = json.loads(data.decode("utf-8"))
-            await detection_callback(message)
-        except BlockingIOError:
-            # Nenhum dado disponível no momento
-            await asyncio.sleep(0.05)
-        except json.JSONDecodeError:
-            print("❌ Mensagem recebida não é JSON válido.")
-        except Exception as e:
-            print(f"❌ Erro inesperado ao receber/parsing UDP: {e}")
-        await asyncio.sleep(0.01)
+def mavsdk_system(drone_id, grpc_port):
+    return System(mavsdk_server_address="127.0.0.1", port=grpc_port)
 
 # ------------------------------------------------------------------
 
-
 # Função principal para executar o drone
-async def run_drone(drone_id, trajectory_offset, udp_port, time_offset, altitude_offset):
+async def run_drone(drone_id, trajectory_offset, udp_port, time_offset, altitude_offset,
+                    setpoint_rate_hz=10.0, tick_policy=POLICY_CATCH_UP, tick_metrics_file=None,
+                    latency_trace_file=None, trajectory_file=None, camera_drone=None, grpc_port=None,
+                    readiness=None, startup_timeout=30.0, mission_clock=None, yaw_filter=YAW_FILTER_BEARING,
+                    system_factory=None, clock=REAL_CLOCK, recorder=None, setpoint_keepalive=0.25,
+                    resume_phase=None, resume_at=None, transition_speed=2.0, min_transition=0.0,
+                    separation_monitor=None, landing_timeout=120.0):
     camera_drone_id = 2           # ID do drone que está com a câmara
+    if camera_drone is None:
+        camera_drone = drone_id == camera_drone_id          # Papel do drone (manifesto do enxame ou ID por omissão)
     image_width = 640             # dimensões da imagem da câmara
     image_height = 480
     image_center = (image_width // 2, image_height // 2)   # centro da imagem
@@ -59,11 +59,13 @@ async def run_drone(drone_id, trajectory_offset, udp_port, time_offset, altitude
     horizontal_fov = 87                                # Largura do campo de visão horizontal da câmara em graus
     degrees_per_pixel = horizontal_fov / image_width
 
-    grpc_port = 50040 + drone_id                           # porta gRPC para cada drone
+    if grpc_port is None:
+        grpc_port = 50040 + drone_id                       # porta gRPC para cada drone
 
     # Descrição dos modos de voo
     mode_descriptions = {
         0: "On the ground",
+        5: "Transition to the resume point",
         10: "Initial climbing state",
         20: "Initial holding after climb",
         30: "Moving to start point",
@@ -76,8 +78,12 @@ async def run_drone(drone_id, trajectory_offset, udp_port, time_offset, altitude
         100: "Landing"
     }
     
-    # Inicializa o drone com o endereço gRPC e a porta UDP
-    drone = System(mavsdk_server_address="127.0.0.1", port=grpc_port)
+    def mark_ready(stage):
+        if readiness is not None:
+            readiness.mark(drone_id, stage)                 # Tempo até cada etapa do arranque (ligado, saúde, armado, offboard)
+
+    # Inicializa o drone com o endereço gRPC e a porta UDP (ou com o simulador em processo, ver functions/fake_mavsdk.py)
+    drone = (system_factory or mavsdk_system)(drone_id, grpc_port)
     await drone.connect(system_address=f"udp://:{udp_port}")
     print(f"Drone connecting with UDP: {udp_port}")
 
@@ -86,168 +92,273 @@ async def run_drone(drone_id, trajectory_offset, udp_port, time_offset, altitude
     tracking_active = False             # Flag para indicar se o tracking está ativo
     udp_listen_port = 9999              # Porta onde o tracker envia
     object_position_global = None       # Posição global do objeto detetado
+    sequence_filter = SequenceFilter()  # Descarta mensagens binárias atrasadas ou repetidas; aceita o reinício do tracker
+    pending_latency_stamps = None       # Timestamps da última deteção ainda não usada num setpoint de yaw
+    latency_trace = None                # Latência por etapa, da chegada do frame até ao setpoint de yaw
+    bearing_filter = BearingFilter()    # Direção do alvo (graus) filtrada e prevista até ao tick atual
+    last_yaw_command = None             # Último yaw enviado, usado como rumo se ainda não houver atitude
 
 
     # Trata de as mensagens de deteção recebidas via UDP
     async def on_detection_message(message):
-        nonlocal detection_buffer, tracking_active, object_position_global      # vareáveis externas
+        nonlocal detection_buffer, tracking_active, object_position_global, pending_latency_stamps      # vareáveis externas
         print(f"🛰️ UDP: {message}")
+        seq = message.get("seq")                                                # sequência do frame (ausente nas mensagens JSON)
+        if seq is not None:
+            resets = sequence_filter.resets
+            if not sequence_filter.accept(seq, message.get("send_ts")):         # Ignora mensagens antigas ou repetidas
+                print(f"⚠️ Drone {drone_id}: detection seq {seq} dropped (last {sequence_filter.last_seq}), "
+                      f"{sequence_filter.dropped} dropped so far")
+                return
+            if sequence_filter.resets > resets:
+                print(f"🔄 Drone {drone_id}: detection sequence restarted at {seq} (tracker restarted)")
         detected = message.get("detected", False)                               # verifica se o objeto foi detetado (True/False)
         pos = message.get("position", None)                                     # posição do objeto detetado (x, y) em píxeis       
 
         if detected and pos and all(p is not None for p in pos):                # Se detected for True e pos não for None:
             detection_buffer.append(True)                                           # Adicione True ao buffer de deteções
             object_position_global = pos                                            # Atualiza a posição global do objeto detetado
+            update_bearing(message, pos[0])
+            message["handled_ts"] = clock.time()
+            pending_latency_stamps = message                                        # Timestamps até ao próximo setpoint de yaw
         else:
             detection_buffer.append(False)                                      # Se detected for False, adiciona False ao buffer de deteções     
 
         detection_buffer = detection_buffer[-5:]
 
+        if detection_table is not None:
+            x, y = pos if detected and pos and all(p is not None for p in pos) else (math.nan, math.nan)
+            detection_table.append((clock.monotonic(), math.nan if seq is None else seq, float(detected), x, y,
+                                    message.get("confidence", math.nan), message.get("track_id", math.nan),
+                                    message.get("capture_ts") or math.nan, message.get("receive_ts", math.nan)))
+
         if detection_buffer.count(True) >= 2:                                   # Se houver ao menos 2 trues no buffer de deteções:
             if not tracking_active:
                 print(f"🟢 Drone {drone_id}: MODO TRACKING ATIVADO")
             tracking_active = True                                              # Ativa o modo de tracking
 
-    # Inicia a escuta UDP para deteções se este for o drone com a câmara
-    if drone_id == camera_drone_id:
-        asyncio.create_task(listen_udp_for_detection(udp_listen_port, on_detection_message))
+    # Direção do alvo no mundo = rumo do drone no instante da captura + ângulo do alvo na imagem
+    def update_bearing(message, pixel_x):
+        measured_ts = message.get("capture_ts") or message["receive_ts"]              # Instante da captura (clock.time())
+        heading = heading_at(telemetry, clock.monotonic() - (clock.time() - measured_ts))  # Rumo nesse instante (relógio monotónico)
+        if heading is None:
+            heading = last_yaw_command
+        if heading is None:
+            return
+        bearing_filter.update(heading + pixel_to_angle(pixel_x, image_width, horizontal_fov), measured_ts, message.get("track_id"))
 
-    # Conexão do drone e obtenção da posição global
-    asyncio.ensure_future(get_global_position_telemetry(drone_id, drone))
-    
-    await asyncio.sleep(time_offset)
-    
-    async for state in drone.core.connection_state():
-        if state.is_connected:
-            print(f"Drone id {drone_id} connected on Port: {udp_port} and grpc Port: {grpc_port}")
-            break
+    # Tabelas de gravação do voo (setpoints enviados e deteções recebidas), se houver gravador
+    setpoint_table = recorder.table(drone_id, "setpoint", SETPOINT_COLUMNS) if recorder is not None else None
+    detection_table = recorder.table(drone_id, "detection", DETECTION_COLUMNS) if recorder is not None and camera_drone else None
+
+    # Inicia a escuta UDP para deteções se este for o drone com a câmara
+    # Cada datagrama é entregue assim que chega; se houver várias mensagens em fila, só a mais recente é usada
+    detection_receiver = None
+    telemetry = None
+    # Arranque: se falhar (timeout, offboard recusado, cancelamento), liberta a telemetria, a porta UDP e o ficheiro de
+    # latências antes de propagar o erro, para um novo arranque do drone no mesmo processo poder voltar a usá-las
+    try:
+        if camera_drone:
+            latency_trace = LatencyTrace(f"drone {drone_id}", OFFBOARD_STAGES, trace_file=latency_trace_file)
+            detection_receiver = await start_detection_receiver(udp_listen_port, on_detection_message, clock=clock.time)
+
+        # Subscrições de telemetria abertas durante todo o voo; o loop de controlo lê os valores do store
+        on_telemetry_sample = None
+        if recorder is not None:                # Gravação de toda a telemetria recebida (functions/flight_recorder.py)
+            telemetry_tables = {name: recorder.table(drone_id, name, ("time",) + columns) for name, (_, columns, _) in STREAMS.items()}
+            on_telemetry_sample = lambda name, timestamp, row: telemetry_tables[name].append((timestamp, *row))
+        telemetry = TelemetryStore(drone, clock=clock.monotonic, on_sample=on_telemetry_sample)
+        telemetry.start()
+        telemetry_stores[drone_id] = telemetry
     
-    async for health in drone.telemetry.health():
-        if health.is_global_position_ok:
-            print(f"Global position estimate ok {drone_id}")
-            break
-    # -----------------------------------------------------------------     
+        # Ligação, saúde, arm e offboard com timeouts e novas tentativas; os drones arrancam todos em paralelo
+        await first(drone.core.connection_state(), lambda state: state.is_connected, startup_timeout)
+        print(f"Drone id {drone_id} connected on Port: {udp_port} and grpc Port: {grpc_port}")
+        mark_ready("connected")
+
+        await first(drone.telemetry.health(), lambda health: health.is_global_position_ok, startup_timeout)
+        print(f"Global position estimate ok {drone_id}")
+        mark_ready("healthy")
+        # -----------------------------------------------------------------     
     
-    global_position_telemetry[drone_id] = global_position_telemetry[drone_id]
-    print(f"Home Position of {drone_id} set to: {global_position_telemetry[drone_id]}")
-    print(f"-- Arming {drone_id}")
-    await drone.action.arm()                                                                # Arma o drone
-    print(f"-- Setting initial setpoint {drone_id}")
-    await drone.offboard.set_position_ned(PositionNedYaw(0.0, 0.0, 0.0, 0.0))               # Define o ponto inicial do drone
+        home_position = await asyncio.wait_for(telemetry.wait_for("position"), startup_timeout)  # Primeira posição global recebida
+        print(f"Home Position of {drone_id} set to: {home_position}")
+        print(f"-- Arming {drone_id}")
+        await retry(drone.action.arm, f"Arming {drone_id}", retry_on=(ActionError,))          # Arma o drone
+        mark_ready("armed")
+        print(f"-- Setting initial setpoint {drone_id}")
+        resuming = resume_phase is not None or resume_at is not None     # Retoma a missão a meio (fase ou tempo da missão)
+        if resuming:
+            # Ao retomar, o drone pode estar no ar: o ponto inicial é a posição atual, não a origem
+            current = (await asyncio.wait_for(telemetry.wait_for("position_ned"), startup_timeout)).position
+            attitude = telemetry.latest_row("attitude")
+            await drone.offboard.set_position_ned(PositionNedYaw(current.north_m, current.east_m, current.down_m,
+                                                                 float(attitude[1][2]) if attitude is not None else 0.0))
+        else:
+            await drone.offboard.set_position_ned(PositionNedYaw(0.0, 0.0, 0.0, 0.0))           # Define o ponto inicial do drone
     
-    print(f"-- Starting offboard {drone_id}")
-    try:
-        await drone.offboard.start()                                                        # Inicia o modo offboard(modo de voo autônomo pelo csv)
-    except OffboardError as error:
-        print(f"-- Disarming {drone_id}")
-        await drone.action.disarm()                                                         # Desarma o drone se falhar ao iniciar o modo offboard  
-        return
-
-    # Escolha de arquivo de trajetória com base no drone_id
-    if drone_id % 2 == 0:
-        trajectory_file = "shapes/active.csv"   # Trajetória para drones com ID par (drone com câmara)
-    else:
-        trajectory_file = "shapes/active2.csv"  # Trajetória para drones com ID ímpar
-
-    # Lê o arquivo de trajetória e aplica os offsets
-    waypoints = []
-    with open(trajectory_file, newline="") as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            t = float(row["t"])                                                 # Tempo do waypoint
-            px = float(row["px"]) + trajectory_offset[0]                        # Posição x do waypoint com offset
-            py = float(row["py"]) + trajectory_offset[1]                        # Posição y do waypoint com offset
-            pz = float(row["pz"]) + trajectory_offset[2] - altitude_offset      # Posição z do waypoint com offset e altitude
-            vx = float(row["vx"])                                               # Velocidade x do waypoint
-            vy = float(row["vy"])                                               # Velocidade y do waypoint 
-            vz = float(row["vz"])                                               # Velocidade z do waypoint
-            ax = float(row["ax"])                                               # Aceleração x do waypoint
-            ay = float(row["ay"])                                               # Aceleração y do waypoint    
-            az = float(row["az"])                                               # Aceleração z do waypoint
-            yaw = float(row["yaw"])                                             # Angulo Yaw do waypoint
-            mode_code = int(row["mode"])                                        # Código do modo do waypoint
-            
-            waypoints.append((t, px, py, pz, vx, vy, vz, ax, ay, az, mode_code))
+        print(f"-- Starting offboard {drone_id}")
+        try:
+            await retry(drone.offboard.start, f"Starting offboard {drone_id}", retry_on=(OffboardError,))   # Inicia o modo offboard(modo de voo autônomo pelo csv)
+        except (OffboardError, asyncio.TimeoutError) as error:
+            print(f"-- Disarming {drone_id}")
+            await drone.action.disarm()                                                         # Desarma o drone se falhar ao iniciar o modo offboard  
+            raise RuntimeError(f"offboard start failed: {error}") from error                    # O drone conta como falhado, não como concluído
+        mark_ready("offboard")
+
+        # Relógio da missão partilhado pelo enxame; um drone isolado começa a missão agora
+        if mission_clock is None:
+            mission_clock = MissionClock(clock=clock.monotonic)
+            mission_clock.start_in(0.0)
+        await mission_clock.wait_started()          # Barreira de início: todos os drones em offboard
+
+        # Escolha de arquivo de trajetória com base no drone_id (se não vier do manifesto)
+        if trajectory_file is None:
+            if drone_id % 2 == 0:
+                trajectory_file = "shapes/active.csv"   # Trajetória para drones com ID par (drone com câmara)
+            else:
+                trajectory_file = "shapes/active2.csv"  # Trajetória para drones com ID ímpar
+
+        # Trajetória lida uma única vez por processo (cache por caminho e mtime) e partilhada entre os drones
+        # O player interpola a trajetória em qualquer instante e aplica os offsets na consulta, sem copiar os dados
+        table = get_trajectory_table(trajectory_file)
+        offset = (trajectory_offset[0], trajectory_offset[1], trajectory_offset[2] - altitude_offset)
+        if resuming and isinstance(table, PiecewiseTable):
+            # A retoma trabalha sobre amostras: trajetória polinomial amostrada ao ritmo dos setpoints
+            table = piecewise_to_trajectory_table(table, 1.0 / setpoint_rate_hz)
+        if resuming:
+            # Ponto de retoma pelo índice de fases da trajetória; o drone voa um segmento de transição desde a posição
+            # atual (sem o offset, no referencial do ficheiro) até esse ponto e depois o resto da missão
+            resume_from = resume_time(table, phase=resume_phase, time=resume_at)
+            current = (await asyncio.wait_for(telemetry.wait_for("position_ned"), startup_timeout)).position
+            position = (current.north_m - offset[0], current.east_m - offset[1], current.down_m - offset[2])
+            table, transition = resume_trajectory_table(table, resume_from, position, move_speed=transition_speed,
+                                                        min_transition=min_transition)
+            print(f"Drone {drone_id} resuming the mission at t={resume_from:.2f} s after a {transition:.2f} s transition")
+        # Trajetória polinomial por troços (.npz): avaliada no instante exato de cada tick, sem reamostragem
+        player_class = PiecewisePlayer if isinstance(table, PiecewiseTable) else TrajectoryPlayer
+        player = player_class(table, offset=offset)
+
+        print(f"-- Performing trajectory {drone_id}")
+        total_duration = player.end_time        # Duração total da trajetória
+        last_mode = 0                           # Último modo de voo
+
+        # Ticks com deadlines absolutos no relógio da missão: o tempo gasto no envio não acumula atraso
+        # O drone começa a trajetória time_offset segundos após o início da missão; se chegar atrasado, entra no tempo atual
+        scheduler = DeadlineScheduler(rate_hz=setpoint_rate_hz, policy=tick_policy, clock=mission_clock.clock, sleep=clock.sleep)
+        tick_schedulers[drone_id] = scheduler
+
+        async def send_setpoint(position, velocity, acceleration, yaw):
+            await drone.offboard.set_position_velocity_acceleration_ned(    # Define a posição, velocidade e aceleração NED
+                PositionNedYaw(*position, yaw),
+                VelocityNedYaw(*velocity, yaw),
+                AccelerationNed(*acceleration)
+            )
 
-    print(f"-- Performing trajectory {drone_id}")
-    total_duration = waypoints[-1][0]       # Duração total da trajetória
-    t = 0                                   # Tempo atual
-    last_mode = 0                           # Último modo de voo
-    alpha = 0.5                             # Fator de suavização do yaw
+        # Setpoints iguais ao último enviado (fases de espera) só são reenviados a cada setpoint_keepalive segundos
+        # (0 para enviar em todos os ticks)
+        sender = SetpointSender(send_setpoint, keepalive_interval=setpoint_keepalive, clock=clock.monotonic)
+        paused_time = 0.0                       # Tempo total em pausa pelo monitor de separação
+        hold_started = None                     # Tempo da missão em que a pausa atual começou
+        join_time = mission_clock.mission_time(time_offset)
+        if join_time > 0:
+            print(f"Drone {drone_id} joining the mission late, at t={join_time:.2f} s")
+    except BaseException:
+        if telemetry is not None:
+            telemetry.stop()
+        if detection_receiver is not None:
+            detection_receiver.close()
+        if latency_trace is not None:
+            latency_trace.close()
+        raise
 
     # Loop principal para executar a trajetória
-    while t <= total_duration:
-        current_waypoint = None
-        for waypoint in waypoints:              # Itera sobre os waypoints
-            if t <= waypoint[0]:
-                current_waypoint = waypoint
-                break
-
-        if current_waypoint is None:            
+    async for tick in scheduler.ticks(start=mission_clock.drone_start(time_offset)):
+        # Pausa pedida pelo monitor de separação: o drone mantém a posição e a trajetória para no tempo,
+        # continuando do mesmo ponto quando for libertado
+        if separation_monitor is not None:
+            held = separation_monitor.is_held(drone_id)
+            if held and hold_started is None:
+                hold_started = tick.mission_time
+                print(f"⏸️ Drone {drone_id}: paused by the separation monitor")
+            elif not held and hold_started is not None:
+                paused_time += tick.mission_time - hold_started
+                hold_started = None
+                print(f"▶️ Drone {drone_id}: resumed after {paused_time:.2f} s paused in total")
+
+        t = (tick.mission_time if hold_started is None else hold_started) - paused_time     # Tempo atual da trajetória deste drone
+        if t > total_duration:
             break
 
-        position = current_waypoint[1:4]        # Posição do waypoint (px, py, pz)       
-        velocity = current_waypoint[4:7]        # Velocidade do waypoint (vx, vy, vz)   
-        acceleration = current_waypoint[7:10]   # Aceleração do waypoint (ax, ay, az)
-        mode_code = current_waypoint[-1]        # Modo do waypoint
+        setpoint = player.sample(t)             # Estado interpolado da trajetória no instante t (O(1) com cursor, O(log n) com bisect)
+        position = setpoint.position            # Posição (px, py, pz) com offset
+        velocity = setpoint.velocity if hold_started is None else (0.0, 0.0, 0.0)              # Velocidade (vx, vy, vz)
+        acceleration = setpoint.acceleration if hold_started is None else (0.0, 0.0, 0.0)      # Aceleração (ax, ay, az)
+        yaw = setpoint.yaw                      # Angulo Yaw da trajetória
+        mode_code = setpoint.mode               # Modo da trajetória
         
         if last_mode != mode_code:               
             print(f"Drone id: {drone_id}: Mode number: {mode_code}, Description: {mode_descriptions[mode_code]}")
             last_mode = mode_code
             
-        if drone_id == camera_drone_id and tracking_active and object_position_global:  # Se for o drone com a câmara e o tracking estiver ativo:
-            px, _ = object_position_global                   # Coordenada x do objeto detetado
-            center_x = image_width // 2                      # Centro da imagem
-            graus_por_pixel = horizontal_fov / image_width   # Graus por pixel
-
-            desvio_px = px - center_x                         # Desvio do objeto em relação ao centro da imagem
-            angulo = desvio_px * graus_por_pixel              # Converte o desvio em ângulo
-
-            if abs(angulo) > 0.5:                                    # Se o desvio for maior que 0.5 graus, corrige o yaw
-                max_angulo = 45                                      # Ângulo máximo de correção (45 graus, por exemplo)
-                angulo = max(min(angulo, max_angulo), -max_angulo)
-                target_yaw = yaw + angulo
-
-                # Fator de suavização com base no desvio (0.05 a 0.5, por exemplo)
-                max_alpha = 0.5
-                min_alpha = 0.05
-                max_desvio_px = center_x  # desvio máximo possível (metade da imagem)
-
-                # Normaliza desvio para [0, 1] e aplica interpolação linear
-                alpha = min_alpha + (max_alpha - min_alpha) * min(abs(desvio_px) / max_desvio_px, 1.0)
-
-                # Suaviza o yaw
-                new_yaw = (1 - alpha) * yaw + alpha * target_yaw
-
-                print(f"🎯 Corrigindo yaw: desvio_px={desvio_px}, angulo={angulo:.2f}°, alpha={alpha:.2f} -> new_yaw={new_yaw:.2f}°")
+        if camera_drone and tracking_active and object_position_global:  # Se for o drone com a câmara e o tracking estiver ativo:
+            if yaw_filter == YAW_FILTER_LEGACY:
+                px, _ = object_position_global                   # Coordenada x do objeto detetado
+                new_yaw, angulo, alpha = alpha_smoothed_yaw(yaw, px, image_width, horizontal_fov)
+                if alpha > 0:
+                    print(f"🎯 Corrigindo yaw: desvio_px={px - image_width // 2}, angulo={angulo:.2f}°, alpha={alpha:.2f} -> new_yaw={new_yaw:.2f}°")
             else:
-                new_yaw = yaw
-
-            await drone.offboard.set_position_velocity_acceleration_ned(    # Define a posição, velocidade e aceleração NED com o novo yaw
-                PositionNedYaw(*position, new_yaw),
-                VelocityNedYaw(*velocity, new_yaw),
-                AccelerationNed(*acceleration)
-            )
+                bearing = bearing_filter.predict(clock.time())    # Direção do alvo prevista para agora (None se o track expirou)
+                if bearing is not None:
+                    new_yaw = bearing_yaw(yaw, bearing)          # Aponta para o alvo, no máximo 45° fora do yaw da trajetória
+                    print(f"🎯 Yaw para o alvo: bearing={bearing:.2f}°, taxa={bearing_filter.rate:.1f}°/s -> new_yaw={new_yaw:.2f}°")
+                else:
+                    new_yaw = yaw
         else:
-            await drone.offboard.set_position_velocity_acceleration_ned(    # Define a posição, velocidade e aceleração NED sem correção de yaw
-                PositionNedYaw(*position, yaw),
-                VelocityNedYaw(*velocity, yaw),
-                AccelerationNed(*acceleration)
-            )
-
-
-
-
-        await asyncio.sleep(0.1)    
-        t += 0.1  # Incrementa o tempo atual
+            new_yaw = yaw                                           # Sem correção de yaw
+        last_yaw_command = new_yaw
+
+        send_start = scheduler.clock()
+        tracking_yaw = camera_drone and tracking_active                 # Com o tracking ativo envia em todos os ticks
+        # Keep-alive medido no tempo agendado do tick, para a sequência de envios não depender do atraso do loop
+        sent = await sender.send(position, velocity, acceleration, new_yaw, force=tracking_yaw, now=tick.mission_time)
+        if sent:
+            scheduler.record_send(scheduler.clock() - send_start)   # Latência do envio do setpoint
+        if setpoint_table is not None:
+            setpoint_table.append((send_start, t, *position, *velocity, *acceleration, new_yaw, mode_code, tick.lateness, sent))
+
+        # Regista a latência da deteção usada neste setpoint de yaw (frame -> yaw)
+        if latency_trace is not None and tracking_active and pending_latency_stamps is not None:
+            stamps = {stage: pending_latency_stamps.get(f"{stage}_ts") for stage in OFFBOARD_STAGES}
+            stamps["setpoint"] = clock.time()
+            latency_trace.record(stamps, seq=pending_latency_stamps.get("seq"))
+            pending_latency_stamps = None
+
+    # Atraso dos ticks e latência de envio durante o voo
+    scheduler.print_summary(f"Drone {drone_id}")
+    sender.print_summary(f"Drone {drone_id}")
+    if tick_metrics_file:
+        scheduler.dump(tick_metrics_file)
+
+    if detection_receiver is not None:
+        print(f"Drone {drone_id} detection messages: {detection_receiver.stats()}")
+        detection_receiver.close()
+        latency_trace.print_summary()
+        latency_trace.close()
 
     print(f"-- Shape completed {drone_id}")
     print(f"-- Landing {drone_id}")
     await drone.action.land()           # Inicia o pouso do drone
 
-    async for state in drone.telemetry.landed_state():      
-        if state == LandedState.ON_GROUND:
-            break
+    # Pouso sem confirmação (telemetria perdida ou timeout): o drone conta como falhado em vez de bloquear o enxame
+    try:
+        await asyncio.wait_for(telemetry.wait_for("landed_state", lambda state: state == LandedState.ON_GROUND), landing_timeout)
+    except asyncio.TimeoutError as error:
+        telemetry.stop()
+        raise RuntimeError(f"landing not confirmed after {landing_timeout:.0f} s") from error
+    except BaseException:
+        telemetry.stop()
+        raise
 
     print(f"-- Stopping offboard {drone_id}")
     try:
@@ -257,35 +368,90 @@ async def run_drone(drone_id, trajectory_offset, udp_port, time_offset, altitude
 
     print(f"-- Disarming {drone_id}")
     await drone.action.disarm()             # Desarma o drone
+    telemetry.stop()
 
 # ------------------------------------------------------------------
 
 
+# Executa um conjunto de drones do manifesto neste processo (um único event loop)
+async def run_swarm(specs, mavsdk_server_path="./mavsdk_server", before_start=None, on_drone_done=None,
+                    barrier_timeout=None, start_lead=1.0, system_factory=None, clock=REAL_CLOCK, recorder=None,
+                    resume_phase=None, resume_at=None, min_transition=0.0, min_separation=None, hold_policy=HOLD_NONE):
+    readiness = ReadinessTracker([spec.drone_id for spec in specs], clock=clock.monotonic)
+    mission_clock = MissionClock(clock=clock.monotonic)
+    # Servidores MAVSDK iniciados em paralelo; cada um só conta como pronto quando a sua porta gRPC aceita ligações
+    # Sem servidores quando os drones vêm de system_factory (simulador em processo)
+    servers = MavsdkServerPool(specs if system_factory is None else [], mavsdk_server_path, readiness=readiness)
+    # Monitor da distância mínima entre os drones deste processo, a partir da telemetria (opcional)
+    separation_monitor = None
+    if min_separation is not None:
+        separation_monitor = SeparationMonitor(telemetry_stores, min_separation=min_separation, hold_policy=hold_policy,
+                                               drone_ids=[spec.drone_id for spec in specs], clock=clock.monotonic, sleep=clock.sleep)
+    monitor_task = None
+
+    try:
+        ready_specs = await servers.start() if system_factory is None else specs
+        for drone_id, error in servers.errors.items():
+            print(f"❌ Drone {drone_id} failed: {error}")
+            readiness.discard(drone_id)
+            if on_drone_done is not None:
+                on_drone_done(drone_id, error)
+
+        # Barreira de início: a missão começa quando todos os drones estão em offboard (ou após barrier_timeout;
+        # os drones atrasados entram depois no tempo atual da missão)
+        async def release():
+            try:
+                await asyncio.wait_for(readiness.wait_all("offboard"), barrier_timeout)
+            except asyncio.TimeoutError:
+                print(f"⚠️ Start barrier timed out after {barrier_timeout} s, late drones will join the mission under way")
+            start = None
+            if before_start is not None:
+                start = await before_start()                            # Barreira entre processos (orquestrador)
+            mission_clock.set_start(start if start is not None else mission_clock.clock() + start_lead)
+            print(f"🟢 Mission starts in {mission_clock.start - mission_clock.clock():.2f} s")
+
+        # Ao retomar a missão (resume_phase/resume_at), uma transição de pelo menos min_transition segundos em todos os
+        # drones mantém o desfasamento entre eles
+        async def fly(spec):
+            error = None
+            try:
+                await run_drone(spec.drone_id, spec.trajectory_offset, spec.udp_port, spec.time_offset, spec.altitude_offset,
+                                trajectory_file=spec.trajectory_file, camera_drone=spec.role == ROLE_CAMERA, grpc_port=spec.grpc_port,
+                                readiness=readiness, mission_clock=mission_clock, system_factory=system_factory, clock=clock,
+                                recorder=recorder, resume_phase=resume_phase, resume_at=resume_at, min_transition=min_transition,
+                                separation_monitor=separation_monitor)
+            except Exception as e:
+                error = e
+                print(f"❌ Drone {spec.drone_id} failed: {e}")
+            finally:
+                if spec.drone_id not in readiness.reached["offboard"]:
+                    readiness.discard(spec.drone_id)                    # Não espera por um drone que não chegou a offboard
+            if on_drone_done is not None:
+                on_drone_done(spec.drone_id, error)
+
+        if separation_monitor is not None:
+            monitor_task = asyncio.ensure_future(separation_monitor.run())
+        await asyncio.gather(release(), *(fly(spec) for spec in ready_specs))   # Inicia a tarefa para cada drone
+    finally:
+        if monitor_task is not None:
+            monitor_task.cancel()
+            separation_monitor.print_summary()
+        readiness.print_summary()
+        await servers.stop()                    # Encerra o servidor MAVSDK de cada drone (SIGTERM, SIGKILL se não sair)
+
+
 async def main():
     num_drones = 3         # Número de drones
-    time_offset = 1         # Tempo de offset entre os drones
-    altitude_steps = 0.5    # Altitude em metros para cada drone
-    altitude_offsets = [altitude_steps * i for i in range(num_drones)]  # Altitudes para cada drone
     home_positions = [(0, 3 * i, 0) for i in range(num_drones)]         # Posições iniciais dos drones
-    trajectory_offsets = [(0, 0, 0) for i in range(num_drones)]         # Offsets para as trajetórias dos drones
-    udp_ports = [14540 + i for i in range(num_drones)]                  # Portas UDP para cada drone
-
-    mavsdk_servers = []
-    for i in range(num_drones):                                         # Inicia o servidor MAVSDK para cada drone
-        port = 50040 + i
-        mavsdk_server = subprocess.Popen(["./mavsdk_server", "-p", str(port), f"udp://:{udp_ports[i]}"])
-        mavsdk_servers.append(mavsdk_server)
-
-    tasks = []
-    for i in range(num_drones):
-        tasks.append(asyncio.create_task(run_drone(i, trajectory_offsets[i], udp_ports[i], i * time_offset, altitude_offsets[i])))  # Inicia a tarefa para cada drone
 
-    await asyncio.gather(*tasks)  
+    # Portas, trajetórias, offsets de altitude (0.5 m por drone) e atrasos (1 s por drone) de cada drone
+    # Para mais drones ou vários processos, ver swarm_orchestrator.py e o manifesto swarm.csv
+    specs = default_swarm_manifest(num_drones)
+    min_separation = 2.0   # Distância mínima entre drones (m); o drone que se aproxima do outro é parado
 
-    for mavsdk_server in mavsdk_servers:    # Encerra o servidor MAVSDK de cada drone
-        os.kill(mavsdk_server.pid, signal.SIGTERM)
+    await run_swarm(specs, min_separation=min_separation, hold_policy=HOLD_CLOSING)
 
     print("All tasks completed. Exiting program.")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -1,5 +1,7 @@
 #!/usr/bin/env python
 
+import time
+
 import cv2
 import gi
 import numpy as np
@@ -31,7 +33,9 @@ class Video():
         Gst.init(None)
 
         self.port = port
-        self._frame = None
+        # (frame, sequence, capture time) of the last frame, replaced as a whole by the GStreamer
+        # thread so a reader never mixes a new frame with the sequence or time of the previous one
+        self._latest = (None, 0, None)
 
         # [Software component diagram](https://www.ardusub.com/software/components.html)
         # UDP video stream (:5600)
@@ -104,7 +108,15 @@ class Video():
         Returns:
             iterable: bool and image frame, cap.read() output
         """
-        return self._frame
+        return self._latest[0]
+
+    def latest_frame(self):
+        """Current frame with its sequence number and capture time, read atomically
+
+        Returns:
+            tuple: (frame, sequence, time.time() when it was received); (None, 0, None) before the first frame
+        """
+        return self._latest
 
     def frame_available(self):
         """Check if frame is available
@@ -112,10 +124,26 @@ class Video():
         Returns:
             bool: true if frame is available
         """
-        return type(self._frame) != type(None)
+        return type(self._latest[0]) != type(None)
+
+    def frame_sequence(self):
+        """Sequence number of the current frame
+
+        Returns:
+            int: number of frames received when the current frame arrived
+        """
+        return self._latest[1]
+
+    def frame_timestamp(self):
+        """Capture time of the current frame
+
+        Returns:
+            float: time.time() when the current frame was received, None before the first frame
+        """
+        return self._latest[2]
 
     def run(self):
-        """ Get frame to update _frame
+        """ Get frame to update _latest
         """
 
         self.start_gst(
@@ -130,8 +158,9 @@ class Video():
 
     def callback(self, sink):
         sample = sink.emit('pull-sample')
+        frame_time = time.time()
         new_frame = self.gst_to_opencv(sample)
-        self._frame = new_frame
+        self._latest = (new_frame, self._latest[1] + 1, frame_time)     # single assignment: published atomically
 
         return Gst.FlowReturn.OK
 
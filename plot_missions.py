@@ -0,0 +1,30 @@
+"""
+Plot trajectory files headless, in parallel (see functions/export_and_plot_shape.py).
+
+Every file gets its own PNG (shapes/show/drone_0.csv -> shapes/show/drone_0.png); no display is
+needed:
+    python plot_missions.py shapes/show
+    python plot_missions.py shapes/active.csv shapes/active2.csv --output-dir plots --workers 8
+"""
+
+import argparse
+import os
+import time
+
+from functions.export_and_plot_shape import DEFAULT_MAX_POINTS, find_trajectory_files, plot_trajectories
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plot trajectory files headless, in parallel.")
+    parser.add_argument("paths", nargs="+", help="Trajectory files (CSV, .traj, .npz) or directories of trajectory files")
+    parser.add_argument("--output-dir", default=None, help="Directory of the PNG files (default: next to every trajectory file)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: number of CPUs)")
+    parser.add_argument("--max-points", type=int, default=DEFAULT_MAX_POINTS, help="Largest number of points drawn per plot")
+    args = parser.parse_args()
+
+    files = []
+    for path in args.paths:
+        files.extend(find_trajectory_files(path) if os.path.isdir(path) else [path])
+    start = time.perf_counter()
+    plots = plot_trajectories(files, output_dir=args.output_dir, max_workers=args.workers, max_points=args.max_points)
+    print(f"Created {len(plots)} plots in {time.perf_counter() - start:.2f} s")
@@ -0,0 +1,224 @@
+"""
+Multi-process swarm orchestrator.
+
+Reads a swarm manifest (see functions/swarm_manifest.py), splits the drones across N worker
+processes and runs each shard with offboard_multiple_from_csv.run_swarm on the worker's own event
+loop, so a large swarm is no longer limited by a single saturated core.
+
+The coordinator (this process):
+- releases all workers at once through a start barrier, once every drone of every worker is in
+  offboard, by handing them the same mission start time on the monotonic clock (see
+  functions/mission_clock.py)
+- aggregates the heartbeats of the workers (drones still flying, event loop lag) and the result
+  of every drone
+- shuts the workers down cleanly on Ctrl+C, or when a worker dies
+
+With --min-separation every worker runs a separation monitor (functions/separation_monitor.py)
+over the drones of its own shard only: pairs of drones flown by different workers are not
+checked, so drones that may come close should be put in the same shard of the manifest.
+
+Usage:
+    python swarm_orchestrator.py swarm.csv --workers 4
+    python swarm_orchestrator.py swarm.csv --workers 4 --min-separation 2.0 --hold-policy closing
+"""
+
+import argparse
+import asyncio
+import math
+import multiprocessing as mp
+import os
+import queue
+import signal
+import time
+
+from functions.swarm_manifest import read_swarm_manifest, shard_manifest
+from functions.flight_recorder import FlightRecorder, RECORD_EXTENSION
+from functions.separation_monitor import HOLD_CLOSING, HOLD_POLICIES
+
+
+HEARTBEAT_INTERVAL = 1.0        # seconds between worker heartbeats
+SHUTDOWN_TIMEOUT = 10.0         # seconds given to the workers to exit before they are terminated
+START_LEAD = 1.0                # seconds between the release of the start barrier and mission time 0
+STOP_POLL_INTERVAL = 0.2        # seconds between two checks of the shutdown event by a worker
+
+
+def run_worker(worker_index, specs, mavsdk_server_path, start_event, mission_start, stop_event, status_queue, record_dir=None, resume=None,
+               separation=None):
+    """
+    Entry point of a worker process: fly a shard of the swarm on a dedicated event loop.
+
+    `resume` holds the run_swarm arguments that resume the mission mid-way (resume_phase,
+    resume_at, min_transition), or None to fly it from the start. `separation` holds the run_swarm
+    arguments of the separation monitor of the shard (min_separation, hold_policy), or None.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)    # Ctrl+C is handled by the coordinator
+    recorder = None
+    if record_dir is not None:
+        recorder = FlightRecorder(os.path.join(record_dir, f"worker_{worker_index}{RECORD_EXTENSION}"))
+    try:
+        asyncio.run(_worker_main(worker_index, specs, mavsdk_server_path, start_event, mission_start, stop_event, status_queue, recorder, resume,
+                                 separation))
+    finally:
+        if recorder is not None:
+            recorder.close()
+            if recorder.error is not None:
+                print(f"⚠️ Worker {worker_index}: flight record {recorder.path} incomplete: {recorder.error}")
+
+
+async def _worker_main(worker_index, specs, mavsdk_server_path, start_event, mission_start, stop_event, status_queue, recorder, resume, separation):
+    # Imported here so the coordinator does not need MAVSDK
+    from offboard_multiple_from_csv import run_swarm
+
+    loop = asyncio.get_running_loop()
+    flying = {spec.drone_id for spec in specs}
+
+    async def before_start():
+        status_queue.put(("ready", worker_index, [spec.drone_id for spec in specs]))
+        await loop.run_in_executor(None, start_event.wait)
+        return None if math.isnan(mission_start.value) else mission_start.value
+
+    def on_drone_done(drone_id, error):
+        flying.discard(drone_id)
+        status_queue.put(("drone_done", worker_index, drone_id, None if error is None else repr(error)))
+
+    async def heartbeat():
+        while True:
+            start = loop.time()
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            lag = loop.time() - start - HEARTBEAT_INTERVAL     # how late the event loop woke up
+            status_queue.put(("heartbeat", worker_index, len(flying), lag))
+
+    swarm = asyncio.ensure_future(run_swarm(specs, mavsdk_server_path, before_start=before_start, on_drone_done=on_drone_done,
+                                               recorder=recorder, **(resume or {}), **(separation or {})))
+    async def wait_for_stop():
+        # stop_event is shared by every worker and only set by the coordinator: poll it instead of
+        # blocking an executor thread on it, so a worker that finishes its shard never has to set it
+        while not stop_event.is_set():
+            await asyncio.sleep(STOP_POLL_INTERVAL)
+
+    heartbeat_task = asyncio.ensure_future(heartbeat())
+    stop = asyncio.ensure_future(wait_for_stop())
+
+    await asyncio.wait([swarm, stop], return_when=asyncio.FIRST_COMPLETED)
+    if not swarm.done():
+        # Shutdown requested: cancelling run_swarm stops every drone task and the mavsdk_servers
+        swarm.cancel()
+    try:
+        await swarm
+    except asyncio.CancelledError:
+        pass
+    heartbeat_task.cancel()
+    stop.cancel()
+    status_queue.put(("worker_done", worker_index))
+
+
+def orchestrate(manifest_path, num_workers=None, mavsdk_server_path="./mavsdk_server", record_dir=None, resume=None, separation=None):
+    specs = read_swarm_manifest(manifest_path)
+    if num_workers is None:
+        num_workers = min(os.cpu_count() or 1, len(specs))
+    shards = shard_manifest(specs, num_workers)
+
+    ctx = mp.get_context("spawn")
+    start_event = ctx.Event()
+    mission_start = ctx.Value("d", math.nan)   # mission time 0 on the monotonic clock, shared by all processes
+    stop_event = ctx.Event()
+    status_queue = ctx.Queue()
+    workers = [
+        ctx.Process(target=run_worker, name=f"swarm-worker-{i}",
+                    args=(i, shard, mavsdk_server_path, start_event, mission_start, stop_event, status_queue, record_dir, resume,
+                          separation))
+        for i, shard in enumerate(shards)
+    ]
+    if record_dir is not None:
+        os.makedirs(record_dir, exist_ok=True)
+    print(f"🚀 {len(specs)} drones on {len(workers)} worker processes")
+    for worker in workers:
+        worker.start()
+
+    ready = set()
+    running = set(range(len(workers)))
+    health = {}                     # worker -> (drones flying, event loop lag)
+    results = {}                    # drone_id -> error or None
+    last_report = time.monotonic()
+    start_time = None
+
+    try:
+        while running:
+            try:
+                message = status_queue.get(timeout=HEARTBEAT_INTERVAL)
+            except queue.Empty:
+                message = None
+
+            if message is not None:
+                kind, worker_index = message[0], message[1]
+                if kind == "ready":
+                    ready.add(worker_index)
+                    if len(ready) == len(workers):
+                        print("🟢 All workers ready, releasing the start barrier")
+                        start_time = time.monotonic()
+                        mission_start.value = start_time + START_LEAD
+                        start_event.set()
+                elif kind == "heartbeat":
+                    health[worker_index] = message[2:]
+                elif kind == "drone_done":
+                    drone_id, error = message[2], message[3]
+                    results[drone_id] = error
+                    print(f"{'✅' if error is None else '❌'} Drone {drone_id} finished on worker {worker_index}" + (f": {error}" if error else ""))
+                elif kind == "worker_done":
+                    running.discard(worker_index)
+
+            for i in list(running):
+                if not workers[i].is_alive() and workers[i].exitcode not in (0, None):
+                    print(f"❌ Worker {i} died with exit code {workers[i].exitcode}, shutting down the swarm")
+                    running.discard(i)
+                    stop_event.set()
+
+            if health and time.monotonic() - last_report >= 5 * HEARTBEAT_INTERVAL:
+                last_report = time.monotonic()
+                flying = sum(h[0] for h in health.values())
+                max_lag = max(h[1] for h in health.values())
+                print(f"💓 {flying} drones flying, max event loop lag {max_lag * 1e3:.1f} ms")
+    except KeyboardInterrupt:
+        print("🛑 Shutdown requested, stopping the workers")
+        stop_event.set()
+    finally:
+        start_event.set()           # workers still waiting on the barrier must be able to exit
+        deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+        for worker in workers:
+            worker.join(max(deadline - time.monotonic(), 0))
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+
+    failed = [drone_id for drone_id, error in results.items() if error is not None]
+    elapsed = f" in {time.monotonic() - start_time:.1f} s" if start_time is not None else ""
+    print(f"All workers stopped{elapsed}: {len(results) - len(failed)} drones completed, {len(failed)} failed, "
+          f"{len(specs) - len(results)} not finished")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fly a swarm manifest across several worker processes.")
+    parser.add_argument("manifest", help="Swarm manifest CSV (see functions/swarm_manifest.py)")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: one per core, at most one per drone)")
+    parser.add_argument("--mavsdk-server", default="./mavsdk_server", help="Path of the mavsdk_server binary")
+    parser.add_argument("--record-dir", default=None, help="Record setpoints, telemetry and detections of each worker into this directory")
+    parser.add_argument("--resume-phase", type=int, default=None, help="Resume the mission at the start of the phase with this mode code")
+    parser.add_argument("--resume-at", type=float, default=None,
+                        help="Resume the mission at this mission time (with --resume-phase, relative to the start of the phase)")
+    parser.add_argument("--min-transition", type=float, default=0.0,
+                        help="Shortest transition to the resume point, in seconds (the same for every drone keeps their time offsets)")
+    parser.add_argument("--min-separation", type=float, default=None,
+                        help="Minimum distance between drones in meters, checked by a separation monitor in every worker; "
+                             "each monitor only covers the drones of its own worker, never pairs split across workers")
+    parser.add_argument("--hold-policy", choices=HOLD_POLICIES, default=HOLD_CLOSING,
+                        help="Drone held on a separation violation (with --min-separation): 'closing' holds the drone closing "
+                             "on the other, 'higher_id' the higher id, 'none' only reports")
+    args = parser.parse_args()
+    separation = None
+    if args.min_separation is not None:
+        separation = {"min_separation": args.min_separation, "hold_policy": args.hold_policy}
+    resume = None
+    if args.resume_phase is not None or args.resume_at is not None:
+        resume = {"resume_phase": args.resume_phase, "resume_at": args.resume_at, "min_transition": args.min_transition}
+    orchestrate(args.manifest, args.workers, args.mavsdk_server, args.record_dir, resume, separation)